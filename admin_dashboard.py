@@ -0,0 +1,94 @@
+# admin_dashboard.py
+# 수강신청 기간 중 과목별/그룹별/학기별 신청 인원을 보여주는 관리자(상담 교사)용 화면.
+# 실행: streamlit run admin_dashboard.py
+#
+# 집계는 enrollment.EnrollmentTracker 하나를 모든 관리자 세션이 공유하며,
+# 저장소에서는 새로 추가되었거나 다시 제출로 제자리에서 바뀐 행만 읽습니다.
+import json
+from datetime import datetime
+
+import streamlit as st
+
+from catalog import get_catalog_watcher, YEARS, SEMESTERS
+from enrollment import EnrollmentTracker, course_table
+from rate_limit import get_sheets_limiter, PRIORITY_ADMIN
+from storage import default_storage_url, open_storage, warm_up_storage
+
+COURSES_JSON_PATH = 'courses.json'
+STORAGE_URL = default_storage_url()
+REFRESH_SECONDS = 15  # 화면 자동 갱신 주기 (저장소 읽기도 이 주기에 최대 한 번)
+
+st.set_page_config(page_title="수강신청 현황 (관리자)", layout="wide")
+st.title("📊 수강신청 현황")
+
+creds_dict = None
+if STORAGE_URL.startswith("gsheets://"):
+    try:
+        creds_dict = st.secrets["google_sheets"].to_dict()
+    except KeyError as e:
+        st.error(f"Streamlit Secrets 설정 오류: '{e}' 키를 찾을 수 없습니다. Secrets 설정을 확인해주세요.")
+        st.stop()
+    warm_up_storage(STORAGE_URL, creds_dict)
+
+
+@st.cache_resource  # 모든 관리자 세션이 저장소 연결과 집계를 공유
+def get_tracker(catalog_version):
+    """카탈로그 버전별로 저장소 연결과 집계기를 하나만 만듭니다. (compact 행은 제출 당시 버전으로 풂)"""
+    watcher = get_catalog_watcher(COURSES_JSON_PATH)
+    tracker = EnrollmentTracker(watcher.get(catalog_version), resolve_catalog=watcher.get)
+    # 관리자 읽기는 학생 제출이 몰릴 때 Sheets 할당량을 양보합니다.
+    return open_storage(STORAGE_URL, creds_dict, PRIORITY_ADMIN), tracker
+
+
+try:
+    catalog = get_catalog_watcher(COURSES_JSON_PATH).current
+except (FileNotFoundError, json.JSONDecodeError) as e:
+    st.error(f"과목 정보 파일({COURSES_JSON_PATH})을 읽을 수 없습니다: {e}")
+    st.stop()
+
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def render_dashboard():
+    try:
+        storage, tracker = get_tracker(catalog.version)
+        snapshot = tracker.refresh_if_stale(storage, REFRESH_SECONDS - 1)
+    except Exception as e:
+        st.error(f"저장소에서 제출 내역을 읽는 중 오류: {e}")
+        return
+
+    refreshed_at = datetime.fromtimestamp(snapshot['refreshedAt']).strftime('%H:%M:%S')
+    col1, col2, col3 = st.columns(3)
+    col1.metric("제출 학생 수", snapshot['studentCount'])
+    col2.metric("처리한 행 수", snapshot['rowsProcessed'])
+    col3.metric("마지막 갱신", refreshed_at)
+    if creds_dict is not None:
+        limiter_stats = get_sheets_limiter().stats()
+        st.caption(" · ".join(
+            f"Sheets {'읽기' if kind == 'read' else '쓰기'}: 대기 {s['queueDepth']}건, "
+            f"평균 대기 {s['waitSeconds'] / s['calls'] if s['calls'] else 0.0:.2f}초, 재시도 {s['retries']}회"
+            for kind, s in limiter_stats.items()))
+
+    st.header("학기별 현황")
+    st.dataframe(
+        [{'학기': f"{y}학년 {s}학기",
+          '신청 학생 수': snapshot['semesterStudents'].get(f"Y{y}S{s}", 0),
+          '신청 건수': snapshot['semesterCounts'].get(f"Y{y}S{s}", 0)}
+         for y in YEARS for s in SEMESTERS],
+        hide_index=True, use_container_width=True,
+    )
+
+    st.header("그룹별 신청 건수")
+    st.dataframe(
+        [{'학기': f"{semester_key[1]}학년 {semester_key[3]}학기", '그룹': group_name, '신청 건수': count}
+         for (semester_key, group_name), count in sorted(snapshot['groupCounts'].items())],
+        hide_index=True, use_container_width=True,
+    )
+
+    st.header("과목별 신청 인원")
+    tabs = st.tabs([f"{y}학년 {s}학기" for y in YEARS for s in SEMESTERS])
+    for tab, semester_key in zip(tabs, [f"Y{y}S{s}" for y in YEARS for s in SEMESTERS]):
+        with tab:
+            st.dataframe(course_table(catalog, snapshot, semester_key), hide_index=True, use_container_width=True)
+
+
+render_dashboard()
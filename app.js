@@ -3,6 +3,7 @@
 const COURSES_JSON_PATH = 'courses.json';
 const MANDATORY_GROUP_NAME = "학교지정";
 const LOCAL_STORAGE_KEY = 'courseSelectionsApp_Y2Y3'; // LocalStorage 키 변경
+const SUBMIT_API_URL = 'api/submissions'; // submit_server.py의 제출 API
 
 const ART_MUSIC_COURSE_IDS = ["c19", "c20", "c40", "c41", "c55", "c56", "c82", "c83"];
 const KES_MAX_COURSE_IDS = ["c34", "c57", "c58", "c59", "c60", "c84", "c85"];
@@ -26,6 +27,9 @@ let groupedCoursesByYearSemester = { 2: { 1: {}, 2: {} }, 3: { 1: {}, 2: {} } };
 let selectedCourseIds = new Set();
 let studentName = '';
 let studentIdNumber = '';
+let catalogVersion = ''; // courses.json의 ETag (서버가 같은 버전의 규칙으로 다시 검사)
+let isSubmitting = false;
+let pendingSubmission = null; // { key, id }: 같은 내용을 다시 보내면 같은 접수번호를 써서 중복 접수를 막음
 
 /**
  * Initializes the application.
@@ -89,6 +93,8 @@ function cacheDomElements() {
     domElements.studentNameInput = document.getElementById('studentName');
     domElements.studentIdInput = document.getElementById('studentId');
     domElements.downloadPdfBtn = document.getElementById('download-pdf-btn');
+    domElements.submitBtn = document.getElementById('submit-btn');
+    domElements.submitStatusContainer = document.getElementById('submit-status-container');
     domElements.overallValidationMessagesContainer = document.getElementById('overall-validation-messages-container');
 
     for (const year of [2, 3]) {
@@ -107,6 +113,7 @@ async function fetchCourses() {
     if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status} while fetching ${COURSES_JSON_PATH}`);
     }
+    catalogVersion = (response.headers.get('ETag') || '').replace(/^W\//, '').replace(/"/g, '');
     return await response.json();
 }
 
@@ -228,6 +235,7 @@ function createCourseItemElement(course, groupName, year, semester) { // year, s
 
 function setupEventListeners() {
     domElements.downloadPdfBtn.addEventListener('click', handlePdfDownload);
+    if (domElements.submitBtn) domElements.submitBtn.addEventListener('click', handleSubmit);
     domElements.studentNameInput.addEventListener('input', handleStudentNameChange);
     if (domElements.studentIdInput) domElements.studentIdInput.addEventListener('input', handleStudentIdChange);
 }
@@ -344,6 +352,7 @@ function updateValidationAndUI() {
     // Overall validation and PDF button
     const overallIsValid = allSemestersValid && !duplicateCourseError;
     if (domElements.downloadPdfBtn) domElements.downloadPdfBtn.disabled = !overallIsValid;
+    if (domElements.submitBtn) domElements.submitBtn.disabled = !overallIsValid || !studentName || !studentIdNumber || isSubmitting;
     
     if (domElements.overallValidationMessagesContainer) {
         domElements.overallValidationMessagesContainer.innerHTML = ''; 
@@ -454,6 +463,84 @@ function validateSelectionsForYearSemester(year, semester) {
     return { isValid: yearSemesterIsValid, messages, currentTotalHours: currentTotalHoursInYearSemester };
 }
 
+/**
+ * Returns the submission ID for the current name/ID/selection.
+ * The same content keeps the same ID (also across reloads), so a retry after a lost response is not queued twice.
+ * @returns {string} 16-digit hex submission ID.
+ */
+function getSubmissionId() {
+    const courseIds = Array.from(selectedCourseIds).sort();
+    const key = JSON.stringify([studentName, studentIdNumber, courseIds, catalogVersion]);
+    if (!pendingSubmission || pendingSubmission.key !== key) {
+        const bytes = crypto.getRandomValues(new Uint8Array(8));
+        const id = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+        pendingSubmission = { key: key, id: id };
+        saveStateToLocalStorage();
+    }
+    return pendingSubmission.id;
+}
+
+/**
+ * Sends the current selections to the submission API.
+ * The server re-validates them with the same rules as the Streamlit app and queues them for storage.
+ */
+async function handleSubmit() {
+    if (domElements.submitBtn.disabled) return;
+    isSubmitting = true;
+    domElements.submitBtn.disabled = true;
+    showSubmitMessages(['제출하는 중입니다...'], 'info');
+
+    try {
+        const response = await fetch(SUBMIT_API_URL, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                studentName: studentName,
+                studentId: studentIdNumber,
+                courseIds: Array.from(selectedCourseIds),
+                catalogVersion: catalogVersion,
+                submissionId: getSubmissionId()
+            })
+        });
+        const result = await response.json();
+        if (response.status === 202 || response.status === 200) {
+            showSubmitMessages([
+                `'${studentName}' 학생의 수강신청 내역이 접수되었습니다! (접수번호: ${result.submissionId})`,
+                '접수된 내역은 잠시 후 저장소에 자동으로 저장됩니다.'
+            ], 'success');
+        } else if (response.status === 422) {
+            showSubmitMessages(['서버 검사에서 조건이 충족되지 않아 접수하지 못했습니다.', ...result.errors], 'error');
+        } else if (response.status === 409 && result.fullCourses) {
+            const names = result.fullCourses.map(c => c.name).join(', ');
+            showSubmitMessages([`${result.error} (${names}) 다른 과목을 골라 다시 제출해주세요.`], 'error');
+        } else {
+            showSubmitMessages([result.error || `제출 중 오류가 발생했습니다. (HTTP ${response.status})`], 'error');
+        }
+    } catch (error) {
+        console.error("Error submitting selections:", error);
+        showSubmitMessages(['제출 서버에 연결할 수 없습니다. 잠시 후 다시 시도해주세요.'], 'error');
+    } finally {
+        isSubmitting = false;
+        updateValidationAndUI();
+    }
+}
+
+/**
+ * Replaces the submit status messages.
+ * @param {string[]} texts - Messages to show.
+ * @param {string} type - 'success', 'error' or 'info'.
+ */
+function showSubmitMessages(texts, type) {
+    if (!domElements.submitStatusContainer) return;
+    domElements.submitStatusContainer.innerHTML = '';
+    texts.forEach(text => {
+        const p = document.createElement('p');
+        p.textContent = text;
+        if (type !== 'info') p.classList.add(type === 'error' ? 'validation-error' : 'validation-success');
+        domElements.submitStatusContainer.appendChild(p);
+    });
+}
+
 /**
  * Handles the PDF download button click.
  * Generates and downloads a PDF of selected courses, grouped by year and semester.
@@ -634,7 +721,8 @@ function saveStateToLocalStorage() {
     const state = {
         selectedCourseIds: Array.from(selectedCourseIds),
         studentName: studentName,
-        studentIdNumber: studentIdNumber // 학번 정보 저장
+        studentIdNumber: studentIdNumber, // 학번 정보 저장
+        pendingSubmission: pendingSubmission
     };
     localStorage.setItem(LOCAL_STORAGE_KEY, JSON.stringify(state));
 }
@@ -647,6 +735,7 @@ function loadStateFromLocalStorage() {
             selectedCourseIds = new Set(state.selectedCourseIds || []);
             studentName = state.studentName || '';
             studentIdNumber = state.studentIdNumber || ''; // 학번 정보 로드
+            pendingSubmission = state.pendingSubmission || null;
         } catch (e) {
             console.error("Error parsing state from localStorage:", e);
             selectedCourseIds = new Set(); 
@@ -1,8 +1,19 @@
 import streamlit as st
 import json
-from google_sheets import append_to_sheet
+from datetime import datetime
+from storage import default_storage_url, open_storage, submission_rows
 from pdf_utils import generate_pdf
 
+# 저장소 URL (COURSE_STORAGE_URL, 예: sqlite:///tmp/registrations.db). 지정하지 않으면 Google Sheets 사용
+STORAGE_URL = default_storage_url()
+
+
+@st.cache_resource
+def get_storage():
+    creds_dict = st.secrets["google_sheets"].to_dict() if STORAGE_URL.startswith("gsheets://") else None
+    return open_storage(STORAGE_URL, creds_dict)
+
+
 # 앱 설정
 st.set_page_config(page_title="정현고 수강신청", layout="wide")
 st.title("정현고 수강신청 시스템")
@@ -61,15 +72,15 @@ if submitted:
         st.warning("최소 한 과목 이상을 선택해야 합니다.")
     else:
         try:
-            append_to_sheet(name, student_id, selected_courses)
-            pdf_file = generate_pdf(name, student_id, selected_courses)
-            with open(pdf_file, "rb") as f:
-                st.success("✅ 수강신청 완료! PDF 파일을 다운로드하세요.")
-                st.download_button(
-                    label="📄 수강신청 내역 PDF 다운로드",
-                    data=f,
-                    file_name=pdf_file,
-                    mime="application/pdf"
-                )
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            get_storage().append_rows(submission_rows(timestamp, name, student_id, selected_courses))
+            pdf_bytes = generate_pdf(name, student_id, selected_courses)
+            st.success("✅ 수강신청 완료! PDF 파일을 다운로드하세요.")
+            st.download_button(
+                label="📄 수강신청 내역 PDF 다운로드",
+                data=pdf_bytes,
+                file_name=f"{student_id}_{name}_수강신청.pdf",
+                mime="application/pdf"
+            )
         except Exception as e:
             st.error(f"오류가 발생했습니다: {e}")
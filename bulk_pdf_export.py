@@ -0,0 +1,249 @@
+# bulk_pdf_export.py
+# 수강신청 마감 후 전체 학생의 수강신청 내역 PDF를 한 번에 만드는 일괄 출력 도구.
+# 저장소의 제출 행을 학번별로 묶고(학생마다 최신 제출만), 여러 프로세스에서 병렬로 PDF를 만들어
+# ZIP 파일 또는 (반별) 디렉터리에 차례로 기록합니다.
+#
+# - 재개: 이미 출력된 학생은 건너뜁니다. 중단 후 같은 명령을 다시 실행하면 이어서 만듭니다.
+#   ZIP 출력은 진행 중 결과를 <출력>.parts/의 조각 ZIP에 두었다가 끝난 뒤 하나로 합칩니다.
+# - 메모리: 동시에 처리 중인 PDF 수를 작업 프로세스 수의 몇 배로 제한합니다.
+#
+# 사용 예:
+#   python bulk_pdf_export.py --storage sqlite:///registrations.db --out pdfs.zip
+#   python bulk_pdf_export.py --storage gsheets://<ID>/Sheet1 --creds key.json --out pdfs --class-slice 1:3
+import argparse
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from catalog import catalog_archive_dir, load_catalog, semester_key_of
+from record_codec import catalog_resolver, iter_long_rows
+from storage import latest_selections, open_storage_for_cli
+
+_worker_catalog = None
+
+
+def _init_worker(courses_path):
+    """작업 프로세스마다 카탈로그와 폰트를 한 번만 준비합니다."""
+    global _worker_catalog
+    from pdf_utils import check_fonts
+    _worker_catalog = load_catalog(courses_path)
+    check_fonts()
+
+
+def _render_student(task):
+    from pdf_utils import generate_pdf_bytes, sorted_courses_for_pdf
+
+    arcname, student_id, student_name, course_ids = task
+    selected_by_semester = {key: set() for key in _worker_catalog.semester_keys}
+    for cid in course_ids:
+        course = _worker_catalog.by_id.get(cid)
+        if course is not None:
+            selected_by_semester[semester_key_of(course)].add(cid)
+    pdf_bytes = generate_pdf_bytes(student_name, student_id, sorted_courses_for_pdf(_worker_catalog, selected_by_semester))
+    return arcname, bytes(pdf_bytes)
+
+
+def _safe_name(text):
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', str(text)).strip('_') or 'unknown'
+
+
+def output_name(student_id, student_name, class_slice=None):
+    """출력 파일의 상대 경로를 만듭니다. class_slice가 있으면 학번 일부를 반 디렉터리로 사용합니다."""
+    file_name = f"수강신청_{_safe_name(student_id)}_{_safe_name(student_name)}.pdf"
+    if class_slice:
+        class_key = str(student_id)[class_slice] or 'unknown'
+        return f"{_safe_name(class_key)}반/{file_name}"
+    return file_name
+
+
+class ZipSink:
+    """ZIP 출력. 진행 중에는 checkpoint개마다 닫힌 조각 ZIP(<출력>.parts/part-NNNNN.zip)을 따로 만들고,
+    모두 끝나면(finish) 조각을 하나의 ZIP으로 합칩니다.
+
+    조각은 임시 이름으로 쓴 뒤 다 닫고 나서 이름을 바꾸므로, 중단되더라도 완성된 조각은 항상 온전하며
+    잃는 것은 쓰던 조각(최대 checkpoint개)뿐입니다. 기존 ZIP에 덧붙여 쓰지 않습니다.
+    """
+
+    PART_PATTERN = re.compile(r"^part-(\d+)\.zip$")
+
+    def __init__(self, path, checkpoint=50):
+        self.path = path
+        self.checkpoint = checkpoint
+        self.parts_dir = path + ".parts"
+        os.makedirs(self.parts_dir, exist_ok=True)
+        self.existing = set()
+        self._sources = []  # 합칠 ZIP 목록 (이전에 완성된 출력 ZIP, 조각 순서대로)
+        if os.path.exists(path):
+            if zipfile.is_zipfile(path):
+                self._sources.append(path)
+            else:  # 이전 버전(덧붙여 쓰기)이 중단되며 남긴 손상된 ZIP
+                backup = path + ".broken"
+                os.replace(path, backup)
+                print(f"손상된 ZIP을 {backup}(으)로 옮깁니다.", file=sys.stderr)
+        self._next_part = 1
+        for name in sorted(os.listdir(self.parts_dir)):
+            match = self.PART_PATTERN.match(name)
+            if match:
+                self._sources.append(os.path.join(self.parts_dir, name))
+                self._next_part = max(self._next_part, int(match.group(1)) + 1)
+            elif name.endswith(".tmp"):
+                os.unlink(os.path.join(self.parts_dir, name))  # 중단된 조각
+        for source in self._sources:
+            with zipfile.ZipFile(source) as zf:
+                self.existing.update(zf.namelist())
+        self._zf = None
+        self._tmp_path = None
+        self._since_checkpoint = 0
+
+    def exists(self, arcname):
+        return arcname in self.existing
+
+    def write(self, arcname, data):
+        if self._zf is None:
+            self._tmp_path = os.path.join(self.parts_dir, f"part-{self._next_part:05d}.zip.tmp")
+            self._zf = zipfile.ZipFile(self._tmp_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._zf.writestr(arcname, data)
+        self.existing.add(arcname)
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint:
+            self.flush()
+
+    def flush(self):
+        """쓰던 조각을 닫아 완성된 조각으로 만듭니다."""
+        if self._zf is not None:
+            self._zf.close()
+            part_path = self._tmp_path[:-len(".tmp")]
+            os.replace(self._tmp_path, part_path)
+            self._sources.append(part_path)
+            self._next_part += 1
+            self._zf = None
+            self._tmp_path = None
+        self._since_checkpoint = 0
+
+    def close(self):
+        self.flush()
+
+    def finish(self):
+        """모든 조각(과 이전 출력 ZIP)을 하나의 ZIP으로 합치고 조각 디렉터리를 지웁니다."""
+        self.flush()
+        if self._sources != [self.path]:
+            tmp = self.path + ".tmp"
+            with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as out:
+                for source in self._sources:
+                    with zipfile.ZipFile(source) as zf:
+                        for info in zf.infolist():
+                            out.writestr(info, zf.read(info))
+            os.replace(tmp, self.path)
+            self._sources = [self.path]
+        for name in os.listdir(self.parts_dir):
+            os.unlink(os.path.join(self.parts_dir, name))
+        os.rmdir(self.parts_dir)
+
+
+class DirectorySink:
+    """디렉터리 출력. 임시 파일에 쓴 뒤 이름을 바꿔, 반쯤 쓰인 파일이 완료로 취급되지 않게 합니다."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def exists(self, arcname):
+        return os.path.exists(os.path.join(self.path, arcname))
+
+    def write(self, arcname, data):
+        target = os.path.join(self.path, arcname)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = target + ".part"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, target)
+
+    def close(self):
+        pass
+
+    def finish(self):
+        pass
+
+
+def _parse_slice(text):
+    if not text:
+        return None
+    start, _, end = text.partition(':')
+    return slice(int(start) if start else None, int(end) if end else None)
+
+
+def export_all(storage, courses_path, sink, workers, class_slice=None, chunk_rows=1000, in_flight_per_worker=4):
+    # compact 행은 제출 당시 버전으로 풉니다. 풀 수 없는 행이 있으면 그 학생을 빠뜨리지 않도록 시작 전에 멈춤
+    resolve = catalog_resolver(load_catalog(courses_path), archive_dir=catalog_archive_dir(courses_path))
+    students = latest_selections(iter_long_rows(storage, resolve, chunk_rows=chunk_rows))
+    tasks = []
+    skipped = 0
+    for student_id in sorted(students):
+        entry = students[student_id]
+        arcname = output_name(student_id, entry['name'], class_slice)
+        if sink.exists(arcname):
+            skipped += 1
+            continue
+        tasks.append((arcname, student_id, entry['name'], entry['courseIds']))
+    students.clear()
+
+    total = len(tasks)
+    print(f"학생 {total + skipped}명 중 {skipped}명은 이미 출력됨, {total}명 생성 시작 (프로세스 {workers}개)", file=sys.stderr)
+    started = time.perf_counter()
+    done = 0
+    max_in_flight = max(1, workers * in_flight_per_worker)
+    task_iter = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(courses_path,)) as pool:
+        pending = set()
+        for task in task_iter:
+            pending.add(pool.submit(_render_student, task))
+            if len(pending) >= max_in_flight:
+                break
+        try:
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    arcname, data = future.result()
+                    sink.write(arcname, data)
+                    done += 1
+                    next_task = next(task_iter, None)
+                    if next_task is not None:
+                        pending.add(pool.submit(_render_student, next_task))
+                elapsed = time.perf_counter() - started
+                rate = done / elapsed if elapsed else 0.0
+                eta = (total - done) / rate if rate else 0.0
+                print(f"\r[{done}/{total}] {rate:.1f}개/초, 남은 시간 약 {eta:.0f}초", end='', file=sys.stderr)
+        finally:
+            sink.close()
+    print(file=sys.stderr)
+    sink.finish()
+    return done, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="전체 학생 수강신청 내역 PDF 일괄 출력")
+    parser.add_argument("--storage", default=os.environ.get("COURSE_STORAGE_URL"), required=not os.environ.get("COURSE_STORAGE_URL"),
+                        help="저장소 URL (sqlite:///파일.db 또는 gsheets://<ID>/<시트>), 기본값: COURSE_STORAGE_URL")
+    parser.add_argument("--creds", help="Google 서비스 계정 키(JSON) 파일 경로 (gsheets 사용 시)")
+    parser.add_argument("--courses", default="courses.json", help="과목 정보 파일 (기본: courses.json)")
+    parser.add_argument("--out", required=True, help="출력 경로 (.zip으로 끝나면 ZIP, 아니면 디렉터리)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="PDF 생성 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--class-slice", help="학번에서 반을 나타내는 부분 (예: 1:3 → 학번[1:3]), 지정하면 반별 디렉터리로 출력")
+    parser.add_argument("--chunk-rows", type=int, default=1000, help="저장소에서 한 번에 읽을 행 수")
+    args = parser.parse_args(argv)
+
+    storage = open_storage_for_cli(args.storage, args.creds)
+    sink = ZipSink(args.out) if args.out.lower().endswith(".zip") else DirectorySink(args.out)
+    try:
+        done, skipped = export_all(storage, os.path.abspath(args.courses), sink, args.workers,
+                                   class_slice=_parse_slice(args.class_slice), chunk_rows=args.chunk_rows)
+    except (LookupError, ValueError) as e:
+        parser.exit(2, f"오류: {e}\n")
+    print(f"완료: 새로 만든 PDF {done}개, 건너뛴 PDF {skipped}개 → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# bulk_validate.py
+# 종이 신청서를 옮겨 적은 CSV/JSONL 파일의 학생별 선택을 앱과 같은 규칙(validation.RuleEngine)으로 일괄 검사하는 도구.
+# 그룹별 선택 개수, 학기별 학점(REQUIRED_TOTAL_HOURS_MAP), 미술/음악·국영수 개수, 과목명 중복을 검사합니다.
+#
+# - 입력은 한 줄씩 읽어 batch_size개씩 작업 프로세스에 나누어 주고, 처리 중인 묶음 수를 제한하므로
+#   파일 크기와 관계없이 메모리 사용량이 일정합니다.
+# - 결과는 입력 순서대로 학생마다 한 행씩 바로 기록합니다. (--only-invalid면 오류가 있는 학생만)
+# - 학교지정 과목은 앱에서와 같이 항상 선택된 것으로 보고 검사합니다.
+#
+# 입력 형식
+#   CSV:   학번 열과 과목 ID 열(공백/쉼표/세미콜론으로 구분) 필요, 이름 열은 선택 (열 이름은 옵션으로 변경)
+#   JSONL: {"studentId": "2025001", "studentName": "홍길동", "courseIds": ["c1", "c2", ...]}
+#
+# 사용 예:
+#   python bulk_validate.py paper_forms.csv --out report.csv
+#   python bulk_validate.py paper_forms.jsonl --out report.jsonl --only-invalid --workers 4
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog import load_catalog
+from validation import get_rule_engine, validate_record
+
+REPORT_HEADER = ["Line", "Student ID", "Student Name", "Valid", "Errors"]
+_ID_SEPARATOR = re.compile(r"[\s,;]+")
+
+_worker_engine = None
+
+
+# --- 입력 읽기 ---
+def iter_csv_records(f, id_column, name_column, courses_column):
+    """CSV에서 (줄 번호, 학번, 이름, 과목 ID 목록 또는 오류 문자열)을 차례로 반환합니다."""
+    reader = csv.DictReader(f)
+    missing = [c for c in (id_column, courses_column) if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV에 필요한 열이 없습니다: {', '.join(missing)} (있는 열: {reader.fieldnames})")
+    for row in reader:
+        course_ids = [cid for cid in _ID_SEPARATOR.split(row.get(courses_column) or "") if cid]
+        yield reader.line_num, (row.get(id_column) or "").strip(), (row.get(name_column) or "").strip(), course_ids
+
+
+def iter_jsonl_records(f):
+    """JSONL에서 (줄 번호, 학번, 이름, 과목 ID 목록 또는 오류 문자열)을 차례로 반환합니다."""
+    for line_no, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            course_ids = record.get("courseIds")
+            if not isinstance(course_ids, list):
+                raise ValueError("courseIds가 목록이 아닙니다.")
+            yield line_no, str(record.get("studentId") or "").strip(), str(record.get("studentName") or "").strip(), [str(c) for c in course_ids]
+        except (ValueError, AttributeError) as e:
+            yield line_no, "", "", f"JSON 형식 오류: {e}"
+
+
+# --- 검사 (작업 프로세스) ---
+def _init_worker(courses_path):
+    """작업 프로세스마다 카탈로그와 규칙 엔진을 한 번만 준비합니다."""
+    global _worker_engine
+    _worker_engine = get_rule_engine(load_catalog(courses_path))
+
+
+def _validate_batch(batch):
+    return [(line_no, student_id, name, validate_record(_worker_engine, student_id, course_ids))
+            for line_no, student_id, name, course_ids in batch]
+
+
+def _batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- 결과 기록 ---
+class CsvReport:
+    def __init__(self, f):
+        self._writer = csv.writer(f)
+        self._writer.writerow(REPORT_HEADER)
+
+    def write(self, line_no, student_id, name, errors):
+        self._writer.writerow([line_no, student_id, name, "Y" if not errors else "N", " | ".join(errors)])
+
+
+class JsonlReport:
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, line_no, student_id, name, errors):
+        self._f.write(json.dumps({'line': line_no, 'studentId': student_id, 'studentName': name,
+                                  'isValid': not errors, 'errors': errors}, ensure_ascii=False) + "\n")
+
+
+def validate_all(records, courses_path, report, workers, batch_size=200, in_flight_per_worker=4, only_invalid=False):
+    """records를 작업 프로세스에서 검사하며 입력 순서대로 report에 기록합니다. (검사한 수, 오류 학생 수) 반환."""
+    checked = invalid = 0
+    started = time.perf_counter()
+    max_in_flight = max(1, workers * in_flight_per_worker)
+    batches = _batches(records, batch_size)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(courses_path,)) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(_validate_batch, batch))
+            if len(pending) >= max_in_flight:
+                break
+        while pending:
+            # 가장 먼저 낸 묶음부터 기다려 입력 순서를 유지합니다.
+            for line_no, student_id, name, errors in pending.popleft().result():
+                checked += 1
+                if errors:
+                    invalid += 1
+                if errors or not only_invalid:
+                    report.write(line_no, student_id, name, errors)
+            next_batch = next(batches, None)
+            if next_batch is not None:
+                pending.append(pool.submit(_validate_batch, next_batch))
+            elapsed = time.perf_counter() - started
+            print(f"\r검사 {checked}명, 오류 {invalid}명 ({checked / elapsed if elapsed else 0.0:.0f}명/초)", end='', file=sys.stderr)
+    print(file=sys.stderr)
+    return checked, invalid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="종이 신청서 입력 파일(CSV/JSONL)의 학생별 선택 일괄 검사")
+    parser.add_argument("input", help="입력 파일 (.jsonl이면 JSONL, 아니면 CSV)")
+    parser.add_argument("--courses", default="courses.json", help="과목 정보 파일 (기본: courses.json)")
+    parser.add_argument("--out", help="결과 파일 (.jsonl이면 JSONL, 아니면 CSV, 기본: 표준 출력에 CSV)")
+    parser.add_argument("--only-invalid", action="store_true", help="오류가 있는 학생만 기록")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="검사 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--batch-size", type=int, default=200, help="작업 프로세스에 한 번에 넘길 학생 수")
+    parser.add_argument("--id-column", default="Student ID", help="CSV 학번 열 이름 (기본: Student ID)")
+    parser.add_argument("--name-column", default="Student Name", help="CSV 이름 열 이름 (기본: Student Name)")
+    parser.add_argument("--courses-column", default="Course IDs", help="CSV 과목 ID 열 이름 (기본: Course IDs)")
+    args = parser.parse_args(argv)
+
+    # 작업 프로세스를 띄우기 전에 한 번 읽어, 잘못된 과목 파일은 작업 프로세스마다 실패하지 않고 여기서 알립니다.
+    courses_path = os.path.abspath(args.courses)
+    try:
+        load_catalog(courses_path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        parser.exit(2, f"오류: 과목 정보 파일을 읽을 수 없습니다 ({args.courses}): {e}\n")
+
+    out = open(args.out, "w", encoding="utf-8" if args.out.lower().endswith(".jsonl") else "utf-8-sig", newline="") if args.out else sys.stdout
+    try:
+        with open(args.input, encoding="utf-8-sig", newline="") as f:
+            if args.input.lower().endswith(".jsonl"):
+                records = iter_jsonl_records(f)
+            else:
+                records = iter_csv_records(f, args.id_column, args.name_column, args.courses_column)
+            report = JsonlReport(out) if args.out and args.out.lower().endswith(".jsonl") else CsvReport(out)
+            checked, invalid = validate_all(records, courses_path, report, args.workers,
+                                            batch_size=args.batch_size, only_invalid=args.only_invalid)
+    except ValueError as e:
+        parser.exit(2, f"오류: {e}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"완료: 학생 {checked}명 검사, 오류 {invalid}명", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
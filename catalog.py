@@ -0,0 +1,303 @@
+# catalog.py
+# courses.json을 한 번만 읽어 학기별 그룹 표, 정렬된 과목 목록, 조회용 맵을 미리 만들어 두는 모듈.
+# 만들어진 Catalog 객체는 읽기 전용이며 모든 세션이 같은 인스턴스를 공유합니다.
+#
+# 앱에서는 CatalogWatcher가 courses.json을 백그라운드에서 감시하다가 바뀌면 새 버전(스냅샷)을 만들어
+# 원자적으로 교체합니다. 최근에 쓴 버전 몇 개만 메모리에 두고, 나머지는 아래 보관본에서 다시 읽으므로
+# 진행 중인 세션은 제출할 때까지 자기 버전을 유지합니다.
+#
+# compact 제출 행의 과목 비트마스크는 제출 당시 카탈로그 버전의 과목 순서로만 풀 수 있으므로,
+# CatalogWatcher는 적용한 버전의 원본을 courses.json 옆 catalog_versions/<버전>.json에 남깁니다.
+# 명령줄 도구와 관리자 화면은 메모리에 없는 버전을 여기서 찾습니다. (이 디렉터리는 제출 데이터와 함께 보관하세요)
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+MANDATORY_GROUP_NAME = "학교지정"
+
+YEARS = (2, 3)
+SEMESTERS = (1, 2)
+SEMESTER_KEYS = tuple(f"Y{y}S{s}" for y in YEARS for s in SEMESTERS)
+
+
+def semester_key_of(course):
+    return f"Y{course['year']}S{course['semester']}"
+
+
+def _freeze_course(course):
+    # 세션 간 공유되므로 실수로 값을 바꾸지 못하도록 읽기 전용 뷰로 감쌉니다.
+    return MappingProxyType(dict(course))
+
+
+@metrics.timed("build_group_table")
+def _build_group_table(courses_for_semester):
+    grouped = {}
+    for course in courses_for_semester:
+        group_name = course['group']
+        if group_name not in grouped:
+            is_mandatory_group = (group_name == MANDATORY_GROUP_NAME)
+            grouped[group_name] = {
+                'courses': [],
+                'quota': 0 if is_mandatory_group else (course.get('groupQuota') or 0),
+                'isMandatory': is_mandatory_group,
+            }
+        grouped[group_name]['courses'].append(course)
+    # 그룹 이름 정렬 (기존 group_courses와 동일한 순서 유지)
+    sorted_group_names = sorted(
+        grouped.keys(),
+        key=lambda g: (grouped[g]['isMandatory'], g) if grouped[g]['isMandatory'] else (False, g)
+    )
+    table = {}
+    for name in sorted_group_names:
+        group = grouped[name]
+        sorted_courses = tuple(sorted(group['courses'], key=lambda c: c['name']))  # 과목명 가나다순
+        table[name] = MappingProxyType({
+            'courses': sorted_courses,
+            'quota': group['quota'],
+            'isMandatory': group['isMandatory'],
+            'courseIds': tuple(c['id'] for c in sorted_courses),
+            'hours': tuple(c['hours'] for c in sorted_courses),
+        })
+    return MappingProxyType(table)
+
+
+class Catalog:
+    """courses.json 한 버전에 대한 불변 인덱스입니다."""
+
+    def __init__(self, courses, version):
+        self.version = version
+        self.courses = tuple(_freeze_course(c) for c in courses)
+
+        self.by_id = MappingProxyType({c['id']: c for c in self.courses})
+        # 과목 ID -> 카탈로그 내 위치 (비트마스크 등에서 사용)
+        self.index = MappingProxyType({c['id']: i for i, c in enumerate(self.courses)})
+
+        ids_by_name = {}
+        for c in self.courses:
+            ids_by_name.setdefault(c['name'], []).append(c['id'])
+        self.ids_by_name = MappingProxyType({name: tuple(ids) for name, ids in ids_by_name.items()})
+
+        self.hours = MappingProxyType({c['id']: c['hours'] for c in self.courses})
+        self.mandatory_ids = frozenset(c['id'] for c in self.courses if c.get('mandatory', False))
+        # 과목별 정원(선택 항목 capacity). 정원이 없는 과목은 제한 없이 선택할 수 있습니다.
+        self.capacities = MappingProxyType({
+            c['id']: int(c['capacity']) for c in self.courses
+            if c.get('capacity') is not None and not c.get('mandatory', False)
+        })
+
+        by_semester = {key: [] for key in SEMESTER_KEYS}
+        for c in self.courses:
+            by_semester.setdefault(semester_key_of(c), []).append(c)
+        self.semester_keys = tuple(by_semester.keys())
+        self.courses_by_semester = MappingProxyType({
+            key: tuple(sorted(courses, key=lambda c: c['name'])) for key, courses in by_semester.items()
+        })
+        self.groups_by_semester = MappingProxyType({
+            key: _build_group_table(courses) for key, courses in by_semester.items()
+        })
+        self.mandatory_ids_by_semester = MappingProxyType({
+            key: frozenset(c['id'] for c in courses if c.get('mandatory', False))
+            for key, courses in by_semester.items()
+        })
+        self.mandatory_hours_by_semester = MappingProxyType({
+            key: sum(c['hours'] for c in courses if c.get('mandatory', False))
+            for key, courses in by_semester.items()
+        })
+
+    def __len__(self):
+        return len(self.courses)
+
+    def __iter__(self):
+        return iter(self.courses)
+
+    def __contains__(self, course_id):
+        return course_id in self.by_id
+
+    def get(self, course_id, default=None):
+        return self.by_id.get(course_id, default)
+
+    def groups(self, semester_key):
+        """학기의 그룹 표를 반환합니다. (그룹명 -> {'courses', 'quota', 'isMandatory', ...})"""
+        return self.groups_by_semester.get(semester_key, MappingProxyType({}))
+
+    def hours_of(self, course_ids):
+        return sum(self.hours[cid] for cid in course_ids if cid in self.hours)
+
+    def initial_selection(self):
+        """학교지정 과목만 선택된 학기별 초기 선택 상태를 새로 만들어 반환합니다."""
+        return {key: set(ids) for key, ids in self.mandatory_ids_by_semester.items()}
+
+
+# --- 파일 로드 (프로세스 전역 캐시) ---
+_catalog_lock = threading.Lock()
+_catalog_cache = {}  # 절대경로 -> (파일 시그니처, Catalog)
+
+
+def _file_signature(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def build_catalog_from_bytes(raw):
+    courses = json.loads(raw.decode('utf-8'))
+    version = hashlib.sha1(raw).hexdigest()[:12]
+    return Catalog(courses, version)
+
+
+# --- 버전 보관 ---
+CATALOG_ARCHIVE_DIR_NAME = "catalog_versions"
+CATALOG_VERSION_CACHE_SIZE = 8  # CatalogWatcher가 메모리에 두는 버전 수 (현재 버전 포함)
+_VERSION_PATTERN = re.compile(r"^[0-9a-f]{12}$")
+
+
+def catalog_archive_dir(courses_path):
+    """courses_path 옆의 버전 보관 디렉터리 경로를 반환합니다."""
+    return os.path.join(os.path.dirname(os.path.abspath(courses_path)), CATALOG_ARCHIVE_DIR_NAME)
+
+
+def archive_catalog(raw, version, archive_dir):
+    """과목 정보 원본을 <버전>.json으로 보관합니다. (이미 있으면 그대로)"""
+    target = os.path.join(archive_dir, f"{version}.json")
+    if os.path.exists(target):
+        return target
+    os.makedirs(archive_dir, exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(raw)
+    os.replace(tmp, target)
+    return target
+
+
+def load_archived_catalog(version, archive_dir):
+    """보관한 버전으로 Catalog를 만듭니다. 보관본이 없으면 None."""
+    if not _VERSION_PATTERN.match(str(version or "")):  # 요청에서 온 버전 문자열로 다른 경로를 열지 않도록
+        return None
+    path = os.path.join(archive_dir, f"{version}.json")
+    if not os.path.exists(path):
+        return None
+    return load_catalog(path)
+
+
+def load_catalog(path):
+    """path의 courses.json으로 만든 Catalog를 반환합니다.
+
+    파일이 바뀌지 않았다면(mtime/크기 동일) 이전에 만든 같은 객체를 그대로 돌려주며,
+    FileNotFoundError와 json.JSONDecodeError는 호출자에게 그대로 전달됩니다.
+    """
+    abs_path = os.path.abspath(path)
+    signature = _file_signature(abs_path)
+    cached = _catalog_cache.get(abs_path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    with _catalog_lock:
+        cached = _catalog_cache.get(abs_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        with open(abs_path, 'rb') as f:
+            raw = f.read()
+        catalog = build_catalog_from_bytes(raw)
+        _catalog_cache[abs_path] = (signature, catalog)
+        return catalog
+
+
+# --- 변경 감시 (앱용) ---
+class CatalogWatcher:
+    """courses.json을 주기적으로 확인해 바뀌면 새 Catalog를 백그라운드에서 만들어 교체합니다.
+
+    - current: 새 세션이 사용할 최신 Catalog (교체는 속성 대입 한 번이라 읽는 쪽은 잠그지 않음)
+    - get(version): 그동안 만든 버전 중 하나를 반환 (진행 중인 세션 고정용, 메모리에 없으면 보관본에서 찾음)
+    메모리에는 최근에 쓴 버전 max_versions개만 두고, 현재 버전은 내보내지 않습니다.
+    새 버전은 archive_dir에 보관합니다. 파일 시그니처(mtime/크기)가 바뀌었을 때만 파일을 읽고, 내용 해시가 같으면 다시 만들지 않습니다.
+    새 내용이 잘못되었으면(JSON 오류 등) 이전 버전을 계속 사용하고 last_error에 기록합니다.
+    """
+
+    def __init__(self, path, interval=2.0, archive_dir=None, max_versions=CATALOG_VERSION_CACHE_SIZE):
+        self.path = os.path.abspath(path)
+        self.interval = interval
+        self.archive_dir = archive_dir or catalog_archive_dir(path)
+        self.max_versions = max_versions
+        self.current = None
+        self.last_error = None
+        self._versions = OrderedDict()  # 버전 -> Catalog (최근 사용 순)
+        self._versions_lock = threading.Lock()
+        self._signature = None
+        self._check()  # 최초 버전은 바로 만듭니다. (FileNotFoundError/JSONDecodeError는 호출자에게 전달)
+        self._thread = threading.Thread(target=self._run, name="catalog-watcher", daemon=True)
+        self._thread.start()
+
+    def get(self, version):
+        with self._versions_lock:
+            catalog = self._versions.get(version)
+            if catalog is not None:
+                self._versions.move_to_end(version)
+                return catalog
+        catalog = load_archived_catalog(version, self.archive_dir)
+        if catalog is not None:
+            self._remember(catalog)
+        return catalog
+
+    def _remember(self, catalog):
+        """catalog를 메모리에 두고, max_versions를 넘으면 가장 오래 쓰지 않은 버전(현재 버전 제외)을 내보냅니다."""
+        with self._versions_lock:
+            self._versions[catalog.version] = catalog
+            self._versions.move_to_end(catalog.version)
+            current_version = self.current.version if self.current is not None else None
+            for version in list(self._versions):
+                if len(self._versions) <= self.max_versions:
+                    break
+                if version not in (current_version, catalog.version):
+                    del self._versions[version]
+
+    def _check(self):
+        signature = _file_signature(self.path)
+        if signature == self._signature:
+            return False
+        self._signature = signature  # 잘못된 내용이면 파일이 다시 바뀔 때까지 재시도하지 않음
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        version = hashlib.sha1(raw).hexdigest()[:12]
+        with self._versions_lock:
+            catalog = self._versions.get(version)
+        if catalog is None:
+            catalog = build_catalog_from_bytes(raw)
+            # 보관하지 못한 버전은 적용하지 않습니다. (그 버전으로 접수한 compact 행을 나중에 풀 수 없으므로)
+            archive_catalog(raw, version, self.archive_dir)
+        self.current = catalog
+        self._remember(catalog)
+        self.last_error = None
+        return True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                if self._check():
+                    logger.info("과목 정보 %s 버전을 적용했습니다.", self.current.version)
+            except Exception as e:  # 편집 중인 파일 등: 이전 버전 유지
+                self.last_error = str(e)
+                logger.warning("과목 정보를 다시 읽지 못했습니다. 이전 버전을 계속 사용합니다: %s", e)
+
+
+_watchers = {}
+
+
+def get_catalog_watcher(path, interval=2.0):
+    """path에 대한 프로세스 전역 CatalogWatcher를 반환합니다. (처음 호출할 때 만들고 감시 시작)"""
+    abs_path = os.path.abspath(path)
+    watcher = _watchers.get(abs_path)
+    if watcher is None:
+        with _catalog_lock:
+            watcher = _watchers.get(abs_path)
+            if watcher is None:
+                watcher = _watchers[abs_path] = CatalogWatcher(abs_path, interval)
+    return watcher
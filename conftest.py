@@ -0,0 +1,5 @@
+# conftest.py
+# pytest 설정. (이 파일이 있는 최상위 디렉터리가 import 경로에 들어가 tests/에서 모듈을 바로 가져옵니다)
+
+# sheet_access_test.py는 실제 저장소에 접속하는 수동 확인 스크립트이므로 테스트로 수집하지 않습니다.
+collect_ignore = ["sheet_access_test.py"]
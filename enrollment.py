@@ -0,0 +1,192 @@
+# enrollment.py
+# 수강신청 기간 중 과목별/그룹별/학기별 신청 인원을 실시간으로 집계하는 모듈.
+# 저장소 전체를 주기적으로 다시 읽지 않고, 새로 추가되었거나 제자리에서 바뀐 행만 읽어 카운터를 증분 갱신합니다.
+#
+# 같은 학생이 다시 제출하면 (타임스탬프, 접수번호)가 더 늦은 제출이 앞선 제출을 대체하므로
+# 앞선 제출의 과목은 카운터에서 빼고 새 제출의 과목을 더합니다. (storage.latest_selections와 같은 규칙)
+#
+# 다시 제출하면 학생의 기존 행이 제자리에서 바뀌고(student_index) 그 행들의 접수번호 열도 새 접수번호로 바뀝니다.
+# 그래서 갱신할 때마다 접수번호 열 하나만 읽어 지난번과 비교하고, 값이 달라진 행(추가된 행 포함)만 다시 읽습니다.
+# 접수번호를 바꾸지 않는 손 편집이나 행 삭제는 resync_seconds마다 한 번씩 처음부터 다시 집계해 반영합니다.
+import threading
+import time
+
+from catalog import semester_key_of
+from record_codec import catalog_resolver, expand_compact_row
+from storage import FORMAT_COMPACT, SHEET_HEADER, STUDENT_ID_COLUMN, submission_order_key
+
+_COL = {name: i for i, name in enumerate(SHEET_HEADER)}
+UNKNOWN_GROUP_NAME = "기타"
+RESYNC_SECONDS = 5 * 60
+ROW_RANGE_GAP = 20  # 바뀐 행 사이가 이만큼 이내이면 한 범위로 읽음 (읽기 요청 수를 줄이려고)
+
+
+class EnrollmentTracker:
+    """제출 행을 증분으로 읽어 신청 인원을 집계합니다. 여러 관리자 세션이 한 인스턴스를 공유합니다."""
+
+    def __init__(self, catalog, resync_seconds=RESYNC_SECONDS, resolve_catalog=None):
+        """resolve_catalog: compact 행의 카탈로그 버전 → Catalog 조회 함수 (기본: catalog 한 버전만, 없는 버전이면 refresh가 LookupError)"""
+        self.catalog = catalog
+        self.resync_seconds = resync_seconds
+        self._resolve_catalog = resolve_catalog or catalog_resolver(catalog)
+        self._lock = threading.Lock()
+        self.full_reloads = 0
+        self._reset()
+
+    def _reset(self):
+        self.last_row = 1  # 1행(헤더)까지 처리한 상태에서 시작
+        self._submission_ids = None  # 마지막으로 읽은 접수번호 열 (헤더 포함, 다음 읽기에서 바뀐 행을 찾는 데 사용)
+        self.students = {}  # 학번 -> {'name', 'submission', 'courseIds': {과목 ID: (학기키, 그룹명)}, 'semesters': {학기키: 과목 수}}
+        self.course_counts = {}  # 과목 ID -> 신청 인원
+        self.group_counts = {}  # (학기키, 그룹명) -> 신청 건수
+        self.semester_counts = {}  # 학기키 -> 신청 건수
+        self.semester_students = {}  # 학기키 -> 그 학기에 과목을 신청한 학생 수
+        self.rows_processed = 0
+        self.refreshed_at = None
+        self._loaded_at = time.time()
+
+    # --- 카운터 갱신 ---
+    def _course_keys(self, course_id, row):
+        course = self.catalog.by_id.get(course_id)
+        if course is not None:
+            return semester_key_of(course), course['group']
+        return f"Y{row[_COL['Year']]}S{row[_COL['Semester']]}", UNKNOWN_GROUP_NAME
+
+    def _add(self, counter, key, delta):
+        value = counter.get(key, 0) + delta
+        if value:
+            counter[key] = value
+        else:
+            counter.pop(key, None)
+
+    def _count_course(self, entry, course_id, semester_key, group_name, delta):
+        self._add(self.course_counts, course_id, delta)
+        self._add(self.group_counts, (semester_key, group_name), delta)
+        self._add(self.semester_counts, semester_key, delta)
+        before = entry['semesters'].get(semester_key, 0)
+        self._add(entry['semesters'], semester_key, delta)
+        if before == 0 and delta > 0:
+            self._add(self.semester_students, semester_key, 1)
+        elif before + delta == 0:
+            self._add(self.semester_students, semester_key, -1)
+
+    def _apply_row(self, row):
+        student_id = row[_COL["Student ID"]]
+        course_id = row[_COL["Course ID"]]
+        if not student_id or not course_id:
+            return
+        submission = submission_order_key(row[_COL["Timestamp"]], row[_COL["Submission ID"]])
+        entry = self.students.get(student_id)
+        if entry is not None and submission < entry['submission']:
+            return  # 이미 더 늦은 제출을 반영함
+        if entry is None or submission > entry['submission']:
+            if entry is not None:
+                # 재제출: 앞선 제출의 과목을 모두 뺍니다.
+                for old_id, (semester_key, group_name) in entry['courseIds'].items():
+                    self._count_course(entry, old_id, semester_key, group_name, -1)
+            entry = self.students[student_id] = {
+                'name': row[_COL["Student Name"]], 'submission': submission, 'courseIds': {}, 'semesters': {},
+            }
+        if course_id in entry['courseIds']:
+            return
+        semester_key, group_name = self._course_keys(course_id, row)
+        entry['courseIds'][course_id] = (semester_key, group_name)
+        self._count_course(entry, course_id, semester_key, group_name, 1)
+
+    # --- 읽기 ---
+    def refresh(self, storage):
+        """지난번 읽은 뒤 추가되었거나 제자리에서 바뀐 행만 읽어 반영하고, 읽은 행 수를 반환합니다."""
+        with self._lock:
+            changed = None
+            if self._submission_ids is not None and time.time() - self._loaded_at < self.resync_seconds:
+                changed = self._changed_ranges(storage)
+            if changed is None:
+                # 처음부터 다시 집계 (처음 읽기, 또는 손 편집/삭제를 반영할 때가 됨)
+                self._reset()
+                self.full_reloads += 1
+                rows = storage.get_rows_from(2)
+                submission_ids = [""] + [row[storage.submission_id_column - 1] for row in rows]
+            else:
+                submission_ids, ranges = changed
+                rows = [row for start, end in ranges for row in storage.get_range(start, end)]
+            compact = storage.format == FORMAT_COMPACT
+            try:
+                for row in rows:
+                    if not compact:
+                        self._apply_row(row)
+                    elif row[STUDENT_ID_COLUMN - 1]:
+                        for long_row in expand_compact_row(row, self._resolve_catalog):
+                            self._apply_row(long_row)
+            except (LookupError, ValueError):
+                # 풀 수 없는 compact 행(보관본이 없는 카탈로그 버전, 잘못된 부호): 그 학생을 빠뜨린 집계를 보여 주지 않고
+                # 오류를 알리며, 일부만 반영한 카운터는 버리고 다음에 처음부터 다시 집계합니다.
+                self._reset()
+                raise
+            self._submission_ids = submission_ids
+            self.last_row = len(submission_ids)
+            self.rows_processed += len(rows)
+            self.refreshed_at = time.time()
+            return len(rows)
+
+    def _changed_ranges(self, storage):
+        """접수번호 열만 읽어 (새 접수번호 열, 다시 읽을 [(시작 행, 끝 행), ...])을 반환합니다.
+
+        끝쪽의 빈 셀은 시트가 돌려주지 않으므로 짧은 쪽을 빈 값으로 채워 비교합니다.
+        이미 반영한 행을 다시 읽어도 같은 제출은 한 번만 세므로, 가까운 범위는 합쳐서 읽습니다.
+        """
+        submission_ids = storage.col_values(storage.submission_id_column)
+        width = max(len(submission_ids), len(self._submission_ids))
+        submission_ids = submission_ids + [""] * (width - len(submission_ids))
+        previous = self._submission_ids + [""] * (width - len(self._submission_ids))
+        ranges = []
+        for row_no in range(2, width + 1):
+            if submission_ids[row_no - 1] == previous[row_no - 1]:
+                continue
+            if ranges and row_no - ranges[-1][1] <= ROW_RANGE_GAP:
+                ranges[-1][1] = row_no
+            else:
+                ranges.append([row_no, row_no])
+        return submission_ids, [tuple(r) for r in ranges]
+
+    def refresh_if_stale(self, storage, max_age):
+        """마지막 갱신 후 max_age초가 지났을 때만 저장소를 읽고, 집계 스냅샷을 반환합니다.
+
+        여러 관리자가 동시에 화면을 열어도 저장소 읽기는 max_age마다 한 번으로 제한됩니다.
+        """
+        with self._lock:
+            fresh = self.refreshed_at is not None and time.time() - self.refreshed_at < max_age
+        if not fresh:
+            self.refresh(storage)
+        return self.snapshot()
+
+    def snapshot(self):
+        """현재 집계의 복사본을 반환합니다."""
+        with self._lock:
+            return {
+                'lastRow': self.last_row,
+                'rowsProcessed': self.rows_processed,
+                'fullReloads': self.full_reloads,
+                'refreshedAt': self.refreshed_at,
+                'studentCount': len(self.students),
+                'courseCounts': dict(self.course_counts),
+                'groupCounts': dict(self.group_counts),
+                'semesterCounts': dict(self.semester_counts),
+                'semesterStudents': dict(self.semester_students),
+            }
+
+
+def course_table(catalog, snapshot, semester_key):
+    """학기의 과목별 신청 인원 표(그룹 순서, 그룹 안에서는 과목명 순)를 dict 목록으로 반환합니다."""
+    counts = snapshot['courseCounts']
+    table = []
+    for group_name, group in catalog.groups(semester_key).items():
+        for course in group['courses']:
+            table.append({
+                '그룹': group_name,
+                '과목 ID': course['id'],
+                '과목명': course['name'],
+                '학점': course['hours'],
+                '신청 인원': counts.get(course['id'], 0),
+                '정원': catalog.capacities.get(course['id']),
+            })
+    return table
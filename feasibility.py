@@ -0,0 +1,150 @@
+# feasibility.py
+# 체크박스별 "선택해도 완성 가능 / 선택하면 조건을 맞출 수 없음" 안내.
+#
+# 카탈로그를 읽을 때 학기별 정원 그룹마다 "지금까지 고른 과목(부분 집합) → 정원을 채울 때 더할 수 있는
+# 학점 합"을 비트셋(int, n번째 비트 = n학점)으로 미리 계산해 둡니다.
+# 선택이 바뀔 때마다 학기별로 "다른 그룹들이 더할 수 있는 학점 합"을 한 번 계산해 두면,
+# 각 과목은 비트셋 이동과 AND 한 번으로 정확한 학점(REQUIRED_TOTAL_HOURS_MAP)을 여전히 맞출 수 있는지 판정합니다.
+# 미술/음악, 국영수, 과목명 중복 규칙도 미리 만든 마스크(recommend.engine_conflicts)로 바로 확인합니다.
+import functools
+import itertools
+
+from recommend import engine_conflicts
+from validation import EXACT_ART_MUSIC_SELECTION, MAX_KES_SELECTION, REQUIRED_TOTAL_HOURS_MAP, get_rule_engine
+
+# 안내 사유 (None이면 선택해도 완성 가능)
+REASON_QUOTA = "그룹 정원 초과"
+REASON_OTHER_QUOTA = "같은 학기 다른 그룹 정원 초과"  # 뒤에 " (그룹 이름)"을 붙여 알려 줌
+REASON_HOURS = "학점을 정확히 맞출 수 없음"
+REASON_ART_MUSIC = f"미술/음악 {EXACT_ART_MUSIC_SELECTION}개 초과"
+REASON_KES = f"국영수 {MAX_KES_SELECTION}개 초과"
+REASON_DUPLICATE = "다른 학기에 같은 과목명 선택됨"
+
+
+def _sumset(a, b):
+    """비트셋 a, b의 합 집합 {x + y}를 비트셋으로 반환합니다."""
+    result = 0
+    while a:
+        low = a & -a
+        result |= b << (low.bit_length() - 1)
+        a ^= low
+    return result
+
+
+def _reverse_within(bits, total):
+    """{total - x | x ∈ bits, 0 <= x <= total} 비트셋."""
+    result = 0
+    while bits:
+        low = bits & -bits
+        x = low.bit_length() - 1
+        if x <= total:
+            result |= 1 << (total - x)
+        bits ^= low
+    return result
+
+
+class _GroupTable:
+    __slots__ = ('name', 'mask', 'quota', 'extra_hours')
+
+    def __init__(self, engine, semester_key, name, mask, quota, course_ids):
+        self.name = name
+        self.mask = mask
+        self.quota = quota
+        # 고른 과목 부분 집합(전역 마스크) → 정원을 채우며 더 고를 과목들의 학점 합 비트셋
+        extra_hours = {}
+        for final_ids in itertools.combinations(course_ids, quota):
+            for size in range(quota + 1):
+                for picked_ids in itertools.combinations(final_ids, size):
+                    picked = engine.to_mask(picked_ids)
+                    rest = engine.to_mask(cid for cid in final_ids if cid not in picked_ids)
+                    extra_hours[picked] = extra_hours.get(picked, 0) | (1 << engine.hours(rest, semester_key))
+        self.extra_hours = extra_hours
+
+    def reachable(self, selection_mask):
+        """이 그룹에서 현재 고른 과목으로부터 더 더할 수 있는 학점 합 비트셋 (정원 초과면 0)."""
+        return self.extra_hours.get(selection_mask & self.mask, 0)
+
+
+class FeasibilityTable:
+    """한 카탈로그 버전에 대해 미리 계산한 도달 가능 학점 표입니다."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.engine = engine = get_rule_engine(catalog)
+        self.groups_by_semester = {}
+        self.group_of = {}  # 과목 ID → (학기키, 그룹 위치)
+        for semester_key in catalog.semester_keys:
+            tables = []
+            for group_name, group in catalog.groups(semester_key).items():
+                if group['isMandatory'] or group['quota'] <= 0:
+                    continue
+                for cid in group['courseIds']:
+                    self.group_of[cid] = (semester_key, len(tables))
+                tables.append(_GroupTable(engine, semester_key, group_name, engine.to_mask(group['courseIds']),
+                                          group['quota'], group['courseIds']))
+            self.groups_by_semester[semester_key] = tuple(tables)
+        self.conflicts = engine_conflicts(engine)
+
+    def hints(self, selected_by_semester, semester_key=None):
+        """선택하지 않은 과목마다 선택했을 때의 안내 사유를 반환합니다.
+
+        반환값: {과목 ID: 사유 문자열 또는 None(선택해도 완성 가능)}. semester_key를 주면 그 학기 과목만.
+        """
+        engine = self.engine
+        mask = 0
+        for ids in selected_by_semester.values():
+            mask |= ids if isinstance(ids, int) else engine.to_mask(ids)
+        art_full = (mask & engine.art_music_mask).bit_count() >= EXACT_ART_MUSIC_SELECTION
+        kes_full = (mask & engine.kes_mask).bit_count() >= MAX_KES_SELECTION
+
+        result = {}
+        semester_keys = [semester_key] if semester_key else self.catalog.semester_keys
+        for key in semester_keys:
+            tables = self.groups_by_semester.get(key, ())
+            sem_mask = mask & engine.semester_masks[key]
+            remaining = REQUIRED_TOTAL_HOURS_MAP.get(key, 0) - engine.hours(sem_mask, key)
+            reachable = [t.reachable(sem_mask) for t in tables]
+            # 이미 정원을 넘긴 그룹이 있으면 그 그룹을 고치기 전에는 학기 학점 계산이 의미가 없으므로,
+            # 다른 그룹 과목에는 학점 대신 정원을 넘긴 그룹을 사유로 알려 줍니다.
+            over_quota = [i for i, bits in enumerate(reachable) if not bits]
+            # 그룹 i를 뺀 나머지 그룹들의 학점 합 → "그룹 i가 더해야 하는 학점" 비트셋 (학기마다 한 번 계산)
+            needed = []
+            for i in range(len(tables)):
+                others = 1
+                for j, bits in enumerate(reachable):
+                    if j != i:
+                        others = _sumset(others, bits)
+                needed.append(_reverse_within(others, remaining) if remaining >= 0 else 0)
+
+            for course in self.catalog.courses_by_semester[key]:
+                cid = course['id']
+                bit = engine.bits[cid]
+                if mask & bit or course.get('mandatory', False):
+                    continue
+                if art_full and bit & engine.art_music_mask:
+                    result[cid] = REASON_ART_MUSIC
+                elif kes_full and bit & engine.kes_mask:
+                    result[cid] = REASON_KES
+                elif mask & self.conflicts[cid]:
+                    result[cid] = REASON_DUPLICATE
+                elif cid not in self.group_of:
+                    result[cid] = None
+                else:
+                    i = self.group_of[cid][1]
+                    after = tables[i].reachable(sem_mask | bit)
+                    blocking = next((j for j in over_quota if j != i), None)
+                    if not after:
+                        result[cid] = REASON_QUOTA
+                    elif blocking is not None:
+                        result[cid] = f"{REASON_OTHER_QUOTA} ({tables[blocking].name})"
+                    elif not ((after << course['hours']) & needed[i]):
+                        result[cid] = REASON_HOURS
+                    else:
+                        result[cid] = None
+        return result
+
+
+@functools.lru_cache(maxsize=8)
+def get_feasibility_table(catalog):
+    """카탈로그 버전별로 한 번만 만든 FeasibilityTable을 반환합니다."""
+    return FeasibilityTable(catalog)
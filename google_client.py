@@ -0,0 +1,173 @@
+# google_client.py
+# 프로세스 전체가 함께 쓰는 Google Sheets(gspread) 클라이언트 관리자.
+#
+# - gspread, google.oauth2, google.auth는 처음 클라이언트가 필요할 때 가져옵니다.
+#   (제출하지 않는 재실행과 SQLite 저장소에서는 가져오지 않음)
+# - 서비스 계정마다 인증 정보와 keep-alive 연결 풀(requests.Session)을 하나만 만들어 계속 재사용합니다.
+# - 액세스 토큰은 백그라운드 스레드가 만료 TOKEN_REFRESH_MARGIN초 전에 미리 갱신하므로,
+#   제출 요청이 토큰 갱신을 기다리지 않습니다.
+# - warm_up()은 앱 시작 시 백그라운드에서 인증, TLS 연결, 워크시트 열기를 미리 해 둡니다.
+# - 워크시트 열기/만들기 호출도 rate_limit의 프로세스 전역 속도 제한기를 거칩니다.
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+import metrics
+import rate_limit
+
+logger = logging.getLogger(__name__)
+
+GSPREAD_SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive.file'
+]
+TOKEN_REFRESH_MARGIN = 300  # 토큰 만료 몇 초 전에 갱신할지
+RETRY_SECONDS = 30  # 토큰 갱신 실패 시 재시도 간격
+POOL_SIZE = 10  # 호스트당 유지할 keep-alive 연결 수
+
+
+class GoogleClientManager:
+    """서비스 계정 하나에 대한 gspread 클라이언트, 연결 풀, 열어 둔 워크시트를 관리합니다."""
+
+    def __init__(self, creds_dict, scopes=GSPREAD_SCOPES, refresh_margin=TOKEN_REFRESH_MARGIN, pool_size=POOL_SIZE):
+        self.creds_dict = dict(creds_dict)
+        self.scopes = list(scopes)
+        self.refresh_margin = refresh_margin
+        self.pool_size = pool_size
+        self.last_error = None
+        self._client = None
+        self._credentials = None
+        self._token_request = None
+        self._worksheets = {}  # (스프레드시트 ID, 워크시트 이름) -> Worksheet
+        self._lock = threading.RLock()
+        self._refresher = None
+        self._warm_up_thread = None
+
+    # --- 클라이언트 ---
+    def client(self):
+        """인증된 gspread 클라이언트를 반환합니다. (처음 호출 시 만들고, 토큰이 곧 만료되면 갱신)"""
+        with self._lock:
+            if self._client is None:
+                self._build()
+            if self._seconds_to_expiry() <= self.refresh_margin:
+                self._refresh_token()
+            return self._client
+
+    def _build(self):
+        import gspread
+        import requests
+        from google.auth.transport.requests import AuthorizedSession, Request
+        from google.oauth2.service_account import Credentials
+
+        credentials = Credentials.from_service_account_info(self.creds_dict, scopes=self.scopes)
+        # 토큰 발급용 세션과 API 호출용 세션 모두 연결을 유지해 TLS 핸드셰이크를 반복하지 않습니다.
+        token_session = requests.Session()
+        _mount_pool(token_session, self.pool_size)
+        self._token_request = Request(token_session)
+        session = AuthorizedSession(credentials, auth_request=self._token_request)
+        _mount_pool(session, self.pool_size)
+        self._credentials = credentials
+        # session= 인자는 gspread 5까지만 있습니다. (requirements.txt에서 gspread<6으로 고정)
+        self._client = gspread.Client(credentials, session=session)
+        self._refresh_token()
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._run_refresher, name="google-token-refresher", daemon=True)
+            self._refresher.start()
+
+    def _seconds_to_expiry(self):
+        credentials = self._credentials
+        if credentials is None or not credentials.token or credentials.expiry is None:
+            return 0
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # google-auth의 expiry는 naive UTC
+        return (credentials.expiry - now).total_seconds()
+
+    def _refresh_token(self):
+        self._credentials.refresh(self._token_request)
+        self.last_error = None
+
+    def _run_refresher(self):
+        while True:
+            with self._lock:
+                wait = self._seconds_to_expiry() - self.refresh_margin
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            try:
+                with self._lock:
+                    self._refresh_token()
+            except Exception as e:  # 네트워크 오류 등: 잠시 뒤 다시 시도 (요청 경로에서도 갱신됨)
+                self.last_error = str(e)
+                logger.warning("Google 액세스 토큰 갱신 실패, %d초 후 재시도: %s", RETRY_SECONDS, e)
+                time.sleep(RETRY_SECONDS)
+
+    # --- 워크시트 ---
+    def worksheet(self, spreadsheet_id, worksheet_name, header, priority=rate_limit.PRIORITY_INTERACTIVE):
+        """워크시트를 열어 반환합니다. 한 번 연 워크시트는 재사용하며, 없으면 헤더와 함께 만듭니다."""
+        key = (spreadsheet_id, worksheet_name)
+        worksheet = self._worksheets.get(key)
+        if worksheet is not None:
+            self.client()  # 토큰이 곧 만료되면 갱신
+            return worksheet
+        import gspread
+
+        with self._lock:
+            worksheet = self._worksheets.get(key)
+            if worksheet is None:
+                limiter = rate_limit.get_sheets_limiter()
+                with metrics.span("open_worksheet"):
+                    client = self.client()
+                    spreadsheet = limiter.call(rate_limit.READ, lambda: client.open_by_key(spreadsheet_id), priority)
+                    try:
+                        worksheet = limiter.call(rate_limit.READ, lambda: spreadsheet.worksheet(worksheet_name), priority)
+                    except gspread.exceptions.WorksheetNotFound:
+                        # 시트 추가/헤더 추가는 반복하면 결과가 달라지므로 5xx는 재시도하지 않습니다.
+                        worksheet = limiter.call(rate_limit.WRITE, lambda: spreadsheet.add_worksheet(
+                            title=worksheet_name, rows="100", cols=str(len(header))), priority, idempotent=False)
+                        limiter.call(rate_limit.WRITE, lambda: worksheet.append_row(header), priority, idempotent=False)
+                self._worksheets[key] = worksheet
+            return worksheet
+
+    def warm_up(self, spreadsheet_id=None, worksheet_name=None, header=None):
+        """백그라운드에서 인증과 (지정하면) 워크시트 열기를 미리 해 둡니다. 여러 번 불러도 한 번만 실행합니다."""
+        with self._lock:
+            if self._warm_up_thread is not None:
+                return
+            self._warm_up_thread = threading.Thread(target=self._warm_up, args=(spreadsheet_id, worksheet_name, header),
+                                                    name="google-client-warm-up", daemon=True)
+            self._warm_up_thread.start()
+
+    def _warm_up(self, spreadsheet_id, worksheet_name, header):
+        started = time.perf_counter()
+        try:
+            if spreadsheet_id:
+                self.worksheet(spreadsheet_id, worksheet_name, header)
+            else:
+                self.client()
+            logger.info("Google Sheets 연결 준비 완료 (%.2f초)", time.perf_counter() - started)
+        except Exception as e:  # 실제 요청 때 다시 시도하고, 그때의 오류가 사용자에게 보입니다.
+            self.last_error = str(e)
+            logger.warning("Google Sheets 연결 미리 준비 실패: %s", e)
+
+
+def _mount_pool(session, pool_size):
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_client_manager(creds_dict):
+    """서비스 계정별 프로세스 전역 GoogleClientManager를 반환합니다."""
+    key = (creds_dict.get('client_email'), creds_dict.get('private_key_id'))
+    manager = _managers.get(key)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(key)
+            if manager is None:
+                manager = _managers[key] = GoogleClientManager(creds_dict)
+    return manager
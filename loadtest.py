@@ -0,0 +1,220 @@
+# loadtest.py
+# 동시 접속 학생 부하 테스트 도구.
+# Streamlit AppTest로 streamlit_app.py를 헤드리스로 실행하고, 가상 학생 N명이 동시에
+# 이름/학번 입력 → 네 학기 탭의 체크박스 선택 → 검증 → PDF → 제출 과정을 수행합니다.
+# 제출은 로컬 SQLite 저장소로 보내므로 Google Sheets에 접근하지 않습니다.
+#
+# 사용 예:
+#   python loadtest.py --concurrency 1,5,10,20 --rounds 2
+#   python loadtest.py --concurrency 10 --json result.json
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import load_catalog
+from validation import get_rule_engine
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+
+
+def percentile(sorted_values, p):
+    """정렬된 값 목록의 p 백분위수(nearest-rank)를 반환합니다."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def current_rss_mb():
+    """현재/최대 RSS(MB)를 반환합니다. (/proc가 없으면 최대값만)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    if sys.platform == "darwin":
+        peak /= 1024.0  # macOS는 바이트 단위
+    rss = peak
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return rss, peak
+
+
+def random_valid_selection(catalog, rng, max_tries=20000):
+    """규칙을 모두 만족하는 선택 과목 ID 목록을 무작위로 만듭니다."""
+    engine = get_rule_engine(catalog)
+    for _ in range(max_tries):
+        chosen = set(catalog.mandatory_ids)
+        for semester_key in catalog.semester_keys:
+            for group in catalog.groups(semester_key).values():
+                if not group['isMandatory'] and group['quota'] > 0:
+                    chosen.update(rng.sample(group['courseIds'], group['quota']))
+        if engine.is_valid_mask(engine.to_mask(chosen)):
+            return sorted(chosen - catalog.mandatory_ids, key=lambda cid: catalog.index[cid])
+    raise RuntimeError("규칙을 만족하는 선택을 찾지 못했습니다.")
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = 0
+        self.error_kinds = {}  # 단계 -> {오류 내용: 건수}
+
+    def record(self, kind, seconds):
+        with self._lock:
+            self.samples.setdefault(kind, []).append(seconds)
+
+    def error(self, kind, detail):
+        """kind 단계에서 난 오류를 내용(detail)별로 셉니다."""
+        with self._lock:
+            self.errors += 1
+            details = self.error_kinds.setdefault(kind, {})
+            details[detail] = details.get(detail, 0) + 1
+
+
+def _timed(recorder, kind, fn):
+    start = time.perf_counter()
+    result = fn()
+    recorder.record(kind, time.perf_counter() - start)
+    return result
+
+
+def _find_button(at, label_part):
+    for button in at.button:
+        if label_part in (button.label or ""):
+            return button
+    return None
+
+
+def simulate_student(student_no, catalog, recorder, seed, timeout):
+    """가상 학생 한 명의 전체 수강신청 과정을 실행합니다."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    selection = random_valid_selection(catalog, rng)
+    step = "initial_load"
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        _timed(recorder, "initial_load", at.run)
+        step = "input"
+        _timed(recorder, "input_name", lambda: at.text_input(key="student_name").input(f"학생{student_no}").run())
+        _timed(recorder, "input_id", lambda: at.text_input(key="student_id").input(f"{2025000 + student_no}").run())
+
+        step = "toggle_checkbox"
+        for cid in selection:
+            course = catalog.by_id[cid]
+            key = f"cb_Y{course['year']}S{course['semester']}_{cid}"
+            _timed(recorder, "toggle_checkbox", lambda: at.checkbox(key=key).check().run())
+
+        # 검증: 모든 조건 충족 메시지가 보여야 정상
+        if not any("모든 수강신청 조건이 충족" in (el.value or "") for el in at.success):
+            recorder.error("validation", "조건 충족 메시지 없음")
+
+        step = "pdf"
+        pdf_button = _find_button(at, "PDF")
+        if pdf_button is None or pdf_button.disabled:
+            recorder.error(step, "PDF 버튼 없음" if pdf_button is None else "PDF 버튼 비활성")
+        else:
+            _timed(recorder, "pdf", lambda: pdf_button.click().run())
+
+        step = "submit"
+        submit_button = _find_button(at, "수강신청 내역 제출")
+        if submit_button is None or submit_button.disabled:
+            recorder.error(step, "제출 버튼 없음" if submit_button is None else "제출 버튼 비활성")
+        else:
+            _timed(recorder, "submit", lambda: submit_button.click().run())
+        for exc in at.exception:
+            recorder.error("app_exception", (exc.message or "앱 예외").splitlines()[0][:200])
+    except Exception as e:
+        recorder.error(step, repr(e)[:200])
+
+
+def run_level(concurrency, rounds, catalog, timeout, seed):
+    recorder = LatencyRecorder()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(simulate_student, i, catalog, recorder, seed + i, timeout)
+            for i in range(concurrency * rounds)
+        ]
+        for f in futures:
+            f.result()
+    elapsed = time.perf_counter() - started
+    rss, peak = current_rss_mb()
+
+    all_samples = sorted(s for values in recorder.samples.values() for s in values)
+    report = {
+        "concurrency": concurrency,
+        "students": concurrency * rounds,
+        "elapsed_s": elapsed,
+        "interactions": len(all_samples),
+        "throughput_per_s": len(all_samples) / elapsed if elapsed else 0.0,
+        "errors": recorder.errors,
+        "error_kinds": recorder.error_kinds,
+        "rss_mb": rss,
+        "peak_rss_mb": peak,
+        "latency_ms": {},
+    }
+    for kind, values in sorted(recorder.samples.items()) + [("ALL", all_samples)]:
+        values = sorted(values)
+        report["latency_ms"][kind] = {
+            "count": len(values),
+            "p50": percentile(values, 50) * 1000,
+            "p95": percentile(values, 95) * 1000,
+            "p99": percentile(values, 99) * 1000,
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\n== 동시 학생 {report['concurrency']}명 (총 {report['students']}명, {report['elapsed_s']:.1f}초) ==")
+    print(f"처리량 {report['throughput_per_s']:.1f} interactions/s, 오류 {report['errors']}건, "
+          f"RSS {report['rss_mb']:.0f}MB (최대 {report['peak_rss_mb']:.0f}MB)")
+    for kind, details in sorted(report["error_kinds"].items()):
+        for detail, count in sorted(details.items(), key=lambda item: -item[1]):
+            print(f"  오류 [{kind}] {count}건: {detail}")
+    print(f"{'interaction':<16}{'count':>7}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for kind, stats in report["latency_ms"].items():
+        print(f"{kind:<16}{stats['count']:>7}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="streamlit_app.py 동시 접속 부하 테스트")
+    parser.add_argument("--concurrency", default="1,5,10", help="쉼표로 구분한 동시 학생 수 목록 (기본: 1,5,10)")
+    parser.add_argument("--rounds", type=int, default=1, help="동시성 단계마다 학생 수의 몇 배를 실행할지 (기본: 1)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="AppTest 한 번 실행의 제한 시간(초)")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON 파일로도 저장")
+    args = parser.parse_args(argv)
+
+    # 제출은 임시 SQLite 저장소/큐로 보냅니다. (앱 스크립트가 이 환경변수를 읽음)
+    workdir = tempfile.mkdtemp(prefix="course-loadtest-")
+    os.environ["COURSE_STORAGE_URL"] = "sqlite://" + os.path.join(workdir, "registrations.db")
+    os.environ["SUBMISSION_QUEUE_PATH"] = os.path.join(workdir, "submission_queue.sqlite3")
+    os.chdir(os.path.dirname(APP_PATH))  # courses.json/폰트 상대경로 기준
+
+    catalog = load_catalog("courses.json")
+    reports = []
+    for level in (int(x) for x in args.concurrency.split(",") if x.strip()):
+        report = run_level(level, args.rounds, catalog, args.timeout, args.seed)
+        print_report(report)
+        reports.append(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+    print(f"\n임시 저장소: {workdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# metrics.py
+# 주요 경로 실행 시간(span) 측정과 Prometheus 텍스트 형식 내보내기.
+#
+# 환경변수로 켭니다. (하나도 지정하지 않으면 꺼져 있고, span()은 공유 no-op 객체를, timed()는 원래 함수를 그대로 반환)
+# - COURSE_METRICS_PORT: 127.0.0.1:<포트>/metrics 에서 Prometheus 텍스트 제공
+# - COURSE_METRICS_FILE: METRICS_FILE_INTERVAL초마다 파일에 Prometheus 텍스트 기록 (node_exporter textfile 수집기 등)
+# - COURSE_METRICS_DEBUG=1: 앱 화면 아래에 이번 실행의 구간별 시간을 보여 주는 디버그 패널
+#
+# 사용 예:
+#   with metrics.span("load_courses"): ...
+#   @metrics.timed("generate_pdf_bytes")
+#   metrics.inc("submissions_total")
+#   metrics.register_gauge("sheets_queue_depth", lambda: {"read": 3, "write": 0})
+import bisect
+import functools
+import http.server
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "course_registration_"
+# 지연 시간 히스토그램 구간 경계(초)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_FILE_INTERVAL = 15
+
+PORT = int(os.environ.get("COURSE_METRICS_PORT") or 0)
+FILE_PATH = os.environ.get("COURSE_METRICS_FILE") or None
+DEBUG = os.environ.get("COURSE_METRICS_DEBUG", "") not in ("", "0")
+ENABLED = bool(PORT or FILE_PATH or DEBUG)
+
+_lock = threading.Lock()
+_histograms = {}  # (span 이름, 라벨) -> [구간별 개수..., +Inf 개수, 합계]
+_counters = {}  # (이름, 라벨) -> 값
+_gauges = {}  # 이름 -> 내보낼 때 {라벨: 값}을 반환하는 함수
+_local = threading.local()  # 디버그 패널용: 이번 실행에서 잰 span 목록
+
+
+# --- 기록 ---
+class _Span:
+    __slots__ = ('name', 'label', 'started')
+
+    def __init__(self, name, label):
+        self.name = name
+        self.label = label
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.started, self.label)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, label=""):
+    """with 블록의 실행 시간을 name(과 label) 히스토그램에 기록합니다. 꺼져 있으면 아무것도 하지 않습니다."""
+    return _Span(name, label) if ENABLED else _NOOP
+
+
+def timed(name):
+    """함수 실행 시간을 기록하는 데코레이터. 꺼져 있으면 원래 함수를 그대로 반환합니다."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(name, ""):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe(name, seconds, label=""):
+    if not ENABLED:
+        return
+    key = (name, label)
+    with _lock:
+        buckets = _histograms.get(key)
+        if buckets is None:
+            buckets = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        buckets[-1] += seconds
+    collected = getattr(_local, 'spans', None)
+    if collected is not None:
+        collected.append((name, label, seconds))
+
+
+def inc(name, amount=1, label=""):
+    """카운터 name(_total로 끝나는 이름)을 amount만큼 늘립니다."""
+    if not ENABLED:
+        return
+    key = (name, label)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def register_gauge(name, func):
+    """내보낼 때마다 func()가 반환하는 {라벨: 값}을 게이지 name으로 기록합니다."""
+    if not ENABLED:
+        return
+    with _lock:
+        _gauges[name] = func
+
+
+# --- 디버그 패널용 ---
+def start_collecting():
+    """현재 스레드(Streamlit 실행 하나)에서 잰 span을 모으기 시작하고 그 목록을 반환합니다."""
+    _local.spans = [] if DEBUG else None
+    return _local.spans
+
+
+def collected_spans():
+    return list(getattr(_local, 'spans', None) or [])
+
+
+# --- 내보내기 ---
+def _labels(**labels):
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels.items() if v != ""]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_prometheus():
+    """지금까지의 히스토그램, 카운터, 게이지를 Prometheus 텍스트 형식으로 반환합니다."""
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+    lines = []
+    if histograms:
+        metric = PREFIX + "span_seconds"
+        lines.append(f"# HELP {metric} 구간별 실행 시간")
+        lines.append(f"# TYPE {metric} histogram")
+        for (name, label), buckets in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{metric}_bucket{_labels(span=name, label=label, le=le)} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(span=name, label=label)} {buckets[-1]:.6f}")
+            lines.append(f"{metric}_count{_labels(span=name, label=label)} {cumulative}")
+    seen = set()
+    for (name, label), value in sorted(counters.items()):
+        metric = PREFIX + name
+        if metric not in seen:
+            seen.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_labels(label=label)} {value}")
+    for name, func in sorted(gauges.items()):
+        try:
+            values = func()
+        except Exception as e:  # 게이지 하나가 실패해도 나머지는 내보냅니다.
+            logger.warning("게이지 %s 값을 읽지 못했습니다: %s", name, e)
+            continue
+        metric = PREFIX + name
+        lines.append(f"# TYPE {metric} gauge")
+        for label, value in sorted(values.items()):
+            lines.append(f"{metric}{_labels(label=label)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _write_file_forever(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(render_prometheus())
+            os.replace(tmp_path, path)  # 수집기가 반쯤 쓴 파일을 읽지 않도록
+        except OSError as e:
+            logger.warning("지표 파일을 쓰지 못했습니다: %s", e)
+
+
+_exporters_started = False
+
+
+def start_exporters():
+    """환경변수로 지정한 HTTP 엔드포인트/파일 내보내기를 시작합니다. (프로세스당 한 번, 꺼져 있으면 무시)"""
+    global _exporters_started
+    with _lock:
+        if _exporters_started or not ENABLED:
+            return
+        _exporters_started = True
+    if PORT:
+        try:
+            server = http.server.ThreadingHTTPServer(("127.0.0.1", PORT), _MetricsHandler)
+        except OSError as e:  # 같은 포트를 다른 프로세스가 쓰는 중 등
+            logger.warning("지표 엔드포인트(127.0.0.1:%d)를 열지 못했습니다: %s", PORT, e)
+        else:
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if FILE_PATH:
+        threading.Thread(target=_write_file_forever, args=(FILE_PATH, METRICS_FILE_INTERVAL),
+                         name="metrics-file", daemon=True).start()
@@ -0,0 +1,171 @@
+# pdf_store.py
+# 만든 PDF를 보관하는 디스크 캐시와, 학생에게 내려받기 링크로 내주는 공개 디렉터리.
+#
+# - BlobStore: 내용 해시(sha256) 이름으로 .pdf_cache/ 아래에 저장합니다. (정적 파일로 제공하지 않는 위치)
+#   같은 내용은 같은 파일 하나만 저장합니다.
+# - LinkStore: 세션이 PDF를 요청하면 static/pdf/ 아래에 추측할 수 없는 무작위 이름(secrets.token_urlsafe)의
+#   복사본을 만들고, 앱은 Streamlit 정적 파일 제공(server.enableStaticServing)으로
+#   app/static/pdf/<토큰>.pdf를 내려받게 합니다. st.download_button처럼 실행마다 PDF 바이트를
+#   세션 메모리에 올리지 않으므로, 학생이 몇 번을 다시 실행해도 세션 메모리가 늘지 않습니다.
+#
+# PDF에는 학생 이름과 학번이 들어 있고 static/ 아래 파일은 로그인 없이 내려받을 수 있으므로, 공개 파일 이름은
+# 내용에서 계산할 수 없어야 합니다. (이름/학번/과목을 아는 사람이 내용 해시로 주소를 알아낼 수 없도록)
+# 토큰은 그 링크를 만든 세션만 알고, 두 저장소 모두 max_age_seconds 동안 쓰이지 않은 파일은 지웁니다.
+#
+# 전체 크기가 max_bytes를 넘으면 가장 오래 쓰지 않은 파일(수정 시각 기준, 읽거나 다시 저장할 때 갱신)부터
+# 지웁니다. 여러 프로세스가 같은 디렉터리를 함께 써도 됩니다.
+import hashlib
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+
+SWEEP_INTERVAL_SECONDS = 60  # 오래된 파일 정리를 최대 이 간격으로 한 번씩
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+PDF_DIR = os.path.join(STATIC_DIR, "pdf")  # 공개 링크 (LinkStore)
+PDF_CACHE_DIR = os.path.join(BASE_DIR, ".pdf_cache")  # 내용 해시 캐시 (BlobStore, 제공하지 않음)
+PDF_URL_PREFIX = "app/static/pdf/"  # Streamlit이 static/ 디렉터리를 제공하는 경로
+
+
+class BlobStore:
+    """내용 해시로 주소를 정하는, 크기 제한이 있는 디스크 저장소입니다."""
+
+    def __init__(self, directory, max_bytes, suffix=".pdf", url_prefix=PDF_URL_PREFIX, max_age_seconds=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.url_prefix = url_prefix
+        self.max_age_seconds = max_age_seconds  # None이면 나이 제한 없음
+        self._lock = threading.Lock()
+        self._swept_at = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self._approx_size = sum(size for _, _, size in self._scan())
+        self.remove_expired()
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest + self.suffix)
+
+    def url(self, digest):
+        return self.url_prefix + digest + self.suffix
+
+    def put(self, data):
+        """data를 저장하고 해시(파일 이름)를 반환합니다. 이미 있으면 접근 시각만 갱신합니다."""
+        digest = hashlib.sha256(data).hexdigest()
+        if self.touch(digest):
+            return digest
+        # 임시 파일에 다 쓴 뒤 이름을 바꾸므로 반쯤 쓴 파일이 제공되지 않습니다.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path(digest))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._approx_size += len(data)
+            if self._approx_size > self.max_bytes:
+                self._evict_locked(keep=digest)
+        if time.time() - self._swept_at >= SWEEP_INTERVAL_SECONDS:
+            self.remove_expired()
+        return digest
+
+    def touch(self, digest):
+        """파일이 있으면 접근 시각을 갱신하고 True, 없으면(지워졌거나 나이 제한을 넘었으면) False를 반환합니다."""
+        path = self.path(digest)
+        try:
+            if self._is_expired(os.stat(path).st_mtime, time.time()):
+                return False  # 곧 지워질 파일을 다시 살리지 않음 (put이 새로 씀)
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def remove_expired(self):
+        """max_age_seconds 동안 쓰이지 않은 파일을 지우고 지운 파일 수를 반환합니다."""
+        now = time.time()
+        self._swept_at = now
+        if self.max_age_seconds is None:
+            return 0
+        removed = 0
+        with self._lock:
+            for mtime, path, size in self._scan():
+                if not self._is_expired(mtime, now):
+                    continue
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+                self._approx_size -= size
+                removed += 1
+            self._approx_size = max(self._approx_size, 0)
+        return removed
+
+    def _is_expired(self, mtime, now):
+        return self.max_age_seconds is not None and now - mtime > self.max_age_seconds
+
+    def read(self, digest):
+        """저장된 바이트를 반환합니다. 없으면 None."""
+        try:
+            with open(self.path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _scan(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # 다른 프로세스가 방금 지움
+                        continue
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def _evict_locked(self, keep):
+        # 다른 프로세스가 쓴 파일도 포함하도록 디스크를 다시 읽어 실제 크기로 판단합니다.
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+        keep_path = self.path(keep)
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._approx_size = total
+
+
+class LinkStore(BlobStore):
+    """공개 디렉터리에 무작위 토큰 이름으로 파일 링크를 만드는 저장소입니다. (path/url/touch의 인자는 토큰)"""
+
+    def publish(self, source_path):
+        """source_path 파일을 무작위 토큰 이름으로 공개하고 토큰을 반환합니다."""
+        token = secrets.token_urlsafe(24)
+        tmp_path = self.path(token) + ".tmp"
+        try:
+            # 하드 링크는 원본과 수정 시각(나이)을 함께 쓰므로, 링크마다 따로 만료되도록 복사합니다.
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, self.path(token))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._approx_size += os.path.getsize(self.path(token))
+            if self._approx_size > self.max_bytes:
+                self._evict_locked(keep=token)
+        if time.time() - self._swept_at >= SWEEP_INTERVAL_SECONDS:
+            self.remove_expired()
+        return token
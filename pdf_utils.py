@@ -1,38 +1,329 @@
-from fpdf import FPDF
+from fpdf import FPDF, XPos, YPos # XPos, YPos 임포트 (DeprecationWarning 해결용)
+import copy
+import hashlib
+import io
 import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import metrics
+from pdf_store import PDF_CACHE_DIR, PDF_DIR, BlobStore, LinkStore
+
+# --- 폰트 캐시 ---
+# TTF 파싱(글리프 폭, cmap, 서브셋 테이블 계산)은 프로세스당 한 번만 수행하고,
+# 각 PDF 문서에는 파싱 결과를 복제해 넣습니다. 문서마다 파일을 다시 읽지 않습니다.
+FONT_FAMILY = 'NanumSquare_acR'
+FONT_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_FILES = {
+    '': 'NanumSquare_acR.ttf',   # << 실제 일반 폰트 파일명
+    'B': 'NanumSquare_acB.ttf',  # << 실제 볼드 폰트 파일명
+}
+
+_font_lock = threading.Lock()
+_font_status = None      # (모든 폰트 로드 성공 여부, 오류 메시지)
+_font_prototypes = {}    # 스타일 -> _FontPrototype
+_clone_supported = True  # 설치된 fpdf2 버전에서 복제가 실패하면 add_font로 대체
+
+
+class _FontPrototype:
+    """한 번 파싱한 TTFFont와 원본 바이트를 보관하고, 문서별 사본을 만들어 줍니다."""
+
+    def __init__(self, style, path, fontkey, font):
+        self.style = style
+        self.path = path
+        self.fontkey = fontkey
+        self.font = font
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        # 아직 아무 글자도 쓰지 않은 상태의 서브셋 맵을 보관해 둡니다.
+        self.pristine_subset = copy.deepcopy(getattr(font, 'subset', None), {id(font): font})
+        # 서브셋에 필요한 cmap과 글리프 순서를 한 번만 해석해 둡니다.
+        self.master_ttfont = self._open_ttfont()
+        self.master_cmap = self.master_ttfont['cmap']
+        for subtable in self.master_cmap.tables:
+            subtable.ensureDecompiled()
+        self.glyph_order = tuple(self.master_ttfont.getGlyphOrder())
+
+    def _open_ttfont(self):
+        from fontTools import ttLib
+        return ttLib.TTFont(io.BytesIO(self.data), recalcTimestamp=False, fontNumber=0, lazy=True)
+
+    def _fresh_ttfont(self):
+        """서브셋 과정에서 변경되어도 되는 새 TTFont를 만듭니다. (디스크 I/O, cmap 재해석 없음)"""
+        ttfont = self._open_ttfont()
+        ttfont.setGlyphOrder(list(self.glyph_order))
+        cmap = copy.copy(self.master_cmap)
+        cmap.tables = []
+        for subtable in self.master_cmap.tables:
+            subtable_copy = copy.copy(subtable)
+            subtable_copy.cmap = dict(subtable.cmap)
+            cmap.tables.append(subtable_copy)
+        ttfont.tables['cmap'] = cmap
+        return ttfont
+
+    def clone_for(self, pdf):
+        clone = copy.copy(self.font)
+        # 문서마다 달라지는 상태만 새로 만듭니다. (폭/메트릭 표 등은 읽기 전용으로 공유)
+        clone.i = len(pdf.fonts) + 1
+        if self.pristine_subset is not None:
+            clone.subset = copy.deepcopy(self.pristine_subset, {id(self.font): clone})
+        if hasattr(clone, 'missing_glyphs'):
+            clone.missing_glyphs = []
+        # 출력 시 서브셋 과정에서 ttfont가 변경되므로 문서마다 사본을 씁니다.
+        clone.ttfont = self._fresh_ttfont()
+        return clone
+
+
+def check_fonts():
+    """폰트를 한 번 확인하고 파싱합니다. 프로세스 시작 시 한 번만 실제 작업을 수행합니다.
+
+    반환값: (모든 폰트 로드 성공 여부, 실패 시 오류 메시지)
+    """
+    global _font_status
+    if _font_status is None:
+        with _font_lock:
+            if _font_status is None:
+                _font_status = _load_font_prototypes()
+    return _font_status
+
+
+def _load_font_prototypes():
+    errors = []
+    donor = FPDF()
+    for style, file_name in FONT_FILES.items():
+        path = os.path.join(FONT_DIR, file_name)
+        if not os.path.exists(path):
+            errors.append(f"FileNotFoundError: 폰트 파일 '{file_name}' ({path}) 없음")
+            continue
+        try:
+            before = set(donor.fonts)
+            donor.add_font(FONT_FAMILY, style, path)
+            (fontkey,) = set(donor.fonts) - before
+            _font_prototypes[style] = _FontPrototype(style, path, fontkey, donor.fonts[fontkey])
+        except (FileNotFoundError, RuntimeError, ValueError) as e:
+            errors.append(f"{type(e).__name__}: {e}")
+    return (not errors, "; ".join(errors))
+
+
+def install_fonts(pdf):
+    """캐시된 폰트를 pdf에 등록하고, 등록된 스타일 집합을 반환합니다."""
+    global _clone_supported
+    check_fonts()
+    installed = set()
+    for style, proto in _font_prototypes.items():
+        if proto.fontkey not in pdf.fonts:
+            if _clone_supported:
+                try:
+                    pdf.fonts[proto.fontkey] = proto.clone_for(pdf)
+                except Exception:
+                    _clone_supported = False
+            if not _clone_supported:
+                pdf.add_font(FONT_FAMILY, style, proto.path)
+        installed.add(style)
+    return installed
+
+
+# --- 렌더링 템플릿 ---
+# 내역서의 고정 부분(페이지 설정, 제목/꼬리말 문구, 열 너비, 채우기 색, 글꼴 크기)은 프로세스당 한 번만
+# 계산해 RegistrationTemplate에 보관하고, 문서마다 학생 정보와 과목 행, 합계만 채워 넣습니다.
+# 결과는 파일을 만들지 않고 메모리의 바이트로 반환합니다.
+class RegistrationTemplate:
+    """수강신청 내역서의 고정 레이아웃입니다. (읽기 전용, 스레드 간 공유)"""
+
+    TITLE = '수강신청 내역서'
+    HEADER_FILL = (200, 220, 255)
+    HOURS_COL_WIDTH = 20
+    # 문서 정보의 작성 시각을 고정해 같은 내용이면 항상 같은 바이트가 나오게 합니다. (pdf_store가 내용 해시로 중복 제거)
+    CREATION_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def __init__(self, orientation='P', unit='mm', format='A4'):
+        self.page_args = (orientation, unit, format)
+        probe = FPDF(orientation, unit, format)
+        self.body_width = probe.w - probe.l_margin - probe.r_margin
+        self.col_widths = (self.body_width - self.HOURS_COL_WIDTH, self.HOURS_COL_WIDTH)
+
+    def new_document(self):
+        return PDF(*self.page_args, template=self)
+
+    def render(self, student_name, student_id, selected_courses_details_by_semester):
+        """학생 한 명의 내역서를 만들어 PDF 바이트로 반환합니다."""
+        pdf = self.new_document()
+        pdf.creation_date = self.CREATION_DATE
+        pdf.add_page()
+
+        pdf._set_font_with_fallback(FONT_FAMILY, '', 11) # 기본 폰트 설정
+        pdf.cell(0, 10, f"학생 이름: {student_name}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(0, 10, f"학번: {student_id}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(5)
+
+        overall_total_hours = 0
+        for semester_key, courses in selected_courses_details_by_semester.items():
+            year, semester = int(semester_key[1]), int(semester_key[3])
+            if courses:
+                pdf.chapter_title(f"{year}학년 {semester}학기 선택과목")
+                overall_total_hours += pdf.chapter_body([(c['name'], c['hours']) for c in courses])
+                pdf.ln(5)
+
+        pdf.ln(5)
+        pdf._set_font_with_fallback(FONT_FAMILY, 'B', 11) # 볼드체 설정
+        pdf.cell(0, 10, f"전체 총 선택 학점: {overall_total_hours}", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
+
+        # 파일을 쓰지 않고 메모리에서 바로 바이트를 얻습니다. (download_button/ZIP에 그대로 사용)
+        return bytes(pdf.output())
+
+
+_template = None
+
+
+def get_template():
+    """프로세스 공용 RegistrationTemplate을 반환합니다."""
+    global _template
+    if _template is None:
+        _template = RegistrationTemplate()
+    return _template
+
+
+# --- PDF 클래스 정의 ---
+class PDF(FPDF):
+    def __init__(self, orientation='P', unit='mm', format='A4', template=None):
+        super().__init__(orientation, unit, format)
+        self.template = template or get_template()
+        # 파싱된 폰트는 프로세스 전역 캐시에서 가져옵니다. (파일을 다시 읽거나 파싱하지 않음)
+        # 스타일별로 등록 여부를 기억합니다. (볼드 파일이 없어도 일반 글꼴로 한글을 출력)
+        self._font_styles = install_fonts(self)
+
+    def _set_font_with_fallback(self, family, style='', size=10):
+        if family == FONT_FAMILY and style not in self._font_styles and '' in self._font_styles:
+            style = ''  # 볼드 글꼴 파일이 없으면 일반 Nanum 글꼴 사용 (Arial은 한글을 출력하지 못함)
+        if family == FONT_FAMILY and style in self._font_styles:
+            try:
+                self.set_font(family, style, size)
+                return
+            except RuntimeError: # 스타일 못 찾는 경우 등
+                pass
+        self.set_font('Arial', style, size)
+
+    def header(self):
+        self._set_font_with_fallback(FONT_FAMILY, '', 12)
+        self.cell(0, 10, self.template.TITLE, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-15)
+        self._set_font_with_fallback(FONT_FAMILY, '', 8)
+        self.cell(0, 10, f'Page {self.page_no()}', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+
+    def chapter_title(self, title):
+        self._set_font_with_fallback(FONT_FAMILY, 'B', 12) # 볼드체 사용
+        self.cell(0, 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
+        self.ln(2)
+
+    def chapter_body(self, data_list):
+        name_width, hours_width = self.template.col_widths
+        self._set_font_with_fallback(FONT_FAMILY, '', 10)
+        self.set_fill_color(*self.template.HEADER_FILL)
+        self.cell(name_width, 7, "과목명", border=1, new_x=XPos.RIGHT, new_y=YPos.TOP, align='C', fill=True)
+        self.cell(hours_width, 7, "학점", border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C', fill=True)
+
+        total_hours_semester = 0
+        for item_name, item_hours in data_list:
+            self.cell(name_width, 6, str(item_name), border=1, new_x=XPos.RIGHT, new_y=YPos.TOP)
+            self.cell(hours_width, 6, str(item_hours), border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
+            total_hours_semester += item_hours
+
+        # 합계 행은 본문과 같은 글꼴을 쓰므로 글꼴을 다시 바꾸지 않습니다.
+        self.cell(name_width, 7, "학기 총 학점:", border=1, new_x=XPos.RIGHT, new_y=YPos.TOP, align='R')
+        self.cell(hours_width, 7, str(total_hours_semester), border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
+        return total_hours_semester
+
+
+# --- generate_pdf_bytes 함수 (streamlit_app.py와 일괄 출력에서 공통 사용) ---
+@metrics.timed("generate_pdf_bytes")
+def generate_pdf_bytes(student_name, student_id, selected_courses_details_by_semester):
+    pdf_bytes = get_template().render(student_name, student_id, selected_courses_details_by_semester)
+    metrics.inc("pdf_bytes_total", len(pdf_bytes))
+    return pdf_bytes
+
+
+# --- 생성된 PDF 메모이제이션 ---
+# (이름, 학번, 선택 과목 ID, 카탈로그 버전)이 같으면 같은 PDF이므로 다시 만들지 않습니다.
+# PDF 바이트는 디스크의 내용 주소 저장소(pdf_store)에 두고, 메모리에는 요청 키 → 내용 해시만 기억합니다.
+_PDF_MAX_BYTES = int(os.environ.get("PDF_STORE_MAX_BYTES", 256 * 1024 * 1024))
+_PDF_MAX_AGE_SECONDS = int(os.environ.get("PDF_STORE_MAX_AGE_SECONDS", 6 * 60 * 60))
+PDF_STORE = BlobStore(PDF_CACHE_DIR, _PDF_MAX_BYTES, max_age_seconds=_PDF_MAX_AGE_SECONDS)
+# 세션에 내주는 공개 링크. 이름은 무작위 토큰이라 내용(이름/학번/과목)으로 주소를 알아낼 수 없습니다.
+PDF_LINKS = LinkStore(PDF_DIR, _PDF_MAX_BYTES, max_age_seconds=_PDF_MAX_AGE_SECONDS)
+PDF_DIGEST_INDEX_SIZE = 20000
+
+_pdf_digests = OrderedDict()  # 요청 키 -> 내용 해시 (최근 사용 순)
+_pdf_digests_lock = threading.Lock()
+
+
+def pdf_cache_key(student_name, student_id, course_ids, catalog_version):
+    payload = "\x1f".join([catalog_version, str(student_name), str(student_id)] + sorted(course_ids))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def sorted_courses_for_pdf(catalog, selected_by_semester):
+    """학기별 선택 ID를 PDF에 표시할 순서(학교지정, 그룹명, 과목명 역순)의 과목 목록으로 바꿉니다."""
+    return {
+        semester_key: sorted(
+            [catalog.by_id[cid] for cid in id_set if cid in catalog.by_id],
+            key=lambda c: (c.get('mandatory', False), c['group'], c['name']), reverse=True
+        )
+        for semester_key, id_set in selected_by_semester.items()
+    }
+
+
+def cached_pdf(catalog, student_name, student_id, selected_by_semester):
+    """이미 만든 PDF가 저장소에 있으면 내용 해시를 반환합니다. 없으면 None. (새로 만들지 않음)"""
+    all_ids = [cid for id_set in selected_by_semester.values() for cid in id_set]
+    key = pdf_cache_key(student_name, student_id, all_ids, catalog.version)
+    with _pdf_digests_lock:
+        digest = _pdf_digests.get(key)
+        if digest is not None:
+            _pdf_digests.move_to_end(key)
+    if digest is None or not PDF_STORE.touch(digest):  # 용량 제한으로 지워졌으면 다시 만들어야 함
+        return None
+    return digest
+
+
+def get_or_render_pdf(catalog, student_name, student_id, selected_by_semester):
+    """선택 내용이 같으면 저장된 PDF를, 아니면 새로 만들어 저장한 PDF의 내용 해시를 반환합니다.
+
+    파일 경로는 PDF_STORE.path(해시)이며, 학생에게는 publish_pdf로 만든 링크만 내줍니다.
+    """
+    digest = cached_pdf(catalog, student_name, student_id, selected_by_semester)
+    if digest is not None:
+        return digest
+    all_ids = [cid for id_set in selected_by_semester.values() for cid in id_set]
+    key = pdf_cache_key(student_name, student_id, all_ids, catalog.version)
+    pdf_bytes = bytes(generate_pdf_bytes(student_name, student_id, sorted_courses_for_pdf(catalog, selected_by_semester)))
+    digest = PDF_STORE.put(pdf_bytes)
+    with _pdf_digests_lock:
+        _pdf_digests[key] = digest
+        _pdf_digests.move_to_end(key)
+        if len(_pdf_digests) > PDF_DIGEST_INDEX_SIZE:
+            _pdf_digests.popitem(last=False)
+    return digest
+
+
+def publish_pdf(digest, token=None):
+    """저장된 PDF의 공개 링크 토큰을 반환합니다. token(이 세션이 전에 받은 토큰)이 아직 있으면 그대로 씁니다.
+
+    내려받기 주소는 PDF_LINKS.url(토큰)입니다. 토큰은 요청한 세션에만 알려 주어야 합니다.
+    """
+    if token is not None and PDF_LINKS.touch(token):
+        return token
+    return PDF_LINKS.publish(PDF_STORE.path(digest))
+
 
 def generate_pdf(name, student_id, courses):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.add_font('Nanum', '', 'NanumSquare_acR.ttf', uni=True)
-    pdf.set_font('Nanum', '', 14)
-
-    pdf.cell(0, 10, "정현고 수강신청 내역", ln=True, align='C')
-    pdf.ln(10)
-
-    pdf.set_font('Nanum', '', 12)
-    pdf.cell(0, 10, f"이름: {name} / 학번: {student_id}", ln=True)
-    pdf.ln(5)
-
-    pdf.set_font('Nanum', '', 11)
-    headers = ["학년", "학기", "과목명", "학점", "그룹"]
-    col_widths = [20, 20, 80, 20, 40]
-    for i, h in enumerate(headers):
-        pdf.cell(col_widths[i], 10, h, border=1, align='C')
-    pdf.ln()
-
-    total_hours = 0
+    """과목 목록(학기 구분 없음)으로 내역서 PDF 바이트를 만듭니다. (app.py용, 파일을 쓰지 않음)"""
+    by_semester = {}
     for c in courses:
-        row = [str(c["year"]), str(c["semester"]), c["name"], str(c["hours"]), c["group"]]
-        for i, cell in enumerate(row):
-            pdf.cell(col_widths[i], 10, cell, border=1)
-        pdf.ln()
-        total_hours += c["hours"]
-
-    pdf.ln(5)
-    pdf.set_font('Nanum', '', 12)
-    pdf.cell(0, 10, f"총 학점: {total_hours}", ln=True)
-
-    filename = f"{student_id}_{name}_수강신청.pdf"
-    pdf.output(filename)
-    return filename
+        by_semester.setdefault(f"Y{c['year']}S{c['semester']}", []).append(c)
+    for semester_courses in by_semester.values():
+        semester_courses.sort(key=lambda c: (c.get('mandatory', False), c['group'], c['name']), reverse=True)
+    return generate_pdf_bytes(name, student_id, dict(sorted(by_semester.items())))
@@ -0,0 +1,195 @@
+# rate_limit.py
+# 프로세스 전체가 함께 쓰는 Google Sheets API 호출 속도 제한기.
+#
+# 세션마다 따로 Sheets를 부르면 사용량이 몰릴 때 모든 세션이 함께 분당 할당량을 넘고,
+# 함께 429를 받고, 함께 실패합니다. 모든 gspread 호출(append_rows, open_by_key, worksheet() 등)은
+# 여기의 읽기/쓰기 토큰 버킷을 거쳐 할당량 안에서만 나가도록 합니다.
+#
+# - 읽기/쓰기 버킷은 분당 할당량(SHEETS_READS_PER_MINUTE, SHEETS_WRITES_PER_MINUTE)만큼 채워지고,
+#   최대 SHEETS_BURST개까지 모아 둘 수 있습니다.
+# - 토큰을 기다리는 호출은 우선순위 순서로 받습니다. (제출 기록 > 학생 화면 > 관리자/명령줄 읽기)
+# - 429와 5xx 응답은 지터를 넣은 지수 백오프로 다시 시도합니다. 429이면 버킷 전체를 잠시 멈춰
+#   다른 호출도 같은 순간에 몰려 다시 보내지 않게 합니다.
+#   5xx는 요청이 이미 반영되었을 수 있으므로, 다시 보내도 결과가 같은(idempotent) 호출만 다시 시도합니다.
+#   (append_rows, delete_rows처럼 반복하면 결과가 달라지는 쓰기는 429일 때만 재시도)
+# - 호출 하나가 토큰 대기와 재시도에 쓰는 시간은 MAX_RETRY_SECONDS로 제한합니다.
+#   (제출 큐 플러셔의 임대 시간 FLUSHER_LEASE_SECONDS보다 충분히 짧게)
+# - 대기열 길이와 남은 토큰은 metrics 게이지로, 대기 시간은 sheets_throttle_wait 구간으로 내보냅니다.
+#
+# 할당량은 서비스 계정(프로젝트) 단위이므로, 여러 프로세스로 실행하면 프로세스 수로 나눈 값을 지정하세요.
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+import metrics
+
+PRIORITY_SUBMIT = 0  # 제출 큐의 기록
+PRIORITY_INTERACTIVE = 1  # 학생 화면에서의 호출 (워크시트 열기 등)
+PRIORITY_ADMIN = 2  # 관리자 대시보드, 명령줄 도구의 읽기
+
+READ = "read"
+WRITE = "write"
+
+READS_PER_MINUTE = float(os.environ.get("SHEETS_READS_PER_MINUTE") or 60)
+WRITES_PER_MINUTE = float(os.environ.get("SHEETS_WRITES_PER_MINUTE") or 60)
+BURST = int(os.environ.get("SHEETS_BURST") or 10)
+
+RATE_LIMITED = 429
+SERVER_ERRORS = frozenset((500, 502, 503, 504))
+MAX_RETRIES = 5
+BASE_BACKOFF = 1.0  # 첫 재시도 대기 상한(초), 재시도마다 두 배
+MAX_BACKOFF = 8.0
+MAX_RETRY_SECONDS = 20.0  # 호출 하나의 토큰 대기 + 재시도 대기 합계 상한
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 capacity개까지 모이는 토큰 버킷. 기다리는 호출은 우선순위 순서로 토큰을 받습니다."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []  # (우선순위, 도착 순번) 힙
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """토큰 하나를 받을 때까지 기다리고, 기다린 시간(초)을 반환합니다. timeout을 넘기면 TimeoutError."""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    is_first = self._waiters[0] == entry
+                    if is_first and now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        return now - started
+                    if deadline is not None and now >= deadline:
+                        raise TimeoutError("Sheets 호출 대기 시간을 넘었습니다.")
+                    # 맨 앞 호출만 다음 토큰이 생길 때까지 자고, 나머지는 앞 호출이 빠질 때 깨어납니다.
+                    wait = None
+                    if is_first:
+                        wait = max(self._paused_until - now, (1 - self._tokens) / self.rate, 0.001)
+                    if deadline is not None:
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def pause(self, seconds):
+        """seconds초 동안 토큰을 내주지 않고, 모아 둔 토큰을 비웁니다. (429를 받았을 때)"""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._cond.notify_all()
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._waiters)
+
+    def available(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+def status_code(error):
+    """gspread APIError 등에서 HTTP 상태 코드를 꺼냅니다. (없으면 None)"""
+    return getattr(getattr(error, 'response', None), 'status_code', None)
+
+
+class SheetsRateLimiter:
+    """읽기/쓰기 버킷을 거쳐 Sheets 호출을 실행하고, 429/5xx는 백오프 후 다시 시도합니다."""
+
+    def __init__(self, reads_per_minute=READS_PER_MINUTE, writes_per_minute=WRITES_PER_MINUTE, burst=BURST,
+                 max_retries=MAX_RETRIES, base_backoff=BASE_BACKOFF, max_backoff=MAX_BACKOFF,
+                 max_retry_seconds=MAX_RETRY_SECONDS):
+        self.buckets = {
+            READ: TokenBucket(reads_per_minute / 60.0, burst),
+            WRITE: TokenBucket(writes_per_minute / 60.0, burst),
+        }
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_retry_seconds = max_retry_seconds
+        self._lock = threading.Lock()
+        self._stats = {kind: {'calls': 0, 'retries': 0, 'waitSeconds': 0.0} for kind in self.buckets}
+
+    def call(self, kind, func, priority=PRIORITY_INTERACTIVE, idempotent=True):
+        """kind(READ/WRITE) 버킷의 토큰을 받아 func()를 실행하고 그 결과를 반환합니다.
+
+        idempotent=False인 호출(다시 보내면 행이 또 추가/삭제되는 쓰기)은 5xx를 재시도하지 않고 그대로 올립니다.
+        토큰 대기와 재시도 대기의 합계가 max_retry_seconds를 넘으면 마지막 오류(또는 TimeoutError)를 올립니다.
+        """
+        bucket = self.buckets[kind]
+        deadline = time.monotonic() + self.max_retry_seconds
+        attempt = 0
+        while True:
+            waited = bucket.acquire(priority, timeout=max(deadline - time.monotonic(), 0.001))
+            metrics.observe("sheets_throttle_wait", waited, kind)
+            with self._lock:
+                stats = self._stats[kind]
+                stats['calls'] += 1
+                stats['waitSeconds'] += waited
+            try:
+                return func()
+            except Exception as e:
+                status = status_code(e)
+                retryable = status == RATE_LIMITED or (idempotent and status in SERVER_ERRORS)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                # full jitter: 0 ~ min(상한, 기본값 * 2^시도)초 사이에서 고르게 골라 재시도 시점을 흩뜨립니다.
+                delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+                if time.monotonic() + delay >= deadline:
+                    raise
+                if status == RATE_LIMITED:
+                    bucket.pause(delay)
+                with self._lock:
+                    self._stats[kind]['retries'] += 1
+                metrics.inc("sheets_retries_total", label=str(status))
+                time.sleep(delay)
+                attempt += 1
+
+    def stats(self):
+        """버킷별 대기열 길이, 남은 토큰, 호출/재시도 수, 누적 대기 시간을 반환합니다."""
+        with self._lock:
+            result = {kind: dict(s) for kind, s in self._stats.items()}
+        for kind, bucket in self.buckets.items():
+            result[kind]['queueDepth'] = bucket.queue_depth()
+            result[kind]['tokens'] = round(bucket.available(), 2)
+        return result
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_sheets_limiter():
+    """프로세스 전역 SheetsRateLimiter를 반환합니다."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = SheetsRateLimiter()
+                metrics.register_gauge("sheets_queue_depth",
+                                       lambda: {kind: s['queueDepth'] for kind, s in _limiter.stats().items()})
+                metrics.register_gauge("sheets_tokens_available",
+                                       lambda: {kind: s['tokens'] for kind, s in _limiter.stats().items()})
+    return _limiter
@@ -0,0 +1,222 @@
+# recommend.py
+# "조건에 맞게 선택 완성하기" 추천기.
+# 현재 선택(일부만 골랐거나 규칙을 어긴 상태)에서 가장 적게 바꾸고 모든 규칙을 만족하는 선택을 찾습니다.
+#
+# 정원 그룹마다 "정원만큼 고르는 조합"을 변수로 두고, 그룹 순서대로 깊이 우선 탐색합니다.
+# - 조합은 현재 선택과의 차이(추가+제외 과목 수)가 작은 순서로 시도합니다.
+# - 가지치기: 학기별 정확한 학점(남은 그룹으로 만들 수 있는 학점 합 집합), 미술/음악 정확히 2개와
+#   국영수 3개 이하(남은 그룹에서 반드시/최대로 고르게 되는 개수), 과목명 중복(이미 고른 과목과 이름이 같은
+#   다른 학기 과목 차단), 그리고 지금까지의 차이 + 남은 그룹의 최소 차이가 찾은 k번째 답보다 크면 중단.
+# - 방문 노드 수와 탐색 시간(벽시계)에 상한을 두어 최악의 경우에도 응답 시간을 제한합니다.
+#   상한에 걸리면 그때까지 찾은 가장 가까운 답을 반환합니다. (시간 상한에 걸린 답은 캐시하지 않음)
+# 그룹별 조합과 가지치기용 표는 카탈로그 버전마다 한 번만 만들고, 같은 선택에 대한 답은 캐시합니다.
+import functools
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+from validation import (EXACT_ART_MUSIC_SELECTION, MAX_KES_SELECTION, REQUIRED_TOTAL_HOURS_MAP,
+                        get_rule_engine)
+
+DEFAULT_NODE_BUDGET = 20000
+DEFAULT_TIME_BUDGET = 0.03  # 초
+TIME_CHECK_NODES = 256  # 이 노드 수마다 시간 상한 확인
+RESULT_CACHE_SIZE = 1024
+
+
+class _Group:
+    __slots__ = ('semester_key', 'name', 'mask', 'quota', 'combos', 'art_min', 'art_max', 'kes_min')
+
+    def __init__(self, engine, conflicts, semester_key, name, mask, quota, course_ids):
+        self.semester_key = semester_key
+        self.name = name
+        self.mask = mask
+        self.quota = quota
+        # (조합 마스크, 학점 합, 미술/음악 수, 국영수 수, 과목명 중복 차단 마스크)
+        combos = []
+        for ids in itertools.combinations(course_ids, quota):
+            combo = engine.to_mask(ids)
+            blocked = 0
+            for cid in ids:
+                blocked |= conflicts[cid]
+            combos.append((combo, engine.hours(combo, semester_key), (combo & engine.art_music_mask).bit_count(),
+                           (combo & engine.kes_mask).bit_count(), blocked))
+        self.combos = tuple(combos)
+        art_members = (mask & engine.art_music_mask).bit_count()
+        kes_members = (mask & engine.kes_mask).bit_count()
+        others = len(course_ids)
+        self.art_min = max(0, quota - (others - art_members))
+        self.art_max = min(quota, art_members)
+        self.kes_min = max(0, quota - (others - kes_members))
+
+
+@functools.lru_cache(maxsize=8)
+def engine_conflicts(engine):
+    """과목 ID → 과목명이 같은 다른 학기 과목들의 마스크."""
+    conflicts = {cid: 0 for cid in engine.bits}
+    for _, masks in engine.duplicate_name_masks:
+        for i, m in enumerate(masks):
+            others = 0
+            for j, other in enumerate(masks):
+                if i != j:
+                    others |= other
+            for cid in engine.to_ids(m):
+                conflicts[cid] |= others
+    return conflicts
+
+
+class Recommender:
+    """한 카탈로그 버전에 대한 추천 탐색기입니다."""
+
+    def __init__(self, catalog, node_budget=DEFAULT_NODE_BUDGET, time_budget=DEFAULT_TIME_BUDGET):
+        self.catalog = catalog
+        self.engine = engine = get_rule_engine(catalog)
+        self.node_budget = node_budget
+        self.time_budget = time_budget
+        self._conflicts = engine_conflicts(engine)
+        self.groups = []
+        for semester_key in catalog.semester_keys:
+            for name, group in catalog.groups(semester_key).items():
+                if not group['isMandatory'] and group['quota'] > 0:
+                    self.groups.append(_Group(engine, self._conflicts, semester_key, name, engine.to_mask(group['courseIds']),
+                                              group['quota'], group['courseIds']))
+        self.groups = tuple(self.groups)
+        self.mandatory_hours = {key: engine.hours(engine.mandatory_mask & sem_mask, key)
+                                for key, sem_mask in engine.semester_masks.items()}
+        self.mandatory_blocked = 0
+        for cid in catalog.mandatory_ids:
+            self.mandatory_blocked |= self._conflicts[cid]
+
+        # 그룹 i부터 같은 학기 끝까지 고를 수 있는 학점 합의 집합 (학기 경계에서 정확한 학점 검사)
+        n = len(self.groups)
+        self._suffix_hours = [None] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            group = self.groups[i]
+            after = {0} if i + 1 == n or self.groups[i + 1].semester_key != group.semester_key else self._suffix_hours[i + 1]
+            self._suffix_hours[i] = frozenset(h + s for h in {c[1] for c in group.combos} for s in after)
+        # 그룹 i부터 끝까지 반드시 고르게 되는/최대로 고를 수 있는 미술·음악, 국영수 수
+        self._art_min = [0] * (n + 1)
+        self._art_max = [0] * (n + 1)
+        self._kes_min = [0] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            self._art_min[i] = self._art_min[i + 1] + self.groups[i].art_min
+            self._art_max[i] = self._art_max[i + 1] + self.groups[i].art_max
+            self._kes_min[i] = self._kes_min[i + 1] + self.groups[i].kes_min
+        # 정원 그룹 밖에서 선택된 과목(학교지정 제외)은 추천에서 제외 대상입니다.
+        self._grouped_mask = engine.mandatory_mask
+        for group in self.groups:
+            self._grouped_mask |= group.mask
+
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def recommend(self, selected_by_semester, k=3, unavailable=()):
+        """현재 선택에 가장 가까운 유효한 선택을 최대 k개 반환합니다.
+
+        unavailable: 새로 추가하면 안 되는 과목 ID (정원이 찬 과목 등, 이미 선택한 과목은 유지 가능)
+        반환값: [{'courseIds': [...], 'add': [...], 'remove': [...], 'distance': 바꾸는 과목 수}, ...] (차이가 작은 순)
+        """
+        engine = self.engine
+        current = 0
+        for ids in selected_by_semester.values():
+            current |= ids if isinstance(ids, int) else engine.to_mask(ids)
+        banned = engine.to_mask(unavailable) & ~current
+        cache_key = (current, banned, k)
+        with self._cache_lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                return self._cache[cache_key]
+
+        masks, timed_out = self._search(current, banned, k)
+        results = []
+        for mask in masks:
+            full = mask | engine.mandatory_mask
+            add = engine.to_ids(full & ~current)
+            remove = engine.to_ids(current & ~full)
+            results.append({'courseIds': engine.to_ids(full), 'add': add, 'remove': remove,
+                            'distance': len(add) + len(remove)})
+        if timed_out:
+            return results  # 부하에 따라 달라지는 답이므로 캐시하지 않음
+        with self._cache_lock:
+            self._cache[cache_key] = results
+            if len(self._cache) > RESULT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return results
+
+    def _search(self, current, banned, k):
+        """(차이 순 마스크 목록, 시간 상한에 걸렸는지)를 반환합니다."""
+        groups = self.groups
+        n = len(groups)
+        # 그룹별로 현재 선택과 가까운 조합부터 시도 (금지 과목이 들어간 조합은 제외)
+        ordered = []
+        min_cost = [0] * (n + 1)
+        for group in groups:
+            picked = current & group.mask
+            base = picked.bit_count() + group.quota
+            options = sorted(
+                (base - 2 * (combo[0] & picked).bit_count(), combo)
+                for combo in group.combos if not combo[0] & banned
+            )
+            ordered.append(options)
+        for i in range(n - 1, -1, -1):
+            min_cost[i] = min_cost[i + 1] + (ordered[i][0][0] if ordered[i] else 0)
+        # 정원 그룹 밖의 선택 과목은 항상 제외되므로 그 수만큼 차이가 더해집니다.
+        outside = (current & ~self._grouped_mask).bit_count()
+
+        found = []  # (차이, 마스크), 차이 오름차순 최대 k개
+        budget = [self.node_budget]
+        deadline = time.perf_counter() + self.time_budget
+        timed_out = [False]
+        required = REQUIRED_TOTAL_HOURS_MAP
+        suffix_hours = self._suffix_hours
+
+        def dfs(i, mask, cost, semester_hours, art, kes, blocked):
+            if budget[0] <= 0:
+                return
+            budget[0] -= 1
+            if budget[0] % TIME_CHECK_NODES == 0 and time.perf_counter() > deadline:
+                budget[0] = 0
+                timed_out[0] = True
+                return
+            if i == n:
+                if art == EXACT_ART_MUSIC_SELECTION:
+                    found.append((cost + outside, mask))
+                    found.sort(key=lambda item: item[0])
+                    del found[k:]
+                return
+            group = groups[i]
+            semester_key = group.semester_key
+            starts_semester = i == 0 or groups[i - 1].semester_key != semester_key
+            if starts_semester:
+                semester_hours = self.mandatory_hours.get(semester_key, 0)
+            ends_semester = i + 1 == n or groups[i + 1].semester_key != semester_key
+            target = required.get(semester_key, 0) - semester_hours
+            if target not in suffix_hours[i]:
+                return
+            for combo_cost, (combo, hours, combo_art, combo_kes, combo_blocked) in ordered[i]:
+                if len(found) == k and cost + combo_cost + min_cost[i + 1] + outside >= found[-1][0]:
+                    break  # 조합이 차이 순으로 정렬되어 있으므로 이후 조합도 모두 더 나쁨
+                if combo & blocked:
+                    continue
+                new_art = art + combo_art
+                new_kes = kes + combo_kes
+                if new_art + self._art_min[i + 1] > EXACT_ART_MUSIC_SELECTION or new_art + self._art_max[i + 1] < EXACT_ART_MUSIC_SELECTION:
+                    continue
+                if new_kes + self._kes_min[i + 1] > MAX_KES_SELECTION:
+                    continue
+                new_hours = semester_hours + hours
+                if ends_semester and new_hours != required.get(semester_key, 0):
+                    continue
+                dfs(i + 1, mask | combo, cost + combo_cost, new_hours, new_art, new_kes, blocked | combo_blocked)
+
+        mandatory = self.engine.mandatory_mask
+        dfs(0, 0, 0, 0, (mandatory & self.engine.art_music_mask).bit_count(),
+            (mandatory & self.engine.kes_mask).bit_count(), self.mandatory_blocked)
+        return [mask for _, mask in found], timed_out[0]
+
+
+@functools.lru_cache(maxsize=8)
+def get_recommender(catalog):
+    """카탈로그 버전별로 한 번만 만든 Recommender를 반환합니다."""
+    return Recommender(catalog)
@@ -0,0 +1,154 @@
+# record_codec.py
+# 학생당 한 행(compact) 제출 형식의 부호화/복호화와, compact 행을 과목당 한 행(long) 형식으로
+# 풀어 주는 스트리밍 변환기.
+#
+# compact 행: [Timestamp, Student Name, Student ID, Catalog Version, Courses, Submission ID]
+# - Catalog Version: "v:" + 카탈로그 버전 (storage.catalog_version_cell)
+# - Courses: "m1:" + 카탈로그 위치 비트마스크(little-endian)의 base64url
+#            카탈로그에 없는 과목 ID가 섞이면 "i1:" + 공백으로 구분한 ID 목록
+# 과목 30개를 고른 학생이 long 형식으로 약 270셀을 쓰던 것을 6셀로 줄입니다.
+#
+# 사용 예 (compact 저장소를 long 형식 CSV로 풀기):
+#   python record_codec.py --storage "sqlite:///registrations.db?format=compact" --out long.csv
+import argparse
+import base64
+import csv
+import os
+import sys
+
+from catalog import catalog_archive_dir, load_archived_catalog, load_catalog
+from storage import (COMPACT_HEADER, FORMAT_COMPACT, SHEET_HEADER, catalog_version_cell, iter_rows,
+                     open_storage_for_cli, parse_catalog_version_cell)
+
+MASK_PREFIX = "m1:"
+ID_LIST_PREFIX = "i1:"
+
+_COMPACT_COL = {name: i for i, name in enumerate(COMPACT_HEADER)}
+
+
+# --- 과목 집합 부호화 ---
+def encode_courses(catalog, course_ids):
+    """과목 ID 목록을 Courses 셀 문자열로 부호화합니다."""
+    course_ids = list(course_ids)
+    if any(cid not in catalog.index for cid in course_ids):
+        return ID_LIST_PREFIX + " ".join(course_ids)
+    mask = 0
+    for cid in course_ids:
+        mask |= 1 << catalog.index[cid]
+    raw = mask.to_bytes(max(1, (mask.bit_length() + 7) // 8), 'little')
+    return MASK_PREFIX + base64.urlsafe_b64encode(raw).decode('ascii').rstrip("=")
+
+
+def decode_courses(catalog, encoded):
+    """Courses 셀 문자열을 과목 ID 목록(카탈로그 순서)으로 복호화합니다."""
+    if encoded.startswith(ID_LIST_PREFIX):
+        return encoded[len(ID_LIST_PREFIX):].split()
+    if not encoded.startswith(MASK_PREFIX):
+        raise ValueError(f"알 수 없는 과목 부호입니다: {encoded[:20]}")
+    text = encoded[len(MASK_PREFIX):]
+    mask = int.from_bytes(base64.urlsafe_b64decode(text + "=" * (-len(text) % 4)), 'little')
+    if mask.bit_length() > len(catalog.courses):
+        raise ValueError("과목 부호가 카탈로그보다 큽니다. (다른 카탈로그 버전의 부호일 수 있음)")
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(catalog.courses[low.bit_length() - 1]['id'])
+        mask ^= low
+    return ids
+
+
+def compact_row(timestamp, student_name, student_id, catalog, course_ids):
+    """선택 과목을 학생당 한 행의 compact 제출 행으로 만듭니다. (접수번호 열 제외)"""
+    return [timestamp, student_name, student_id, catalog_version_cell(catalog.version), encode_courses(catalog, course_ids)]
+
+
+def catalog_version_of(row):
+    return parse_catalog_version_cell(row[_COMPACT_COL["Catalog Version"]])
+
+
+# --- long 형식으로 풀기 ---
+def catalog_resolver(*catalogs, archive_dir=None):
+    """카탈로그 버전 → Catalog 조회 함수를 만듭니다. (없는 버전이면 None)
+
+    주어진 카탈로그에 없는 버전은 archive_dir(catalog.CatalogWatcher가 남긴 버전 보관본)에서 찾습니다.
+    """
+    by_version = {c.version: c for c in catalogs}
+
+    def resolve(version):
+        catalog = by_version.get(version)
+        if catalog is None and archive_dir:
+            catalog = by_version[version] = load_archived_catalog(version, archive_dir)
+        return catalog
+    return resolve
+
+
+def expand_compact_row(row, resolve_catalog):
+    """compact 행 하나를 long 형식 행 목록으로 풉니다.
+
+    카탈로그 버전을 찾을 수 없으면 LookupError를 냅니다.
+    """
+    catalog = resolve_catalog(catalog_version_of(row))
+    if catalog is None:
+        raise LookupError(f"학번 {row[_COMPACT_COL['Student ID']]}의 제출을 풀 카탈로그 버전 "
+                          f"{catalog_version_of(row)!r}을(를) 찾을 수 없습니다. (catalog_versions/ 보관본 확인)")
+    timestamp, student_name, student_id = row[0], row[1], row[2]
+    version_cell = row[_COMPACT_COL["Catalog Version"]]
+    submission_id = row[_COMPACT_COL["Submission ID"]]
+    long_rows = []
+    for cid in decode_courses(catalog, row[_COMPACT_COL["Courses"]]):
+        course = catalog.by_id.get(cid)
+        if course is None:
+            long_rows.append([timestamp, student_name, student_id, cid, "", "", "", "", version_cell, submission_id])
+        else:
+            long_rows.append([timestamp, student_name, student_id, cid, course['name'], str(course['year']),
+                              str(course['semester']), str(course['hours']), version_cell, submission_id])
+    return long_rows
+
+
+def iter_long_rows(storage, resolve_catalog, start_row=2, chunk_rows=1000):
+    """저장소 형식과 관계없이 long 형식 행을 차례로 반환합니다. (chunk_rows씩 나누어 읽음)
+
+    compact 저장소이면 행마다 풀어서 반환합니다. 카탈로그 버전을 찾을 수 없거나 부호가 잘못된 행이 있으면
+    그 학생을 빠뜨린 결과를 만들지 않도록 LookupError/ValueError를 그대로 올립니다.
+    """
+    if storage.format != FORMAT_COMPACT:
+        for _, row in iter_rows(storage, start_row, chunk_rows):
+            yield row
+        return
+    for _, row in iter_rows(storage, start_row, chunk_rows):
+        if row[_COMPACT_COL["Student ID"]]:
+            yield from expand_compact_row(row, resolve_catalog)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="compact 제출 행을 과목당 한 행 형식의 CSV로 풀기")
+    parser.add_argument("--storage", default=os.environ.get("COURSE_STORAGE_URL"), required=not os.environ.get("COURSE_STORAGE_URL"),
+                        help="저장소 URL (예: sqlite:///파일.db?format=compact), 기본값: COURSE_STORAGE_URL")
+    parser.add_argument("--creds", help="Google 서비스 계정 키(JSON) 파일 경로 (gsheets 사용 시)")
+    parser.add_argument("--courses", nargs="+", default=["courses.json"],
+                        help="과목 정보 파일 (기본: courses.json, 그 밖의 버전은 옆의 catalog_versions/에서 찾음)")
+    parser.add_argument("--out", help="출력 CSV 경로 (기본: 표준 출력)")
+    parser.add_argument("--chunk-rows", type=int, default=1000, help="저장소에서 한 번에 읽을 행 수")
+    args = parser.parse_args(argv)
+
+    storage = open_storage_for_cli(args.storage, args.creds)
+    resolve = catalog_resolver(*(load_catalog(path) for path in args.courses),
+                               archive_dir=catalog_archive_dir(args.courses[0]))
+    out = open(args.out, "w", encoding="utf-8-sig", newline="") if args.out else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(SHEET_HEADER)
+        count = 0
+        for row in iter_long_rows(storage, resolve, chunk_rows=args.chunk_rows):
+            writer.writerow(row)
+            count += 1
+    except (LookupError, ValueError) as e:
+        parser.exit(2, f"오류: {e}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"long 형식 행 {count}개를 썼습니다.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
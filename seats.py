@@ -0,0 +1,215 @@
+# seats.py
+# 정원(capacity)이 있는 과목의 좌석 선착순 예약 장부.
+# SQLite(WAL) 파일 하나를 여러 스레드/프로세스가 함께 사용하며, 좌석 확보는
+# "UPDATE ... SET taken = taken + 1 WHERE taken < capacity" 한 문장으로 원자적으로 처리합니다.
+# 수백 명이 같은 과목을 동시에 선택해도 정원을 넘겨 배정되지 않습니다.
+#
+# 좌석 상태:
+# - held: 학생이 체크박스를 선택해 임시로 잡은 좌석 (세션 ID 기준, 만료 시간이 지나면 자동 반환)
+# - confirmed: 제출로 확정된 좌석 (학번 기준, 다시 제출하면 새 선택으로 교체)
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+from sqlite_util import Transaction
+
+HOLD_HELD = "held"
+HOLD_CONFIRMED = "confirmed"
+
+DEFAULT_HOLD_SECONDS = 15 * 60  # 이 시간 동안 아무 동작이 없는 세션의 임시 좌석은 반환
+EXPIRE_CHECK_SECONDS = 5.0  # 만료 좌석 정리 주기
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seats (
+    course_id TEXT PRIMARY KEY,
+    capacity  INTEGER NOT NULL,
+    taken     INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS holds (
+    course_id  TEXT NOT NULL,
+    holder     TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (course_id, holder)
+);
+CREATE INDEX IF NOT EXISTS idx_holds_holder ON holds(holder);
+CREATE INDEX IF NOT EXISTS idx_holds_expiry ON holds(status, expires_at);
+"""
+
+
+class SeatLedger:
+    """과목별 정원과 좌석 예약을 관리하는 SQLite 장부입니다."""
+
+    def __init__(self, path, hold_seconds=DEFAULT_HOLD_SECONDS):
+        self.path = os.path.abspath(path)
+        self.hold_seconds = hold_seconds
+        self._local = threading.local()
+        self._last_expire_check = 0.0
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self):
+        """쓰기 트랜잭션을 바로 시작합니다. (읽은 값이 커밋 전에 바뀌지 않도록 BEGIN IMMEDIATE)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        return Transaction(conn)
+
+    # --- 정원 설정 ---
+    def sync_capacities(self, capacities):
+        """카탈로그의 {과목 ID: 정원}을 장부에 반영합니다. 이미 잡힌 좌석 수는 유지됩니다."""
+        with self._write() as conn:
+            conn.executemany(
+                "INSERT INTO seats (course_id, capacity) VALUES (?, ?)"
+                " ON CONFLICT(course_id) DO UPDATE SET capacity = excluded.capacity",
+                list(capacities.items()),
+            )
+            conn.execute(
+                f"DELETE FROM seats WHERE course_id NOT IN ({','.join('?' * len(capacities))})",
+                list(capacities),
+            )
+            conn.execute("DELETE FROM holds WHERE course_id NOT IN (SELECT course_id FROM seats)")
+
+    # --- 조회 ---
+    def remaining(self):
+        """{과목 ID: 남은 좌석 수}를 반환합니다."""
+        self.expire_holds()
+        rows = self._conn().execute("SELECT course_id, capacity - taken FROM seats")
+        return {course_id: max(left, 0) for course_id, left in rows}
+
+    # --- 임시 좌석 ---
+    def reserve(self, course_id, holder, student_id=None):
+        """좌석을 하나 잡습니다. 이미 잡은 좌석이면 만료 시간만 늘립니다.
+
+        정원이 없는 과목이거나 student_id가 이미 확정한 좌석이면 True,
+        남은 좌석이 없으면 False를 반환합니다.
+        """
+        self.expire_holds()
+        expires_at = time.time() + self.hold_seconds
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM seats WHERE course_id = ?", (course_id,)).fetchone() is None:
+                return True
+            if student_id and conn.execute(
+                "SELECT 1 FROM holds WHERE course_id = ? AND holder = ?", (course_id, _student_key(student_id))
+            ).fetchone():
+                return True
+            updated = conn.execute(
+                "UPDATE holds SET expires_at = ? WHERE course_id = ? AND holder = ?",
+                (expires_at, course_id, holder),
+            ).rowcount
+            if updated:
+                return True
+            if not conn.execute(
+                "UPDATE seats SET taken = taken + 1 WHERE course_id = ? AND taken < capacity", (course_id,)
+            ).rowcount:
+                return False
+            conn.execute(
+                "INSERT INTO holds (course_id, holder, status, expires_at) VALUES (?, ?, ?, ?)",
+                (course_id, holder, HOLD_HELD, expires_at),
+            )
+        return True
+
+    def release(self, course_id, holder):
+        """임시 좌석을 반환합니다. (확정 좌석은 다시 제출할 때만 바뀝니다)"""
+        with self._write() as conn:
+            self._delete_holds(conn, [(course_id, holder)], HOLD_HELD)
+
+    def touch(self, holder):
+        """세션이 살아 있음을 알리고 임시 좌석의 만료 시간을 늘립니다."""
+        conn = self._conn()
+        conn.execute(
+            "UPDATE holds SET expires_at = ? WHERE holder = ? AND status = ?",
+            (time.time() + self.hold_seconds, holder, HOLD_HELD),
+        )
+
+    def expire_holds(self, force=False):
+        """만료된 임시 좌석을 반환합니다. (EXPIRE_CHECK_SECONDS마다 한 번만 실제로 정리)"""
+        now = time.time()
+        if not force and now - self._last_expire_check < EXPIRE_CHECK_SECONDS:
+            return 0
+        self._last_expire_check = now
+        with self._write() as conn:
+            expired = conn.execute(
+                "SELECT course_id, holder FROM holds WHERE status = ? AND expires_at < ?", (HOLD_HELD, now)
+            ).fetchall()
+            self._delete_holds(conn, expired, HOLD_HELD)
+        return len(expired)
+
+    def _delete_holds(self, conn, keys, status):
+        for course_id, holder in keys:
+            if conn.execute(
+                "DELETE FROM holds WHERE course_id = ? AND holder = ? AND status = ?", (course_id, holder, status)
+            ).rowcount:
+                conn.execute("UPDATE seats SET taken = taken - 1 WHERE course_id = ?", (course_id,))
+
+    # --- 확정 ---
+    def confirm(self, holder, student_id, course_ids):
+        """제출 시 세션의 임시 좌석을 학번의 확정 좌석으로 바꿉니다.
+
+        - 이미 확정된 좌석은 그대로 두고, 임시 좌석이 없는 과목은 새로 좌석을 잡습니다.
+        - 이전 제출에서 확정했지만 이번에 선택하지 않은 과목의 좌석은 반환합니다.
+        한 과목이라도 좌석을 잡지 못하면 아무것도 바꾸지 않고 그 과목 ID 목록을 반환합니다. (성공 시 빈 목록)
+        """
+        with self.confirming(holder, student_id, course_ids) as failed:
+            return failed
+
+    @contextlib.contextmanager
+    def confirming(self, holder, student_id, course_ids):
+        """confirm과 같지만, with 블록이 예외 없이 끝날 때만 확정을 커밋합니다.
+
+        블록에는 잡지 못한 과목 ID 목록이 전달됩니다. 빈 목록일 때 블록 안에서 접수하면,
+        접수가 실패해 예외가 나는 경우 좌석이 확정되지 않은 채(이전 상태 그대로) 남습니다.
+        블록 동안 장부의 쓰기 잠금을 쥐고 있으므로 블록 안에서는 짧은 작업만 합니다.
+        """
+        with self._write() as conn:
+            yield self._confirm(conn, holder, student_id, course_ids)
+
+    def _confirm(self, conn, holder, student_id, course_ids):
+        student_key = _student_key(student_id)
+        capped = {cid for (cid,) in conn.execute("SELECT course_id FROM seats")}
+        wanted = [cid for cid in course_ids if cid in capped]
+        held = {cid for (cid,) in conn.execute(
+            "SELECT course_id FROM holds WHERE holder = ? AND status = ?", (holder, HOLD_HELD))}
+        confirmed = {cid for (cid,) in conn.execute(
+            "SELECT course_id FROM holds WHERE holder = ? AND status = ?", (student_key, HOLD_CONFIRMED))}
+
+        failed = []
+        for cid in wanted:
+            if cid in confirmed:
+                continue
+            if cid in held:
+                conn.execute(
+                    "UPDATE holds SET holder = ?, status = ?, expires_at = NULL WHERE course_id = ? AND holder = ?",
+                    (student_key, HOLD_CONFIRMED, cid, holder),
+                )
+                held.discard(cid)
+            elif conn.execute(
+                "UPDATE seats SET taken = taken + 1 WHERE course_id = ? AND taken < capacity", (cid,)
+            ).rowcount:
+                conn.execute(
+                    "INSERT INTO holds (course_id, holder, status, expires_at) VALUES (?, ?, ?, NULL)",
+                    (cid, student_key, HOLD_CONFIRMED),
+                )
+            else:
+                failed.append(cid)
+        if failed:
+            conn.execute("ROLLBACK")
+            return failed
+
+        # 이미 확정된 과목을 다시 잡아 둔 임시 좌석, 이번 제출에서 빠진 확정 좌석을 반환
+        self._delete_holds(conn, [(cid, holder) for cid in held if cid in confirmed], HOLD_HELD)
+        self._delete_holds(conn, [(cid, student_key) for cid in confirmed - set(wanted)], HOLD_CONFIRMED)
+        return []
+
+
+def _student_key(student_id):
+    return f"student:{student_id}"
@@ -1,25 +1,30 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-
-# 1. 접근 권한(Scope) 정의
-scope = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/drive"
-]
-
-# 2. credentials.json 로드
+# 저장소 접근 테스트 스크립트
+# 사용법: python sheet_access_test.py [저장소 URL]
+#   - 인자가 없으면 서비스 계정 키 파일로 Google Sheets에 접근합니다.
+#   - 예: python sheet_access_test.py sqlite:///tmp/registrations.db  (Google 없이 로컬 확인)
+import json
 import os
+import sys
+
+from storage import DEFAULT_SPREADSHEET_ID, DEFAULT_WORKSHEET_NAME, open_storage
 
-base_dir = os.path.dirname(__file__)
-json_path = os.path.join(base_dir, "course-registration-461012-cccf9c22b64b.json")
+storage_url = sys.argv[1] if len(sys.argv) > 1 else f"gsheets://{DEFAULT_SPREADSHEET_ID}/{DEFAULT_WORKSHEET_NAME}"
 
-creds = ServiceAccountCredentials.from_json_keyfile_name(json_path, scope)
+# 1. credentials.json 로드 (Google Sheets 사용 시에만)
+creds_dict = None
+if storage_url.startswith("gsheets://"):
+    base_dir = os.path.dirname(__file__)
+    json_path = os.path.join(base_dir, "course-registration-461012-cccf9c22b64b.json")
+    with open(json_path, encoding="utf-8") as f:
+        creds_dict = json.load(f)
 
-# 3. 인증 클라이언트 생성
-client = gspread.authorize(creds)
+# 2. 저장소 열기
+storage = open_storage(storage_url, creds_dict)
 
-# 4. 스프레드시트 접근 (문서 키 사용)
-sheet = client.open_by_key("1veluylbgXdoQ1ZUz7_SnCByUS3PQPJPU1HpDKO2YEGE").sheet1
+# 3. 데이터 쓰기 예시
+storage.append_rows([["2025-01-01 00:00:00", "홍길동", "23001", "c1", "문학", "2", "1", "4"]])
 
-# 5. 데이터 쓰기 예시
-sheet.append_row(["홍길동", "23001", "2", "1", "문학", "4", "학교지정"])
+# 4. 읽기 확인
+total = storage.count_rows()
+print(f"전체 행 수: {total}")
+print("마지막 행:", storage.get_range(total, total))
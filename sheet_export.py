@@ -0,0 +1,350 @@
+# sheet_export.py
+# 수강신청 마감 후 제출 워크시트 전체를 분석용 파일로 내보내는 도구.
+#
+# - 저장소를 chunk_rows행씩 범위로 나누어 읽고(429/5xx, 연결 오류일 때만 지터를 둔 지수 백오프로 재시도),
+#   행마다 카탈로그(그룹, 학교지정 여부, 학점)를 붙여 조각(part) 파일로 바로 기록합니다.
+#   compact 형식 저장소는 과목당 한 행으로 풀어서 기록합니다.
+# - 조각을 다 쓸 때마다 progress.json에 다음 행 번호를 남기므로, 중단 후 같은 명령을 다시 실행하면 이어서 읽습니다.
+#   (이미 받은 조각은 시트를 다시 읽지 않고 로컬 파일에서 집계용 값만 다시 읽음)
+# - 읽는 동안 (학생, 과목, 제출) 번호만 배열로 모아 두었다가, 끝에서 NumPy로 한 번에 집계합니다.
+#   학생마다 가장 최근 제출만 집계에 넣습니다.
+#     course_enrollment.csv   과목별 신청 학생 수
+#     group_distribution.csv  학기·그룹별로 학생이 고른 과목 수의 분포
+#     coenrollment.npz        학생×과목 희소 행렬(COO)과 과목별 신청 수, 과목 쌍별 동시 신청 수(COO, a<b)
+#     coenrollment_pairs.csv  함께 신청한 과목 쌍과 학생 수
+#
+# 출력 형식: --format parquet(pyarrow 필요) 또는 csv.gz
+# 사용 예:
+#   python sheet_export.py --storage gsheets://<ID>/Sheet1 --creds key.json --out export/
+#   python sheet_export.py --storage "sqlite:///registrations.db?format=compact" --out export/ --format parquet
+import argparse
+import csv
+import gzip
+import json
+import logging
+import os
+import random
+import sys
+import time
+from array import array
+
+import numpy as np
+
+import rate_limit
+from catalog import catalog_archive_dir, load_catalog
+from record_codec import catalog_resolver, expand_compact_row
+from storage import (FORMAT_COMPACT, SHEET_HEADER, STUDENT_ID_COLUMN, open_storage_for_cli,
+                     parse_catalog_version_cell, submission_order_key)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ["Timestamp", "Student Name", "Student ID", "Course ID", "Course Name", "Year", "Semester", "Hours",
+                  "Group", "Mandatory", "Catalog Version", "Submission ID"]
+FORMATS = ("parquet", "csv.gz")
+PROGRESS_FILE = "progress.json"
+
+_LONG_COL = {name: i for i, name in enumerate(SHEET_HEADER)}
+
+
+# --- 시트 읽기 ---
+def is_transient(error):
+    """다시 읽으면 성공할 수 있는 오류(429/5xx, 연결 끊김/시간 초과)인지 판단합니다."""
+    status = rate_limit.status_code(error)
+    if status == rate_limit.RATE_LIMITED or status in rate_limit.SERVER_ERRORS:
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        import requests
+    except ImportError:
+        return False
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def read_range_with_retry(storage, start_row, end_row, retries=6, base_delay=1.0, max_delay=60.0):
+    """get_range를 일시 오류일 때만 재시도합니다. (그 밖의 오류와 마지막 실패는 그대로 전달)
+
+    호출 간격과 짧은 429/5xx 재시도는 속도 제한기(rate_limit)가 맡고,
+    여기서는 제한기의 재시도 시간을 넘겨 올라온 일시 오류만 더 길게 기다렸다가 다시 읽습니다.
+    """
+    delay = base_delay
+    for attempt in range(retries + 1):
+        try:
+            return storage.get_range(start_row, end_row)
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                raise
+            wait = min(delay, max_delay) * (0.5 + random.random())
+            logger.warning("%d~%d행 읽기 실패, %.1f초 후 재시도 (%d/%d): %s", start_row, end_row, wait, attempt + 1, retries, e)
+            time.sleep(wait)
+            delay *= 2
+
+
+def _long_rows(storage, rows, resolve_catalog):
+    if storage.format != FORMAT_COMPACT:
+        return [row for row in rows if row[STUDENT_ID_COLUMN - 1]]
+    # 풀 수 없는 행(보관본이 없는 카탈로그 버전 등)은 건너뛰지 않고 LookupError/ValueError로 멈춥니다.
+    # (진행 상황은 조각 단위로 저장되므로 보관본을 채운 뒤 다시 실행하면 그 조각부터 이어서 내보냄)
+    long_rows = []
+    for row in rows:
+        if row[STUDENT_ID_COLUMN - 1]:
+            long_rows.extend(expand_compact_row(row, resolve_catalog))
+    return long_rows
+
+
+def join_catalog(long_row, resolve_catalog, default_catalog):
+    """long 형식 행에 카탈로그 정보를 붙여 EXPORT_COLUMNS 순서의 값 목록을 만듭니다."""
+    version = parse_catalog_version_cell(long_row[_LONG_COL["Catalog Version"]])
+    catalog = (resolve_catalog(version) if version else None) or default_catalog
+    course = catalog.by_id.get(long_row[_LONG_COL["Course ID"]])
+    hours = course['hours'] if course else _to_int(long_row[_LONG_COL["Hours"]])
+    return [
+        long_row[_LONG_COL["Timestamp"]], long_row[_LONG_COL["Student Name"]], long_row[_LONG_COL["Student ID"]],
+        long_row[_LONG_COL["Course ID"]],
+        course['name'] if course else long_row[_LONG_COL["Course Name"]],
+        course['year'] if course else _to_int(long_row[_LONG_COL["Year"]]),
+        course['semester'] if course else _to_int(long_row[_LONG_COL["Semester"]]),
+        hours,
+        course['group'] if course else "",
+        bool(course.get('mandatory', False)) if course else False,
+        version or "", long_row[_LONG_COL["Submission ID"]],
+    ]
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# --- 조각 파일 ---
+def write_part(path, rows, fmt):
+    """조각 파일을 임시 파일에 쓴 뒤 이름을 바꿉니다. (반쯤 쓴 조각이 남지 않도록)"""
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = list(zip(*rows)) if rows else [[] for _ in EXPORT_COLUMNS]
+        types = {"Year": pa.int16(), "Semester": pa.int16(), "Hours": pa.int16(), "Mandatory": pa.bool_()}
+        table = pa.table({name: pa.array(list(values), type=types.get(name, pa.string()))
+                          for name, values in zip(EXPORT_COLUMNS, columns)})
+        pq.write_table(table, tmp, compression="zstd")
+    else:
+        with gzip.open(tmp, "wt", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            writer.writerows(rows)
+    os.replace(tmp, path)
+
+
+def read_part_keys(path, fmt):
+    """조각 파일에서 집계에 필요한 열(학번, 과목 ID, 그룹, 학기, 타임스탬프, 접수번호)만 다시 읽습니다."""
+    names = ["Student ID", "Course ID", "Group", "Year", "Semester", "Timestamp", "Submission ID"]
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=names)
+        yield from zip(*(table.column(name).to_pylist() for name in names))
+    else:
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            index = [header.index(name) for name in names]
+            for row in reader:
+                yield tuple(row[i] for i in index)
+
+
+# --- 집계 ---
+class RollupAccumulator:
+    """행마다 (학생, 과목, 제출) 번호만 배열에 쌓아 두고, 끝에서 NumPy로 집계합니다."""
+
+    def __init__(self):
+        self.student_codes = {}
+        self.course_codes = {}
+        self.submission_codes = {}
+        self.course_info = []  # 과목 번호 -> (과목 ID, 학기키, 그룹)
+        self._students = array('q')
+        self._courses = array('q')
+        self._submissions = array('q')
+
+    @staticmethod
+    def _code(table, key):
+        code = table.get(key)
+        if code is None:
+            code = table[key] = len(table)
+        return code
+
+    def add(self, student_id, course_id, group, year, semester, timestamp, submission_id):
+        course_code = self.course_codes.get(course_id)
+        if course_code is None:
+            course_code = self._code(self.course_codes, course_id)
+            self.course_info.append((course_id, f"Y{year}S{semester}", group))
+        self._students.append(self._code(self.student_codes, student_id))
+        self._courses.append(course_code)
+        self._submissions.append(self._code(self.submission_codes, (timestamp, submission_id)))
+
+    def latest_pairs(self):
+        """학생마다 가장 최근 제출에 속한 (학생 번호, 과목 번호) 배열을 중복 없이 반환합니다."""
+        students = np.frombuffer(self._students, dtype=np.int64)
+        courses = np.frombuffer(self._courses, dtype=np.int64)
+        submissions = np.frombuffer(self._submissions, dtype=np.int64)
+        # 제출 번호를 (타임스탬프, 접수번호) 순위로 바꾼 뒤 (시트 로캘 형식 날짜도 시각으로 비교) 학생별 최댓값과 같은 행만 남깁니다.
+        rank_of_code = np.empty(len(self.submission_codes), dtype=np.int64)
+        for rank, key in enumerate(sorted(self.submission_codes, key=lambda key: submission_order_key(*key))):
+            rank_of_code[self.submission_codes[key]] = rank
+        ranks = rank_of_code[submissions]
+        latest = np.full(len(self.student_codes), -1, dtype=np.int64)
+        np.maximum.at(latest, students, ranks)
+        keep = ranks == latest[students]
+        width = max(1, len(self.course_codes))
+        pairs = np.unique(students[keep] * width + courses[keep])
+        return pairs // width, pairs % width
+
+    def write_rollups(self, out_dir, catalog):
+        student_idx, course_idx = self.latest_pairs()
+        n_students, n_courses = len(self.student_codes), len(self.course_codes)
+        course_ids = [info[0] for info in self.course_info]
+
+        # 과목별 신청 학생 수
+        enrollment = np.bincount(course_idx, minlength=n_courses)
+        with open(os.path.join(out_dir, "course_enrollment.csv"), "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Course ID", "Course Name", "Semester Key", "Group", "Hours", "Mandatory", "Students"])
+            for code in np.argsort(-enrollment, kind="stable"):
+                course_id, semester_key, group = self.course_info[code]
+                course = catalog.by_id.get(course_id, {})
+                writer.writerow([course_id, course.get('name', ""), semester_key, group, course.get('hours', ""),
+                                 "Y" if course.get('mandatory', False) else "N", int(enrollment[code])])
+
+        # 학기·그룹별 선택 과목 수 분포: (학생, 그룹)별 과목 수 → 그룹마다 히스토그램
+        group_keys = sorted({(info[1], info[2]) for info in self.course_info})
+        group_code_of = {key: i for i, key in enumerate(group_keys)}
+        course_group = np.array([group_code_of[(info[1], info[2])] for info in self.course_info], dtype=np.int64)
+        n_groups = max(1, len(group_keys))
+        per_student_group = np.bincount(student_idx * n_groups + course_group[course_idx],
+                                        minlength=n_students * n_groups).reshape(n_students, n_groups) \
+            if n_students else np.zeros((0, n_groups), dtype=np.int64)
+        with open(os.path.join(out_dir, "group_distribution.csv"), "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Semester Key", "Group", "Courses Chosen", "Students"])
+            for g, (semester_key, group) in enumerate(group_keys):
+                histogram = np.bincount(per_student_group[:, g]) if n_students else np.zeros(1, dtype=np.int64)
+                for chosen, count in enumerate(histogram):
+                    if count:
+                        writer.writerow([semester_key, group, chosen, int(count)])
+
+        # 과목×과목 동시 신청 수 (X^T X의 위 삼각, COO)
+        # 학생-과목 배열은 (학생, 과목) 순으로 정렬되어 있으므로, 같은 학생의 d칸 뒤 행과 짝지으면 과목 쌍(a<b)이 한 번씩 나옵니다.
+        # 학생×과목 행렬을 밀집 배열로 만들지 않으므로 메모리는 (학생 수 × 과목 수)가 아니라 쌍 개수에 비례합니다.
+        per_student = np.bincount(student_idx, minlength=n_students)
+        pair_a, pair_b = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        for d in range(1, int(per_student.max()) if n_students else 0):
+            same = student_idx[d:] == student_idx[:-d]
+            pair_a.append(course_idx[:-d][same])
+            pair_b.append(course_idx[d:][same])
+        pair_codes, pair_counts = np.unique(np.concatenate(pair_a) * max(1, n_courses) + np.concatenate(pair_b),
+                                            return_counts=True)
+        a, b = np.divmod(pair_codes, max(1, n_courses))
+        np.savez_compressed(os.path.join(out_dir, "coenrollment.npz"),
+                            student_ids=np.array(list(self.student_codes), dtype=str),
+                            course_ids=np.array(course_ids, dtype=str),
+                            rows=student_idx.astype(np.int32), cols=course_idx.astype(np.int32),
+                            enrollment=enrollment.astype(np.int32),
+                            pair_rows=a.astype(np.int32), pair_cols=b.astype(np.int32),
+                            pair_counts=pair_counts.astype(np.int32))
+        with open(os.path.join(out_dir, "coenrollment_pairs.csv"), "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Course A", "Course B", "Students"])
+            for i in np.argsort(-pair_counts, kind="stable"):
+                writer.writerow([course_ids[a[i]], course_ids[b[i]], int(pair_counts[i])])
+        return n_students, len(student_idx)
+
+
+# --- 진행 상황 ---
+def load_progress(out_dir, storage_url, fmt):
+    path = os.path.join(out_dir, PROGRESS_FILE)
+    if not os.path.exists(path):
+        return {'storage': storage_url, 'format': fmt, 'nextRow': 2, 'parts': [], 'done': False}
+    with open(path, encoding="utf-8") as f:
+        progress = json.load(f)
+    if progress.get('storage') != storage_url or progress.get('format') != fmt:
+        raise ValueError(f"{path}는 다른 저장소/형식의 내보내기 기록입니다. 다른 출력 디렉터리를 지정하세요.")
+    return progress
+
+
+def save_progress(out_dir, progress):
+    path = os.path.join(out_dir, PROGRESS_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(progress, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def export_sheet(storage, storage_url, catalogs, out_dir, fmt="csv.gz", chunk_rows=5000, archive_dir=None):
+    """저장소 전체를 조각 파일로 내보내고 집계 파일을 만듭니다. (내보낸 행 수, 집계한 학생 수) 반환.
+
+    archive_dir: catalogs에 없는 카탈로그 버전을 찾을 버전 보관 디렉터리 (catalog.catalog_archive_dir)
+    """
+    os.makedirs(os.path.join(out_dir, "rows"), exist_ok=True)
+    progress = load_progress(out_dir, storage_url, fmt)
+    resolve = catalog_resolver(*catalogs, archive_dir=archive_dir)
+    accumulator = RollupAccumulator()
+
+    # 이미 받은 조각은 로컬 파일에서 집계용 값만 다시 읽습니다.
+    for part in progress['parts']:
+        for key in read_part_keys(os.path.join(out_dir, "rows", part), fmt):
+            accumulator.add(*key)
+
+    total = storage.count_rows()
+    started = time.perf_counter()
+    exported = 0
+    row_no = progress['nextRow']
+    while row_no <= total:
+        end_row = min(row_no + chunk_rows - 1, total)
+        rows = read_range_with_retry(storage, row_no, end_row)
+        joined = [join_catalog(r, resolve, catalogs[0]) for r in _long_rows(storage, rows, resolve)]
+        part = f"part-{row_no:08d}.{fmt}"
+        write_part(os.path.join(out_dir, "rows", part), joined, fmt)
+        for r in joined:
+            accumulator.add(r[2], r[3], r[8], r[5], r[6], r[0], r[11])
+        exported += len(joined)
+        progress['parts'].append(part)
+        progress['nextRow'] = row_no = end_row + 1
+        save_progress(out_dir, progress)
+        elapsed = time.perf_counter() - started
+        print(f"\r[{end_row - 1}/{total - 1}행] {exported}행 기록, {elapsed:.1f}초", end='', file=sys.stderr)
+    print(file=sys.stderr)
+
+    students, pairs = accumulator.write_rollups(out_dir, catalogs[0])
+    progress['done'] = True
+    save_progress(out_dir, progress)
+    logger.info("집계: 학생 %d명, 학생-과목 %d건", students, pairs)
+    return exported, students
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="제출 워크시트 전체를 분석용 파일(Parquet/csv.gz)과 집계로 내보내기")
+    parser.add_argument("--storage", default=os.environ.get("COURSE_STORAGE_URL"), required=not os.environ.get("COURSE_STORAGE_URL"),
+                        help="저장소 URL (sqlite:///파일.db 또는 gsheets://<ID>/<시트>), 기본값: COURSE_STORAGE_URL")
+    parser.add_argument("--creds", help="Google 서비스 계정 키(JSON) 파일 경로 (gsheets 사용 시)")
+    parser.add_argument("--courses", nargs="+", default=["courses.json"],
+                        help="과목 정보 파일 (첫 번째가 기준, 기본: courses.json, 그 밖의 버전은 옆의 catalog_versions/에서 찾음)")
+    parser.add_argument("--out", required=True, help="출력 디렉터리 (같은 디렉터리로 다시 실행하면 이어서 내보냄)")
+    parser.add_argument("--format", choices=FORMATS, default="csv.gz", help="행 파일 형식 (기본: csv.gz)")
+    parser.add_argument("--chunk-rows", type=int, default=5000, help="저장소에서 한 번에 읽을 행 수")
+    args = parser.parse_args(argv)
+
+    storage = open_storage_for_cli(args.storage, args.creds)
+    catalogs = [load_catalog(path) for path in args.courses]
+    try:
+        exported, students = export_sheet(storage, args.storage, catalogs, args.out, args.format, args.chunk_rows,
+                                          archive_dir=catalog_archive_dir(args.courses[0]))
+    except (LookupError, ValueError) as e:
+        parser.exit(2, f"오류: {e}\n")
+    print(f"완료: 이번 실행에서 {exported}행 기록, 학생 {students}명 집계 → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
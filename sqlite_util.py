@@ -0,0 +1,20 @@
+# sqlite_util.py
+# 여러 모듈(seats, submission_queue)이 함께 쓰는 SQLite 도우미.
+
+
+class Transaction:
+    """with 블록 동안 트랜잭션을 유지하는 얇은 래퍼입니다. (isolation_level=None 연결용)
+
+    블록이 예외로 끝나면 ROLLBACK, 아니면 COMMIT합니다. 블록 안에서 이미 끝낸 트랜잭션은 그대로 둡니다.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
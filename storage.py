@@ -0,0 +1,555 @@
+# storage.py
+# 제출 내역 저장소 인터페이스.
+# Google Sheets(gspread) 구현과, 같은 의미를 갖는 로컬 SQLite 구현을 제공합니다.
+# 부하 테스트/벤치마크/오프라인 실행에서는 SQLite 구현을 사용하면 Google 없이 동작합니다.
+#
+# 행 번호는 Google Sheets와 같이 1부터 시작하며 1행은 헤더입니다.
+# 모든 셀 값은 시트에서 읽을 때와 같이 문자열로 반환됩니다.
+#
+# 이전 long 형식(LEGACY_SHEET_HEADER, Hours 열까지만 있음) 저장소는 여는 시점에 확인합니다.
+# SQLite는 그 자리에서 빠진 열을 붙여 옮기고, Google Sheets는 한 번 `python storage.py migrate-header`로
+# 옮길 때까지 열지 않습니다. (열 위치가 어긋난 채 접수번호 열을 잘못 읽지 않도록)
+#
+# 제출 행 형식은 두 가지입니다. (저장소 URL의 ?format=으로 선택, 기본은 long)
+# - long: 과목당 한 행 (SHEET_HEADER)
+# - compact: 학생당 한 행, 카탈로그 버전과 부호화한 과목 집합 (COMPACT_HEADER, record_codec 참고)
+import abc
+import argparse
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from urllib.parse import parse_qs
+
+import metrics
+import rate_limit
+from google_client import get_client_manager
+
+SHEET_HEADER = ["Timestamp", "Student Name", "Student ID", "Course ID", "Course Name", "Year", "Semester", "Hours",
+                "Catalog Version", "Submission ID"]
+COMPACT_HEADER = ["Timestamp", "Student Name", "Student ID", "Catalog Version", "Courses", "Submission ID"]
+# 학번 열은 두 형식에서 같은 위치이고, 접수번호 열은 두 형식 모두 마지막 열입니다. (큐가 행 끝에 붙임)
+# 제출 당시의 카탈로그 버전은 "v:" 접두어를 붙여 기록합니다. (숫자로만 된 버전이 시트에서 숫자로 바뀌지 않도록)
+# 운영 중인 시트의 원래 long 형식 헤더(Hours 열까지). 옮길 때 뒤에 빠진 열(LEGACY_MISSING_COLUMNS)을 붙입니다.
+# 기존 행의 새 열은 빈 값으로 둡니다. (카탈로그 버전을 모르는 제출, 접수번호 없는 제출)
+LEGACY_SHEET_HEADER = SHEET_HEADER[:SHEET_HEADER.index("Hours") + 1]
+LEGACY_MISSING_COLUMNS = SHEET_HEADER[len(LEGACY_SHEET_HEADER):]
+STUDENT_ID_COLUMN = SHEET_HEADER.index("Student ID") + 1
+SUBMISSION_ID_COLUMN = SHEET_HEADER.index("Submission ID") + 1
+
+VERSION_PREFIX = "v:"
+
+FORMAT_LONG = "long"
+FORMAT_COMPACT = "compact"
+SHEET_HEADERS = {FORMAT_LONG: SHEET_HEADER, FORMAT_COMPACT: COMPACT_HEADER}
+
+# 기본 저장소: 수강신청결과 스프레드시트. COURSE_STORAGE_URL 환경변수로 바꿀 수 있습니다.
+DEFAULT_SPREADSHEET_ID = "1veluylbgXdoQ1ZUz7_SnCByUS3PQPJPU1HpDKO2YEGE"
+DEFAULT_WORKSHEET_NAME = "Sheet1"
+
+GRID_GROW_ROWS = 500  # 시트 격자가 모자랄 때 한 번에 늘릴 행 수
+
+
+def _column_letter(col):
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _as_cell(value):
+    return "" if value is None else str(value)
+
+
+def catalog_version_cell(version):
+    return VERSION_PREFIX + version if version else ""
+
+
+def parse_catalog_version_cell(cell):
+    return cell[len(VERSION_PREFIX):] if cell.startswith(VERSION_PREFIX) else cell
+
+
+def submission_rows(timestamp, student_name, student_id, courses, catalog_version=None):
+    """선택 과목(dict 목록)을 과목당 한 행의 제출 행 목록으로 변환합니다. (접수번호 열 제외)"""
+    version_cell = catalog_version_cell(catalog_version)
+    return [
+        [timestamp, student_name, student_id,
+         course['id'], course['name'], course['year'], course['semester'], course['hours'], version_cell]
+        for course in courses
+    ]
+
+
+class StorageBackend(abc.ABC):
+    """제출 저장소 공통 인터페이스입니다. (구현은 아래 추상 메서드를 모두 정의해야 만들 수 있음)"""
+
+    header = SHEET_HEADER
+
+    @property
+    def format(self):
+        return FORMAT_COMPACT if self.header == COMPACT_HEADER else FORMAT_LONG
+
+    @property
+    def submission_id_column(self):
+        return self.header.index("Submission ID") + 1
+
+    @abc.abstractmethod
+    def append_rows(self, rows):
+        """행 목록을 마지막 행 뒤에 추가합니다."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_range(self, start_row, end_row):
+        """start_row ~ end_row(포함) 행을 문자열 리스트의 리스트로 반환합니다."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_rows_from(self, start_row):
+        """start_row부터 데이터 끝까지의 행을 반환합니다. (start_row가 마지막 행 뒤이면 빈 목록)"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def col_values(self, col):
+        """한 열 전체 값을 반환합니다. (헤더 포함)"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def count_rows(self):
+        """헤더를 포함한 전체 행 수를 반환합니다."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def upsert_student(self, student_id, rows):
+        """학번의 기존 행을 모두 rows로 교체합니다. (없으면 추가)"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def write_cells(self, updates):
+        """[(행 번호, 시작 열 번호, [값, ...]), ...]을 한 번의 요청으로 씁니다. (한 항목은 한 행의 연속된 셀)"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def ensure_rows(self, row_count):
+        """시트 격자가 최소 row_count행이 되도록 늘립니다."""
+        raise NotImplementedError
+
+    def _pad(self, row):
+        row = [_as_cell(v) for v in row]
+        width = len(self.header)
+        return row + [""] * (width - len(row)) if len(row) < width else row
+
+
+def iter_rows(storage, start_row=2, chunk_rows=1000):
+    """start_row부터 마지막 행까지 chunk_rows씩 나누어 읽으며 (행 번호, 행)을 차례로 반환합니다."""
+    total = storage.count_rows()
+    row_no = start_row
+    while row_no <= total:
+        end_row = min(row_no + chunk_rows - 1, total)
+        for offset, row in enumerate(storage.get_range(row_no, end_row)):
+            yield row_no + offset, row
+        row_no = end_row + 1
+
+
+# --- 제출 순서 ---
+# 앱은 타임스탬프를 'YYYY-MM-DD HH:MM:SS'로 쓰지만, Google Sheets는 USER_ENTERED로 받은 날짜를 날짜 값으로 바꿔
+# 시트 로캘 형식(예: '2025. 3. 4 오후 1:05:00')으로 돌려주므로 문자열 그대로 비교하면 순서가 틀립니다.
+# 두 형식을 모두 datetime으로 읽어 비교하고, 읽지 못한 값은 어떤 날짜보다도 앞선 것으로 봅니다.
+_TIMESTAMP_PATTERN = re.compile(
+    r"^\s*(\d{4})\s*[-./]\s*(\d{1,2})\s*[-./]\s*(\d{1,2})\.?"
+    r"(?:(?:\s+|T)(오전|오후|AM|PM)?\s*(\d{1,2}):(\d{2})(?::(\d{2}))?(?:\.\d+)?\s*(오전|오후|AM|PM)?)?\s*$",
+    re.IGNORECASE,
+)
+
+
+def parse_timestamp(value):
+    """타임스탬프 셀(ISO 형식 또는 한국어 로캘 형식)을 datetime으로 읽습니다. 읽지 못하면 None."""
+    match = _TIMESTAMP_PATTERN.match(str(value or ""))
+    if not match:
+        return None
+    year, month, day, before, hour, minute, second, after = match.groups()
+    hour = int(hour or 0)
+    meridiem = (before or after or "").upper()
+    if meridiem and not 1 <= hour <= 12:
+        return None
+    if meridiem in ("오후", "PM") and hour != 12:
+        hour += 12
+    elif meridiem in ("오전", "AM") and hour == 12:
+        hour = 0
+    try:
+        return datetime(int(year), int(month), int(day), hour, int(minute or 0), int(second or 0))
+    except ValueError:
+        return None
+
+
+def submission_order_key(timestamp, submission_id):
+    """같은 학생의 제출 순서를 정하는 비교 키. (타임스탬프, 접수번호 순이며 더 큰 쪽이 더 늦은 제출)"""
+    parsed = parse_timestamp(timestamp)
+    return (parsed is not None, parsed or datetime.min, str(timestamp or ""), str(submission_id or ""))
+
+
+def latest_selections(rows):
+    """제출 행들을 학번별로 묶어 학생마다 가장 최근 제출의 과목 목록만 남깁니다.
+
+    반환값: {학번: {'name': 이름, 'timestamp': 제출 시각, 'courseIds': [과목 ID, ...]}}
+    같은 학생의 여러 제출은 submission_order_key로 구분하며, 더 늦은 제출이 앞선 제출을 대체합니다.
+    """
+    col = {name: i for i, name in enumerate(SHEET_HEADER)}
+    students = {}
+    for row in rows:
+        student_id = row[col["Student ID"]]
+        if not student_id:
+            continue
+        submission = submission_order_key(row[col["Timestamp"]], row[col["Submission ID"]])
+        entry = students.get(student_id)
+        if entry is None or submission > entry['submission']:
+            entry = students[student_id] = {
+                'name': row[col["Student Name"]], 'timestamp': row[col["Timestamp"]],
+                'submission': submission, 'courseIds': [],
+            }
+        if submission == entry['submission']:
+            entry['courseIds'].append(row[col["Course ID"]])
+    for entry in students.values():
+        del entry['submission']
+    return students
+
+
+# --- Google Sheets 구현 ---
+@contextlib.contextmanager
+def _sheets_call(name):
+    """Sheets API 호출 시간과 오류(429 포함) 수를 지표에 기록합니다."""
+    try:
+        with metrics.span("sheets_" + name):
+            yield
+    except Exception as e:
+        metrics.inc("sheets_errors_total", label=name)
+        if rate_limit.status_code(e) == 429:
+            metrics.inc("sheets_rate_limited_total", label=name)
+        raise
+
+
+_checked_worksheets = set()  # 헤더 형식을 확인한 워크시트 ID (프로세스당 한 번만 읽음)
+
+
+class GspreadStorage(StorageBackend):
+    """워크시트 하나에 대한 저장소. 모든 API 호출은 rate_limit의 프로세스 전역 제한기를 거칩니다.
+
+    priority는 토큰을 기다릴 때의 우선순위입니다. (제출 큐는 PRIORITY_SUBMIT, 관리자 읽기는 PRIORITY_ADMIN)
+    """
+
+    def __init__(self, worksheet, header=SHEET_HEADER, priority=rate_limit.PRIORITY_INTERACTIVE):
+        self.worksheet = worksheet
+        self.header = header
+        self.priority = priority
+        self._grid_rows = 0  # 알고 있는 격자 행 수 (다시 읽거나 늘린 값, 0이면 아직 모름)
+        self._index = None  # upsert_student용 학번 색인 (student_index.StudentRowIndex)
+
+    @classmethod
+    def from_service_account(cls, creds_dict, spreadsheet_id, worksheet_name, header=SHEET_HEADER,
+                             priority=rate_limit.PRIORITY_INTERACTIVE, check_header=True):
+        """서비스 계정 정보로 워크시트를 엽니다. 워크시트가 없으면 헤더와 함께 만듭니다.
+
+        클라이언트와 연결, 열어 둔 워크시트는 google_client의 프로세스 전역 관리자가 재사용합니다.
+        """
+        worksheet = get_client_manager(creds_dict).worksheet(spreadsheet_id, worksheet_name, header, priority)
+        storage = cls(worksheet, header, priority)
+        if check_header and worksheet.id not in _checked_worksheets:
+            if storage.needs_header_migration():
+                raise ValueError(
+                    f"워크시트 '{worksheet_name}'는 Catalog Version/Submission ID 열이 없는 이전 형식입니다. "
+                    "`python storage.py migrate-header --storage <URL> --creds <키 파일>`로 한 번 옮긴 뒤 다시 실행하세요.")
+            _checked_worksheets.add(worksheet.id)
+        return storage
+
+    def needs_header_migration(self):
+        if self.header != SHEET_HEADER:
+            return False
+        current = self._call(rate_limit.READ, "row_values", lambda: self.worksheet.row_values(1))
+        return current == LEGACY_SHEET_HEADER
+
+    def migrate_legacy_header(self):
+        """이전 형식이면 헤더 뒤에 빠진 열 이름을 붙이고 True를 반환합니다. (한 번만 실행)"""
+        if not self.needs_header_migration():
+            return False
+        # 원래 시트는 10열 격자로 만들었지만, 손으로 만든 시트는 더 좁을 수 있습니다.
+        missing_cols = len(SHEET_HEADER) - self.worksheet.col_count
+        if missing_cols > 0:
+            self._call(rate_limit.WRITE, "add_cols", lambda: self.worksheet.add_cols(missing_cols), idempotent=False)
+        self.write_cells([(1, len(LEGACY_SHEET_HEADER) + 1, LEGACY_MISSING_COLUMNS)])
+        return True
+
+    def _call(self, kind, name, func, idempotent=True):
+        def attempt():
+            with _sheets_call(name):
+                return func()
+        return rate_limit.get_sheets_limiter().call(kind, attempt, self.priority, idempotent)
+
+    def append_rows(self, rows):
+        if rows:
+            values = [list(r) for r in rows]
+            self._call(rate_limit.WRITE, "append_rows",
+                       lambda: self.worksheet.append_rows(values, value_input_option='USER_ENTERED'), idempotent=False)
+
+    def get_range(self, start_row, end_row):
+        if end_row < start_row:
+            return []
+        last_col = _column_letter(len(self.header))
+        values = self._call(rate_limit.READ, "get_range", lambda: self.worksheet.get(f"A{start_row}:{last_col}{end_row}"))
+        return [self._pad(row) for row in values]
+
+    def get_rows_from(self, start_row):
+        # 끝 행을 비워 둔 범위(A10:I)는 데이터가 있는 마지막 행까지만 반환합니다.
+        # start_row가 시트 격자 밖이면 오류가 나므로, 호출자는 이미 있는 행부터 읽어야 합니다.
+        last_col = _column_letter(len(self.header))
+        values = self._call(rate_limit.READ, "get_range", lambda: self.worksheet.get(f"A{start_row}:{last_col}"))
+        return [self._pad(row) for row in values]
+
+    def col_values(self, col):
+        return self._call(rate_limit.READ, "col_values", lambda: self.worksheet.col_values(col))
+
+    def count_rows(self):
+        return len(self.col_values(1))
+
+    def write_cells(self, updates):
+        if not updates:
+            return
+        data = [
+            {'range': f"{_column_letter(col)}{row}:{_column_letter(col + len(values) - 1)}{row}",
+             'values': [[_as_cell(v) for v in values]]}
+            for row, col, values in updates
+        ]
+        self._call(rate_limit.WRITE, "batch_update",
+                   lambda: self.worksheet.batch_update(data, value_input_option='USER_ENTERED'))
+
+    def ensure_rows(self, row_count):
+        # 격자를 넘어선 범위에는 쓸 수 없으므로 미리 늘립니다. (호출 횟수를 줄이려고 넉넉히)
+        # worksheet.row_count는 연 시점의 값이라 append_rows나 다른 프로세스가 늘린 격자를 모르므로,
+        # 알고 있는 크기보다 큰 행이 필요할 때만 격자 크기를 다시 읽습니다. (이 앱은 격자를 줄이지 않음)
+        if row_count <= self._grid_rows:
+            return
+        self._grid_rows = self._fetch_grid_rows()
+        missing = row_count - self._grid_rows
+        if missing > 0:
+            added = max(missing, GRID_GROW_ROWS)
+            self._call(rate_limit.WRITE, "add_rows", lambda: self.worksheet.add_rows(added), idempotent=False)
+            self._grid_rows += added
+
+    def _fetch_grid_rows(self):
+        metadata = self._call(rate_limit.READ, "fetch_sheet_metadata",
+                              lambda: self.worksheet.spreadsheet.fetch_sheet_metadata())
+        for sheet in metadata['sheets']:
+            if sheet['properties']['sheetId'] == self.worksheet.id:
+                return sheet['properties']['gridProperties']['rowCount']
+        raise ValueError(f"스프레드시트에서 워크시트(ID {self.worksheet.id})를 찾을 수 없습니다.")
+
+    def upsert_student(self, student_id, rows):
+        # 학번 열을 훑지 않고 행 번호 색인으로 찾아, 바뀐 셀만 씁니다. (남는 행은 지우지 않고 비움)
+        from student_index import StudentRowIndex
+
+        if self._index is None:
+            self._index = StudentRowIndex()
+        replaced = len(self._index.rows_of(self, student_id))
+        self._index.upsert_many(self, [(student_id, rows)])
+        return replaced, len(rows)
+
+
+# --- 로컬 SQLite 구현 ---
+class SQLiteStorage(StorageBackend):
+    """시트와 같은 행 의미(1행 헤더, 삭제 시 아래 행이 당겨짐)를 갖는 로컬 저장소입니다."""
+
+    def __init__(self, path, header=SHEET_HEADER):
+        self.path = os.path.abspath(path)
+        self.header = header
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        conn = self._conn()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS sheet_rows ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, student_id TEXT, cells TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_sheet_rows_student ON sheet_rows(student_id);"
+        )
+        with self._write_lock, conn:
+            conn.execute("BEGIN IMMEDIATE")  # 여러 프로세스가 동시에 열어도 헤더 생성/이전은 한 번만
+            first = conn.execute("SELECT cells FROM sheet_rows ORDER BY id LIMIT 1").fetchone()
+            if first is None:
+                conn.execute("INSERT INTO sheet_rows (student_id, cells) VALUES (NULL, ?)",
+                             (json.dumps(self.header, ensure_ascii=False),))
+            elif json.loads(first[0]) == LEGACY_SHEET_HEADER and self.header == SHEET_HEADER:
+                self._migrate_legacy_header(conn)
+            elif json.loads(first[0]) != self.header:
+                raise ValueError(f"저장소 {self.path}의 헤더가 요청한 형식과 다릅니다: {json.loads(first[0])}")
+
+    def _migrate_legacy_header(self, conn):
+        # 모든 행 끝에 빠진 열만큼 빈 셀(헤더 행은 열 이름)을 붙입니다.
+        updates = []
+        for row_id, cells in conn.execute("SELECT id, cells FROM sheet_rows ORDER BY id").fetchall():
+            cells = self._pad_to(json.loads(cells), len(LEGACY_SHEET_HEADER))
+            cells += [""] * len(LEGACY_MISSING_COLUMNS) if updates else LEGACY_MISSING_COLUMNS
+            updates.append((json.dumps(cells, ensure_ascii=False), row_id))
+        conn.executemany("UPDATE sheet_rows SET cells = ? WHERE id = ?", updates)
+
+    @staticmethod
+    def _pad_to(cells, width):
+        return cells + [""] * (width - len(cells))
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _insert(self, conn, rows):
+        conn.executemany(
+            "INSERT INTO sheet_rows (student_id, cells) VALUES (?, ?)",
+            [(self._pad(r)[STUDENT_ID_COLUMN - 1], json.dumps(self._pad(r), ensure_ascii=False)) for r in rows],
+        )
+
+    def append_rows(self, rows):
+        if not rows:
+            return
+        conn = self._conn()
+        with self._write_lock, conn:
+            self._insert(conn, rows)
+
+    def get_range(self, start_row, end_row):
+        if end_row < start_row:
+            return []
+        cur = self._conn().execute(
+            "SELECT cells FROM sheet_rows ORDER BY id LIMIT ? OFFSET ?",
+            (end_row - start_row + 1, max(start_row - 1, 0)),
+        )
+        return [json.loads(cells) for (cells,) in cur]
+
+    def get_rows_from(self, start_row):
+        cur = self._conn().execute(
+            "SELECT cells FROM sheet_rows ORDER BY id LIMIT -1 OFFSET ?", (max(start_row - 1, 0),)
+        )
+        return [json.loads(cells) for (cells,) in cur]
+
+    def col_values(self, col):
+        return [json.loads(cells)[col - 1] for (cells,) in self._conn().execute("SELECT cells FROM sheet_rows ORDER BY id")]
+
+    def count_rows(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sheet_rows").fetchone()[0]
+
+    def upsert_student(self, student_id, rows):
+        conn = self._conn()
+        with self._write_lock, conn:
+            deleted = conn.execute("DELETE FROM sheet_rows WHERE student_id = ?", (str(student_id),)).rowcount
+            self._insert(conn, rows)
+        return deleted, len(rows)
+
+    def write_cells(self, updates):
+        if not updates:
+            return
+        conn = self._conn()
+        with self._write_lock, conn:
+            ids = [row_id for (row_id,) in conn.execute("SELECT id FROM sheet_rows ORDER BY id")]
+            max_row = max(row for row, _, _ in updates)
+            if max_row > len(ids):
+                self._insert(conn, [[]] * (max_row - len(ids)))
+                ids = [row_id for (row_id,) in conn.execute("SELECT id FROM sheet_rows ORDER BY id")]
+            for row, col, values in updates:
+                row_id = ids[row - 1]
+                cells = self._pad(json.loads(conn.execute("SELECT cells FROM sheet_rows WHERE id = ?", (row_id,)).fetchone()[0]))
+                cells[col - 1:col - 1 + len(values)] = [_as_cell(v) for v in values]
+                conn.execute(
+                    "UPDATE sheet_rows SET student_id = ?, cells = ? WHERE id = ?",
+                    (cells[STUDENT_ID_COLUMN - 1] or None, json.dumps(cells, ensure_ascii=False), row_id),
+                )
+
+    def ensure_rows(self, row_count):
+        pass  # SQLite는 격자 크기 제한이 없습니다. (write_cells가 필요한 행을 만듦)
+
+
+# --- 저장소 선택 ---
+def default_storage_url():
+    """COURSE_STORAGE_URL 환경변수, 없으면 기본 스프레드시트의 저장소 URL을 반환합니다."""
+    return os.environ.get("COURSE_STORAGE_URL") or f"gsheets://{DEFAULT_SPREADSHEET_ID}/{DEFAULT_WORKSHEET_NAME}"
+
+
+def storage_format(url):
+    """저장소 URL의 ?format= 값(long 또는 compact)을 반환합니다."""
+    query = url.partition("?")[2]
+    storage_fmt = parse_qs(query).get("format", [FORMAT_LONG])[0]
+    if storage_fmt not in SHEET_HEADERS:
+        raise ValueError(f"지원하지 않는 제출 행 형식입니다: {storage_fmt}")
+    return storage_fmt
+
+
+def open_storage(url, creds_dict=None, priority=rate_limit.PRIORITY_INTERACTIVE):
+    """저장소 URL로 백엔드를 엽니다.
+
+    - sqlite:///경로/파일.db 또는 sqlite:파일.db  → SQLiteStorage
+    - gsheets://<스프레드시트 ID>/<워크시트 이름>  → GspreadStorage (creds_dict 필요)
+    뒤에 ?format=compact를 붙이면 학생당 한 행 형식의 저장소를 엽니다.
+    priority는 gsheets 저장소가 속도 제한기에서 토큰을 기다릴 때의 우선순위입니다. (rate_limit.PRIORITY_*)
+    """
+    header = SHEET_HEADERS[storage_format(url)]
+    url = url.partition("?")[0]
+    if url.startswith("sqlite:"):
+        path = url[len("sqlite:"):]
+        if path.startswith("///"):
+            path = path[2:]
+        elif path.startswith("//"):
+            path = path[2:]
+        return SQLiteStorage(path, header)
+    if url.startswith("gsheets://"):
+        spreadsheet_id, _, worksheet_name = url[len("gsheets://"):].partition("/")
+        if creds_dict is None:
+            raise ValueError("gsheets 저장소에는 서비스 계정 정보(creds_dict)가 필요합니다.")
+        return GspreadStorage.from_service_account(creds_dict, spreadsheet_id, worksheet_name or "Sheet1", header, priority)
+    raise ValueError(f"지원하지 않는 저장소 URL입니다: {url}")
+
+
+def warm_up_storage(url, creds_dict=None):
+    """gsheets 저장소이면 백그라운드에서 인증과 워크시트 열기를 미리 시작합니다. (그 밖에는 아무것도 하지 않음)"""
+    url_path = url.partition("?")[0]
+    if url_path.startswith("gsheets://") and creds_dict is not None:
+        spreadsheet_id, _, worksheet_name = url_path[len("gsheets://"):].partition("/")
+        get_client_manager(creds_dict).warm_up(spreadsheet_id, worksheet_name or "Sheet1", SHEET_HEADERS[storage_format(url)])
+
+
+def _load_creds(creds_path):
+    if not creds_path:
+        return None
+    with open(creds_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def open_storage_for_cli(url, creds_path=None):
+    """명령줄 도구용: 서비스 계정 키 파일 경로(선택)로 저장소를 엽니다. (관리자 읽기 우선순위)"""
+    return open_storage(url, _load_creds(creds_path), rate_limit.PRIORITY_ADMIN)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="제출 저장소 관리 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate-header", help="Catalog Version/Submission ID 열이 없는 이전 long 형식 저장소를 새 형식으로 옮기기")
+    migrate.add_argument("--storage", default=os.environ.get("COURSE_STORAGE_URL"), required=not os.environ.get("COURSE_STORAGE_URL"),
+                         help="저장소 URL, 기본값: COURSE_STORAGE_URL")
+    migrate.add_argument("--creds", help="Google 서비스 계정 키(JSON) 파일 경로 (gsheets 사용 시)")
+    args = parser.parse_args(argv)
+
+    url_path = args.storage.partition("?")[0]
+    if url_path.startswith("gsheets://"):
+        spreadsheet_id, _, worksheet_name = url_path[len("gsheets://"):].partition("/")
+        storage = GspreadStorage.from_service_account(
+            _load_creds(args.creds), spreadsheet_id, worksheet_name or "Sheet1", SHEET_HEADERS[storage_format(args.storage)],
+            rate_limit.PRIORITY_ADMIN, check_header=False)
+        migrated = storage.migrate_legacy_header()
+    else:
+        open_storage(args.storage)  # SQLite는 열 때 옮깁니다.
+        migrated = None
+    print({True: "Catalog Version 열을 추가했습니다.", False: "이미 새 형식입니다.",
+           None: "저장소를 열었습니다. (이전 형식이었다면 새 형식으로 옮겼습니다)"}[migrated], file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,242 +1,129 @@
 # streamlit_app.py
 import streamlit as st
-import gspread
-from google.oauth2.service_account import Credentials
 from datetime import datetime
+import contextlib
+import html
 import json # courses.json 로드용
-from fpdf import FPDF, XPos, YPos # XPos, YPos 임포트 (DeprecationWarning 해결용)
 import os
+import uuid
+from catalog import get_catalog_watcher, semester_key_of, YEARS, SEMESTERS
+# 미술/음악·국영수 과목 ID, 학기별 필요 학점 등 규칙 상수는 validation.py에서 관리합니다.
+from validation import get_rule_engine, REQUIRED_TOTAL_HOURS_MAP
+from submission_queue import SubmissionQueue, QueueFlusher, STATUS_DONE
+from storage import default_storage_url, open_storage, storage_format, submission_rows, warm_up_storage, FORMAT_COMPACT
+from record_codec import compact_row
+from pdf_utils import check_fonts, cached_pdf, get_or_render_pdf, publish_pdf, PDF_LINKS
+from seats import SeatLedger
+from recommend import get_recommender
+from feasibility import get_feasibility_table
+import metrics
+import rate_limit
 
 # --- 0. 설정값 및 상수 ---
 COURSES_JSON_PATH = 'courses.json' # Streamlit 앱과 같은 경로에 courses.json 파일이 있어야 함
-MANDATORY_GROUP_NAME = "학교지정"
-
-# 미술/음악, 국영수 관련 과목 ID (courses.json의 ID와 일치해야 함)
-ART_MUSIC_COURSE_IDS = ["c19", "c20", "c40", "c41", "c55", "c56", "c82", "c83"]
-KES_MAX_COURSE_IDS = ["c34", "c57", "c58", "c59", "c60", "c84", "c85"]
-EXACT_ART_MUSIC_SELECTION = 2
-MAX_KES_SELECTION = 3
-
-# 학년별, 학기별 필요 총 학점
-REQUIRED_TOTAL_HOURS_MAP = {
-    "Y2S1": 29, "Y2S2": 29,
-    "Y3S1": 29, "Y3S2": 29
-}
-
-
-try:
-    # st.secrets에서 google_sheets 섹션 전체를 가져옵니다.
-    creds_dict_original = st.secrets["google_sheets"]
-    # 수정 가능하도록 .to_dict() 또는 deepcopy 사용 (st.secrets는 불변일 수 있음)
-    creds_dict = creds_dict_original.to_dict()
-
-    SPREADSHEET_NAME = "수강신청결과"
-    WORKSHEET_NAME = "Sheet1" # 예: CourseSubmissions (선택 사항, 없으면 기본값 사용)
-    spreadsheet_id ="1veluylbgXdoQ1ZUz7_SnCByUS3PQPJPU1HpDKO2YEGE"
-
-except KeyError as e:
-    st.error(f"Streamlit Secrets 설정 오류: '{e}' 키를 찾을 수 없습니다. Secrets 설정을 확인해주세요.")
-    st.caption("Secrets에는 `google_sheets` 섹션이 반드시 포함되어야 합니다.")
-    st.stop()
-
-@st.cache_resource(ttl=600) # 10분 동안 인증 객체 캐싱
-def get_gspread_client():
-    """Google Sheets API 클라이언트를 반환합니다."""
-    try:
-        creds = Credentials.from_service_account_info(
-        creds_dict,
-        scopes=[
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive.file'
-        ]
-    )
-        client = gspread.authorize(creds)
-        st.success("Google Sheets 인증 성공!")
-        return client
-    except Exception as e:
-        st.error(f"Google Sheets 인증 중 오류 발생: {e}")
-        return None
 
-@st.cache_resource(ttl=600) # 클라이언트를 인자로 받도록 수정
-def get_worksheet(_client): # 파라미터 이름 변경하여 내부 변수와 충돌 방지
-    if not _client:
-        return None
-    try:
-        # spreadsheet = _client.open(SPREADSHEET_NAME)
-        spreadsheet = _client.open_by_key(spreadsheet_id)
-        try:
-            worksheet = spreadsheet.worksheet(WORKSHEET_NAME)
-        except gspread.exceptions.WorksheetNotFound:
-            worksheet = spreadsheet.add_worksheet(title=WORKSHEET_NAME, rows="100", cols="10")
-            header = ["Timestamp", "Student Name", "Student ID", "Course ID", "Course Name", "Year", "Semester", "Hours"]
-            worksheet.append_row(header)
-            st.info(f"워크시트 '{WORKSHEET_NAME}'을(를) 새로 만들고 헤더를 추가했습니다.")
-        return worksheet
-    except Exception as e:
-        st.error(f"Google Spreadsheet ('{SPREADSHEET_NAME}') 또는 Worksheet ('{WORKSHEET_NAME}') 접근 중 오류: {e}")
-        return None
 
-# --- 2. 과목 데이터 로드 및 처리 함수 ---
-@st.cache_data # 과목 데이터는 변경되지 않으므로 캐싱
+# 제출 저장소. COURSE_STORAGE_URL 환경변수로 바꿀 수 있습니다. (예: sqlite:///tmp/registrations.db)
+# 지정하지 않으면 Google Sheets(수강신청결과 스프레드시트)를 사용합니다.
+STORAGE_URL = default_storage_url()
+
+# 제출 큐 파일 (제출은 여기에 먼저 기록된 뒤 백그라운드에서 저장소로 옮겨집니다)
+SUBMISSION_QUEUE_PATH = os.environ.get("SUBMISSION_QUEUE_PATH", "submission_queue.sqlite3")
+
+# 정원(capacity)이 있는 과목의 좌석 예약 장부 파일과 남은 좌석 표시 갱신 주기(초)
+SEAT_LEDGER_PATH = os.environ.get("SEAT_LEDGER_PATH", "seat_ledger.sqlite3")
+SEAT_REFRESH_SECONDS = 10
+
+creds_dict = None
+if STORAGE_URL.startswith("gsheets://"):
+    try:
+        # st.secrets에서 google_sheets 섹션 전체를 가져옵니다.
+        creds_dict_original = st.secrets["google_sheets"]
+        # 수정 가능하도록 .to_dict() 또는 deepcopy 사용 (st.secrets는 불변일 수 있음)
+        creds_dict = creds_dict_original.to_dict()
+    except KeyError as e:
+        st.error(f"Streamlit Secrets 설정 오류: '{e}' 키를 찾을 수 없습니다. Secrets 설정을 확인해주세요.")
+        st.caption("Secrets에는 `google_sheets` 섹션이 반드시 포함되어야 합니다.")
+        st.stop()
+    # 첫 제출이 인증과 TLS 연결을 기다리지 않도록 백그라운드에서 미리 준비합니다. (프로세스당 한 번)
+    warm_up_storage(STORAGE_URL, creds_dict)
+
+
+@st.cache_resource # 프로세스당 큐와 플러셔 하나만 사용
+def get_submission_queue():
+    """제출 큐를 열고 저장소로 옮기는 백그라운드 플러셔를 시작합니다."""
+    queue = SubmissionQueue(SUBMISSION_QUEUE_PATH)
+    sink_cache = {}
+
+    def get_sink():
+        # 플러셔 스레드 전용 저장소 연결 (토큰 갱신과 연결 재사용은 google_client 관리자가 담당)
+        # 제출 기록은 속도 제한기에서 다른 Sheets 호출보다 먼저 토큰을 받습니다.
+        if 'storage' not in sink_cache:
+            sink_cache['storage'] = open_storage(STORAGE_URL, creds_dict, rate_limit.PRIORITY_SUBMIT)
+        return sink_cache['storage']
+
+    flusher = QueueFlusher(queue, get_sink)
+    flusher.start()
+    return queue, flusher
+
+@st.cache_resource # 카탈로그 버전별로 좌석 장부의 정원을 한 번만 맞춤
+def get_seat_ledger(catalog_version, capacities):
+    ledger = SeatLedger(SEAT_LEDGER_PATH)
+    ledger.sync_capacities(dict(capacities))
+    return ledger
+
+# --- 2. 과목 데이터 로드 ---
 def load_courses():
+    """이 세션이 사용할 Catalog를 반환합니다.
+
+    courses.json이 바뀌면 감시 스레드가 새 버전을 만들어 두고, 새 세션은 곧바로 새 버전을 씁니다.
+    진행 중인 세션은 제출할 때까지 처음 받은 버전에 고정되며, 버전 교체가 실행을 막지 않습니다.
+    """
     try:
-        with open(COURSES_JSON_PATH, 'r', encoding='utf-8') as f:
-            all_courses_list = json.load(f)
-        # 리스트를 ID를 키로 하는 딕셔너리로 변환하여 접근 용이하게 함
-        all_courses_dict = {course['id']: course for course in all_courses_list}
-        return all_courses_list, all_courses_dict
+        watcher = get_catalog_watcher(COURSES_JSON_PATH)
     except FileNotFoundError:
         st.error(f"과목 정보 파일({COURSES_JSON_PATH})을 찾을 수 없습니다.")
-        return [], {}
+        return None
     except json.JSONDecodeError:
         st.error(f"과목 정보 파일({COURSES_JSON_PATH})의 형식이 올바르지 않습니다.")
-        return [], {}
-
-def get_courses_by_year_semester(all_courses_list, year, semester):
-    return [c for c in all_courses_list if c['year'] == year and c['semester'] == semester]
-
-def group_courses(courses_for_semester):
-    grouped = {}
-    for course in courses_for_semester:
-        group_name = course['group']
-        if group_name not in grouped:
-            is_mandatory_group = (group_name == MANDATORY_GROUP_NAME)
-            grouped[group_name] = {
-                'courses': [],
-                'quota': 0 if is_mandatory_group else course.get('groupQuota', 0), # groupQuota가 없을 수 있으므로 get 사용
-                'isMandatory': is_mandatory_group,
-            }
-        grouped[group_name]['courses'].append(course)
-    # 그룹 이름 정렬 (학교지정 우선, 그 외 가나다 순)
-    sorted_group_names = sorted(
-        grouped.keys(),
-        key=lambda g: (grouped[g]['isMandatory'], g) if grouped[g]['isMandatory'] else (False, g)
-    )
-    return {name: grouped[name] for name in sorted_group_names}
-
-
-# --- PDF 클래스 정의 (중복 정의 제거, 하나만 남김) ---
-class PDF(FPDF):
-    def __init__(self, orientation='P', unit='mm', format='A4'):
-        super().__init__(orientation, unit, format)
-        self._font_warning_shown = False
-        self._font_loaded_successfully = False
-        self._load_fonts()
-
-    def _load_fonts(self):
-        try:
-            current_script_dir = os.path.dirname(os.path.abspath(__file__))
-            
-            font_regular_name = 'NanumSquare_acR.ttf' # << 실제 일반 폰트 파일명
-            font_regular_path = os.path.join(current_script_dir, font_regular_name)
-
-            font_bold_name = 'NanumSquare_acB.ttf'    # << 실제 볼드 폰트 파일명
-            font_bold_path = os.path.join(current_script_dir, font_bold_name)
-
-            if not os.path.exists(font_regular_path):
-                st.warning(f"PDF 경고: 일반 폰트 파일 '{font_regular_name}' ({font_regular_path}) 없음.")
-                raise FileNotFoundError(f"Regular font file not found: {font_regular_path}")
-            
-            if not os.path.exists(font_bold_path):
-                st.warning(f"PDF 경고: 볼드 폰트 파일 '{font_bold_name}' ({font_bold_path}) 없음.")
-                raise FileNotFoundError(f"Bold font file not found: {font_bold_path}")
-
-            self.add_font('NanumSquare_acR', '', font_regular_path)
-            self.add_font('NanumSquare_acR', 'B', font_bold_path)
-            
-            self._font_loaded_successfully = True
-            if hasattr(self, '_font_warning_shown'): delattr(self, '_font_warning_shown')
-
-        except (FileNotFoundError, RuntimeError) as e:
-            if not self._font_warning_shown:
-                st.error(f"PDF 폰트 로드 실패 ({type(e).__name__}: {e}). Arial 사용. 한글 깨짐 발생 가능.")
-                self._font_warning_shown = True
-            self._font_loaded_successfully = False
-
-    def _set_font_with_fallback(self, family, style='', size=10):
-        if self._font_loaded_successfully and family == 'NanumSquare_acR':
-            try:
-                self.set_font(family, style, size)
-            except RuntimeError: # 스타일 못 찾는 경우 등
-                self.set_font('Arial', style, size)
-        else:
-            self.set_font('Arial', style, size)
-
-    def header(self):
-        self._set_font_with_fallback('NanumSquare_acR', '', 12)
-        self.cell(0, 10, '수강신청 내역서', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
-        self.ln(5)
-
-    def footer(self):
-        self.set_y(-15)
-        self._set_font_with_fallback('NanumSquare_acR', '', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
-
-
-    def chapter_title(self, title):
-        self._set_font_with_fallback('NanumSquare_acR', 'B', 12) # 볼드체 사용
-        self.cell(0, 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
-        self.ln(2)
-
-    def chapter_body(self, data_list):
-        self._set_font_with_fallback('NanumSquare_acR', '', 10)
-        # ... (이전과 동일하게, new_x, new_y 사용)
-        col_widths = [self.w - self.l_margin - self.r_margin - 20, 20]
-        self.set_fill_color(200, 220, 255)
-        self.cell(col_widths[0], 7, "과목명", border=1, new_x=XPos.RIGHT, new_y=YPos.TOP, align='C', fill=True)
-        self.cell(col_widths[1], 7, "학점", border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C', fill=True)
-
-        total_hours_semester = 0
-        for item_name, item_hours in data_list:
-            self.cell(col_widths[0], 6, str(item_name), border=1, new_x=XPos.RIGHT, new_y=YPos.TOP)
-            self.cell(col_widths[1], 6, str(item_hours), border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
-            total_hours_semester += item_hours
-        
-        current_font_family = self.font_family
-        current_font_style = self.font_style
-        current_font_size = self.font_size # 현재 폰트 상태 저장
-        
-        self._set_font_with_fallback('NanumSquare_acR', '', 10) # 스타일 변경 없어도 혹시 모르니 호출
-        self.cell(col_widths[0], 7, "학기 총 학점:", border=1, new_x=XPos.RIGHT, new_y=YPos.TOP, align='R')
-        self.cell(col_widths[1], 7, str(total_hours_semester), border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
-        
-        self.set_font(current_font_family, current_font_style, current_font_size) # 이전 폰트 상태 복원
-        return total_hours_semester
-
-
-# --- generate_pdf_bytes 함수 (중복 정의 제거, 하나만 남김) ---
-def generate_pdf_bytes(student_name, student_id, selected_courses_details_by_semester):
-    pdf = PDF() # 생성 시 _load_fonts 자동 호출
-    pdf.add_page()
-    
-    pdf._set_font_with_fallback('NanumSquare_acR', '', 11) # 기본 폰트 설정
-
-    # DeprecationWarning 해결: cell의 ln 파라미터 대신 new_x, new_y 사용
-    pdf.cell(0, 10, f"학생 이름: {student_name}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-    pdf.cell(0, 10, f"학번: {student_id}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-    pdf.ln(5)
-
-    overall_total_hours = 0
-    for semester_key, courses in selected_courses_details_by_semester.items():
-        year, semester = int(semester_key[1]), int(semester_key[3])
-        if courses:
-            pdf.chapter_title(f"{year}학년 {semester}학기 선택과목")
-            semester_data = [(c['name'], c['hours']) for c in courses]
-            overall_total_hours += pdf.chapter_body(semester_data)
-            pdf.ln(5)
-    
-    pdf.ln(5)
-    pdf._set_font_with_fallback('NanumSquare_acR', 'B', 11) # 볼드체 설정
-    pdf.cell(0, 10, f"전체 총 선택 학점: {overall_total_hours}", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='R')
-
-    # latin-1 인코딩은 한글 포함 시 문제를 일으킬 수 있으므로, dest='S'로 바이트 스트림만 얻습니다.
-    # Streamlit의 download_button은 바이트 데이터를 직접 처리합니다.
-    return pdf.output(dest='S')
+        return None
+
+    pinned = watcher.get(st.session_state.get('catalog_version'))
+    latest = watcher.current
+    if pinned is latest or (pinned is not None and not st.session_state.get('catalog_unpinned')):
+        return pinned
+    # 새 세션이거나, 제출 후 새 버전이 나온 세션: 최신 버전으로 고정합니다.
+    st.session_state.catalog_unpinned = False
+    previous_selection = st.session_state.get('selected_courses')
+    if previous_selection is not None:
+        # 새 버전에도 있는 과목만 선택을 이어가고, 체크박스 상태는 새 버전 기준으로 다시 그립니다.
+        selection = latest.initial_selection()
+        for ids in previous_selection.values():
+            for cid in ids:
+                course = latest.by_id.get(cid)
+                if course is not None:
+                    selection.setdefault(semester_key_of(course), set()).add(cid)
+        for key in [k for k in st.session_state.keys() if str(k).startswith("cb_")]:
+            del st.session_state[key]
+        st.session_state.selected_courses = selection
+    st.session_state.catalog_version = latest.version
+    return latest
+
 
 # --- 4. Streamlit UI 및 로직 ---
 st.set_page_config(page_title="수강신청 시스템 (정현고)", layout="wide")
 st.title("📋 수강신청 시스템 (2025학년도 입학생 대상)")
 
+# 실행 시간 지표 (COURSE_METRICS_* 환경변수로 켬, 꺼져 있으면 아무것도 하지 않음)
+metrics.start_exporters()
+metrics.start_collecting()
+metrics.inc("reruns_total")
+
+# PDF 폰트는 프로세스당 한 번만 확인/파싱합니다. (문서마다 다시 읽지 않음)
+fonts_ok, font_error = check_fonts()
+if not fonts_ok:
+    st.error(f"PDF 폰트 로드 실패 ({font_error}). Arial 사용. 한글 깨짐 발생 가능.")
+
 # 헤더 공지사항 등
 st.markdown("""
 <div style="background-color:#fff3cd; padding:15px; border-radius:5px; margin-bottom:20px;">
@@ -258,251 +145,362 @@ with col2:
     student_id_input = st.text_input("학번", key="student_id", placeholder="예: 2025001")
 
 # --- 과목 데이터 로드 ---
-all_courses_list, all_courses_dict = load_courses()
-if not all_courses_list:
+with metrics.span("load_courses"):
+    catalog = load_courses()
+if not catalog:
     st.stop() # 과목 데이터 없으면 진행 불가
+all_courses_dict = catalog.by_id
+if catalog.version != get_catalog_watcher(COURSES_JSON_PATH).current.version:
+    st.info("과목 정보가 갱신되었습니다. 지금 선택은 처음 접속한 시점의 과목 정보로 검사되며, 제출 후 새 과목 정보가 적용됩니다.")
+rule_engine = get_rule_engine(catalog)
+# 정원이 있는 과목이 없으면 좌석 예약을 사용하지 않습니다.
+seat_ledger = get_seat_ledger(catalog.version, tuple(catalog.capacities.items())) if catalog.capacities else None
 
 
 # --- 세션 상태 초기화 (최초 실행 시 또는 학년/학기 변경 시) ---
 if 'selected_courses' not in st.session_state:
-    st.session_state.selected_courses = {} # 학기별 선택 과목 ID 저장 (예: {'Y2S1': set(), 'Y2S2': set()})
-    # 학교지정 과목 자동 선택
-    for course in all_courses_list:
-        if course.get('mandatory', False):
-            semester_key = f"Y{course['year']}S{course['semester']}"
-            if semester_key not in st.session_state.selected_courses:
-                st.session_state.selected_courses[semester_key] = set()
-            st.session_state.selected_courses[semester_key].add(course['id'])
+    # 학기별 선택 과목 ID 저장 (예: {'Y2S1': set(), 'Y2S2': set()}), 학교지정 과목 자동 선택
+    st.session_state.selected_courses = catalog.initial_selection()
+if 'seat_holder' not in st.session_state:
+    st.session_state.seat_holder = uuid.uuid4().hex  # 임시 좌석의 주인(세션) 구분용
+
+if seat_ledger is not None:
+    seat_ledger.touch(st.session_state.seat_holder)  # 세션이 살아 있는 동안 임시 좌석 유지
+    # 제출 시 좌석을 확정하지 못한 과목은 위젯이 그려지기 전에 선택 해제합니다.
+    for semester_key, course_id in st.session_state.pop('seat_conflicts', []):
+        st.session_state.selected_courses.get(semester_key, set()).discard(course_id)
+        st.session_state[f"cb_{semester_key}_{course_id}"] = False
+
+
+# --- 선택 상태 및 검사 도우미 ---
+# 체크박스 하나를 바꾸면 해당 학기 패널(fragment)만 다시 실행됩니다.
+# 전체 요약이 달라질 때에만 앱 전체를 다시 실행해 요약/제출 영역을 갱신합니다.
+def _on_course_toggle(semester_key, course_id):
+    """체크박스 on_change 콜백: 해당 학기의 선택 집합만 갱신합니다."""
+    selected = st.session_state.selected_courses.setdefault(semester_key, set())
+    checkbox_key = f"cb_{semester_key}_{course_id}"
+    if st.session_state[checkbox_key]:
+        if seat_ledger is not None and course_id in catalog.capacities and not seat_ledger.reserve(
+                course_id, st.session_state.seat_holder, st.session_state.get("student_id")):
+            st.session_state[checkbox_key] = False
+            st.session_state.setdefault('seat_messages', {})[semester_key] = (
+                f"'{all_courses_dict[course_id]['name']}' 과목은 정원이 모두 찼습니다.")
+            return
+        selected.add(course_id)
+    else:
+        selected.discard(course_id)
+        if seat_ledger is not None and course_id in catalog.capacities:
+            seat_ledger.release(course_id, st.session_state.seat_holder)
+
+
+def _apply_recommendation(course_ids):
+    """추천 적용 버튼 콜백: 선택 상태와 체크박스 상태를 추천 결과로 바꿉니다."""
+    holder = st.session_state.seat_holder
+    previous = get_all_selected_ids()
+    selection = catalog.initial_selection()
+    seat_full = []
+    for cid in course_ids:
+        if seat_ledger is not None and cid in catalog.capacities and cid not in previous and not seat_ledger.reserve(
+                cid, holder, st.session_state.get("student_id")):
+            seat_full.append(all_courses_dict[cid]['name'])
+            continue
+        selection[semester_key_of(all_courses_dict[cid])].add(cid)
+    if seat_ledger is not None:
+        for cid in previous - set(course_ids):
+            if cid in catalog.capacities:
+                seat_ledger.release(cid, holder)
+    st.session_state.selected_courses = selection
+    for course in catalog.courses:
+        semester_key = semester_key_of(course)
+        st.session_state[f"cb_{semester_key}_{course['id']}"] = course['id'] in selection[semester_key]
+    st.session_state.show_recommendations = False
+    st.session_state.recommendation_applied = True
+    if seat_full:
+        st.session_state.submit_error = f"정원이 차서 추천에서 빠진 과목이 있습니다: {', '.join(seat_full)}"
+
+
+def get_all_selected_ids():
+    all_ids = set()
+    for id_set in st.session_state.selected_courses.values():
+        all_ids.update(id_set)
+    return all_ids
+
+
+def compute_summary():
+    """전체 검사 결과와, 요약 영역이 다시 그려져야 하는지 판단할 서명을 반환합니다."""
+    with metrics.span("validate_overall"):
+        result = rule_engine.validate(st.session_state.selected_courses)
+    signature = (
+        tuple(result['overall']['messages']),
+        tuple(r['isValid'] for r in result['semesters'].values()),
+    )
+    return result, signature
 
 
 # --- 과목 선택 UI (학년별/학기별 탭 또는 expander 사용) ---
 st.header("2. 과목 선택")
 
-YEARS = [2, 3]
-SEMESTERS = [1, 2]
+for semester_key in catalog.semester_keys:
+    st.session_state.selected_courses.setdefault(semester_key, set())
 
-# 전체 선택된 과목 ID Set (유효성 검사용)
-current_all_selected_ids = set()
-for sem_key in st.session_state.selected_courses:
-    current_all_selected_ids.update(st.session_state.selected_courses[sem_key])
+# 전체 실행 시점의 요약 서명을 먼저 기록해 둡니다. (fragment 재실행 시 비교 기준)
+_, st.session_state.summary_signature = compute_summary()
 
 
-tabs = st.tabs([f"{y}학년 {s}학기" for y in YEARS for s in SEMESTERS])
-tab_idx = 0
+# 남은 좌석 수만 주기적으로 다시 그립니다. (학기 패널은 체크박스를 바꿀 때만 다시 실행)
+@st.fragment(run_every=SEAT_REFRESH_SECONDS)
+def render_seat_status():
+    remaining_seats = seat_ledger.remaining()
+    with st.expander(f"🪑 정원 과목 잔여 좌석 ({SEAT_REFRESH_SECONDS}초마다 갱신)", expanded=False):
+        st.dataframe(
+            [{'학기': f"{course['year']}학년 {course['semester']}학기", '과목': course['name'],
+              '잔여 좌석': f"{remaining_seats.get(course['id'], 0)}/{capacity}"}
+             for course, capacity in ((all_courses_dict[cid], cap) for cid, cap in catalog.capacities.items())],
+            hide_index=True, use_container_width=True,
+        )
+
 
-validation_results_all_semesters = {}
-total_hours_all_semesters = {}
+@st.fragment
+def render_semester_panel(year_val, semester_val):
+    semester_key = f"Y{year_val}S{semester_val}"
+    st.subheader(f"{year_val}학년 {semester_val}학기 선택")
+    remaining_seats = seat_ledger.remaining() if seat_ledger is not None else {}
+    seat_message = st.session_state.get('seat_messages', {}).pop(semester_key, None)
+    if seat_message:
+        st.warning(seat_message)
+
+    selected_in_semester_ids = st.session_state.selected_courses[semester_key]
+    required_hours_sem = REQUIRED_TOTAL_HOURS_MAP[semester_key]
+    # 선택하지 않은 과목마다 "선택하면 조건을 맞출 수 없음" 여부 (미리 계산한 표로 과목당 상수 시간)
+    dead_ends = get_feasibility_table(catalog).hints(st.session_state.selected_courses, semester_key)
+
+    # 유효성 검사 메시지 표시 영역
+    semester_validation_messages_placeholder = st.empty()
+    semester_summary_placeholder = st.empty()
+
+    for group_name, group_data in catalog.groups(semester_key).items():
+        with st.expander(f"{group_name}" + (f" ({group_data['quota']}개 선택)" if not group_data['isMandatory'] and group_data['quota'] > 0 else ""), expanded=True):
+            for course in group_data['courses']: # 카탈로그에서 과목명 가나다순으로 미리 정렬됨
+                course_id = course['id']
+                is_mandatory_course = course.get('mandatory', False)
+                # 학교지정 과목은 항상 선택됨 & 비활성화
+                # 주의: Streamlit 위젯의 key는 고유해야 함
+                label = f"{course['name']} ({course['hours']}학점)"
+                is_full = False
+                if course_id in remaining_seats:
+                    # 실시간 잔여 좌석은 render_seat_status에 표시하고, 여기서는 정원과 마감 여부만 보여 줍니다.
+                    is_full = remaining_seats[course_id] == 0 and course_id not in selected_in_semester_ids
+                    label += f" · 정원 {catalog.capacities[course_id]}석" + (" (마감)" if is_full else "")
+                dead_end = dead_ends.get(course_id)
+                if dead_end:
+                    label = "⚠️ " + label
+                st.checkbox(
+                    label,
+                    value=course_id in selected_in_semester_ids,
+                    key=f"cb_{semester_key}_{course_id}",
+                    disabled=is_mandatory_course or is_full,
+                    on_change=_on_course_toggle, args=(semester_key, course_id),
+                    help="학교지정 과목은 변경할 수 없습니다." if is_mandatory_course
+                    else f"선택하면 조건을 맞출 수 없습니다: {dead_end}" if dead_end else "",
+                )
+
+    # --- 학기별 유효성 검사 (validation.RuleEngine 사용) ---
+    with metrics.span("validate_semester", semester_key):
+        semester_result = rule_engine.validate_semester(semester_key, rule_engine.to_mask(selected_in_semester_ids))
+
+    # 유효성 검사 메시지 업데이트
+    with semester_validation_messages_placeholder.container():
+        if semester_result['isValid']:
+            st.success(f"{year_val}학년 {semester_val}학기 선택 조건 충족!")
+        for msg in semester_result['messages']:
+            if "❌" in msg: st.error(msg)
+            elif "✅" in msg : st.info(msg) # 성공/정보 메시지는 info로
+    semester_summary_placeholder.info(f"현재 선택 학점: {semester_result['hours']} / {required_hours_sem}")
+
+    # 이 학기 변경으로 전체 요약(미술/음악, 국영수, 중복, 학기별 충족 여부)이 바뀌었으면 앱 전체 재실행
+    _, signature = compute_summary()
+    if signature != st.session_state.summary_signature:
+        st.rerun()
+
+
+if seat_ledger is not None:
+    render_seat_status()
 
+tabs = st.tabs([f"{y}학년 {s}학기" for y in YEARS for s in SEMESTERS])
+tab_idx = 0
 for year_val in YEARS:
     for semester_val in SEMESTERS:
-        with tabs[tab_idx]:
-            semester_key = f"Y{year_val}S{semester_val}"
-            st.subheader(f"{year_val}학년 {semester_val}학기 선택")
-
-            courses_this_semester = get_courses_by_year_semester(all_courses_list, year_val, semester_val)
-            grouped_this_semester = group_courses(courses_this_semester)
-
-            if semester_key not in st.session_state.selected_courses:
-                st.session_state.selected_courses[semester_key] = set()
-
-            # 학기별 선택 현황 표시용 변수
-            selected_in_semester_ids = st.session_state.selected_courses[semester_key]
-            current_semester_hours = sum(all_courses_dict[cid]['hours'] for cid in selected_in_semester_ids if cid in all_courses_dict)
-
-            # 유효성 검사 메시지 표시 영역
-            semester_validation_messages_placeholder = st.empty()
-            semester_summary_placeholder = st.empty()
-            semester_summary_placeholder.info(f"현재 선택 학점: {current_semester_hours} / {REQUIRED_TOTAL_HOURS_MAP[semester_key]}")
-
-
-            for group_name, group_data in grouped_this_semester.items():
-                with st.expander(f"{group_name}" + (f" ({group_data['quota']}개 선택)" if not group_data['isMandatory'] and group_data['quota'] > 0 else ""), expanded=True):
-                    for course in sorted(group_data['courses'], key=lambda c: c['name']): # 과목명 가나다순 정렬
-                        course_id = course['id']
-                        label = f"{course['name']} ({course['hours']}학점)"
-                        is_mandatory_course = course.get('mandatory', False)
-                        
-                        # 학교지정 과목은 항상 선택됨 & 비활성화
-                        is_checked = course_id in selected_in_semester_ids
-                        
-                        # UI에서 체크박스 상태 변경 시 selected_courses 업데이트
-                        # 주의: Streamlit 위젯의 key는 고유해야 함
-                        checkbox_key = f"cb_{semester_key}_{course_id}"
-
-                        if st.checkbox(label, value=is_checked, key=checkbox_key, disabled=is_mandatory_course,
-                                       help="학교지정 과목은 변경할 수 없습니다." if is_mandatory_course else ""):
-                            if not is_checked: # 새로 선택된 경우
-                                selected_in_semester_ids.add(course_id)
-                                current_all_selected_ids.add(course_id)
-                        else:
-                            if is_checked and not is_mandatory_course: # 선택 해제된 경우 (필수과목 제외)
-                                selected_in_semester_ids.discard(course_id)
-                                current_all_selected_ids.discard(course_id)
-                        
-                        # 변경 즉시 반영을 위해 session_state에 다시 할당 (Streamlit 1.12+ 에서는 on_change 콜백 권장)
-                        st.session_state.selected_courses[semester_key] = selected_in_semester_ids
-            
-            # --- 학기별 유효성 검사 (간단 버전) ---
-            # (app.js의 validateSelectionsForYearSemester 함수 로직을 Python으로 변환)
-            semester_messages = []
-            semester_is_valid = True
-            
-            # 1. 그룹별 선택 개수
-            for group_name, group_data in grouped_this_semester.items():
-                if not group_data['isMandatory'] and group_data['quota'] > 0:
-                    selected_in_group_count = sum(1 for c in group_data['courses'] if c['id'] in selected_in_semester_ids)
-                    if selected_in_group_count != group_data['quota']:
-                        semester_messages.append(f"❌ '{group_name}' 그룹에서 {group_data['quota']}개를 선택해야 합니다. (현재 {selected_in_group_count}개)")
-                        semester_is_valid = False
-                    else:
-                         semester_messages.append(f"✅ '{group_name}' 그룹 선택 완료 ({selected_in_group_count}/{group_data['quota']}개)")
-
-
-            # 2. 총 학점
-            current_semester_hours_recalc = sum(all_courses_dict[cid]['hours'] for cid in selected_in_semester_ids if cid in all_courses_dict)
-            required_hours_sem = REQUIRED_TOTAL_HOURS_MAP[semester_key]
-            if current_semester_hours_recalc != required_hours_sem:
-                semester_messages.append(f"❌ 총 학점이 정확히 {required_hours_sem}학점이어야 합니다. (현재 {current_semester_hours_recalc}학점)")
-                semester_is_valid = False
-            else:
-                semester_messages.append(f"✅ 총 학점 조건 충족! ({current_semester_hours_recalc}/{required_hours_sem}학점)")
-
-            total_hours_all_semesters[semester_key] = current_semester_hours_recalc
-            validation_results_all_semesters[semester_key] = {'isValid': semester_is_valid, 'messages': semester_messages}
-
-            # 유효성 검사 메시지 업데이트
-            with semester_validation_messages_placeholder.container():
-                if semester_is_valid:
-                    st.success(f"{year_val}학년 {semester_val}학기 선택 조건 충족!")
-                for msg in semester_messages:
-                    if "❌" in msg: st.error(msg)
-                    elif "✅" in msg : st.info(msg) # 성공/정보 메시지는 info로
-            semester_summary_placeholder.info(f"현재 선택 학점: {current_semester_hours_recalc} / {required_hours_sem}")
-
-
+        with tabs[tab_idx], metrics.span("render_semester_panel", f"Y{year_val}S{semester_val}"):
+            render_semester_panel(year_val, semester_val)
         tab_idx += 1
 
 
 # --- 3. 전체 유효성 검사 및 제출 ---
 st.header("3. 최종 확인 및 제출")
-overall_validation_placeholder = st.container() # 전체 유효성 메시지 표시 영역
-
-# 전체 유효성 검사 로직
-all_semesters_valid_flag = all(res['isValid'] for res in validation_results_all_semesters.values())
-overall_messages_list = []
-
-# 1. 미술/음악 과목 수
-selected_art_music_count = sum(1 for cid in current_all_selected_ids if cid in ART_MUSIC_COURSE_IDS)
-art_music_valid = (selected_art_music_count == EXACT_ART_MUSIC_SELECTION)
-if not art_music_valid:
-    overall_messages_list.append(f"❌ 미술/음악 관련 과목 중 정확히 {EXACT_ART_MUSIC_SELECTION}개를 선택해야 합니다. (현재 {selected_art_music_count}개)")
-else:
-    overall_messages_list.append(f"✅ 미술/음악 과목 선택 조건 충족 ({selected_art_music_count}/{EXACT_ART_MUSIC_SELECTION}개)")
-
-
-# 2. 국영수 과목 수
-selected_kes_count = sum(1 for cid in current_all_selected_ids if cid in KES_MAX_COURSE_IDS)
-kes_valid = (selected_kes_count <= MAX_KES_SELECTION)
-if not kes_valid:
-    overall_messages_list.append(f"❌ 지정 국영수 관련 과목 중 {MAX_KES_SELECTION}개 이하로 선택해야 합니다. (현재 {selected_kes_count}개)")
-else:
-    overall_messages_list.append(f"✅ 국영수 과목 선택 조건 충족 (최대 {MAX_KES_SELECTION}개, 현재 {selected_kes_count}개)")
-
-# 3. 중복 과목명 검사 (다른 학기에 동일 과목명 선택 불가 - 기존 app.js 로직과 유사)
-duplicate_course_error = None
-selected_courses_details_all = [all_courses_dict[cid] for cid in current_all_selected_ids if cid in all_courses_dict]
-course_name_semester_map = {}
-for course_detail in selected_courses_details_all:
-    if course_detail['name'] not in course_name_semester_map:
-        course_name_semester_map[course_detail['name']] = set()
-    course_name_semester_map[course_detail['name']].add(course_detail['semester']) # 학기(1 또는 2)만 비교
-
-for course_name, semesters_set in course_name_semester_map.items():
-    if len(semesters_set) > 1: # 같은 과목명이 서로 다른 학기(1학기 vs 2학기)에 선택된 경우
-        selected_offerings = [f"{c['year']}학년 {c['semester']}학기" for c in selected_courses_details_all if c['name'] == course_name]
-        duplicate_course_error = f"❌ 과목 '{course_name}'은(는) 여러 학기에 중복 선택할 수 없습니다. (선택된 시점: {', '.join(selected_offerings)})"
-        overall_messages_list.append(duplicate_course_error)
-        break
-if not duplicate_course_error and selected_courses_details_all : # 중복 없고, 선택과목 있을 때 성공 메시지 (선택적)
-    overall_messages_list.append("✅ 과목명 중복 선택 조건 충족 (동일 과목명을 다른 학기에 선택하지 않음)")
-
-
-# 최종 제출 가능 여부
-can_submit = all_semesters_valid_flag and art_music_valid and kes_valid and not duplicate_course_error and student_name_input and student_id_input
-
-with overall_validation_placeholder:
+
+
+def render_recommendations():
+    """현재 선택에서 가장 적게 바꿔 모든 조건을 만족하는 선택을 최대 3개 보여줍니다."""
+    unavailable = [cid for cid, left in seat_ledger.remaining().items() if left == 0] if seat_ledger is not None else []
+    recommendations = get_recommender(catalog).recommend(st.session_state.selected_courses, unavailable=unavailable)
+    if not recommendations:
+        st.warning("현재 조건으로 완성할 수 있는 선택을 찾지 못했습니다. 선택을 직접 조정해주세요.")
+        return
+
+    def describe(course_ids):
+        return ", ".join(f"{all_courses_dict[cid]['name']}({all_courses_dict[cid]['year']}-{all_courses_dict[cid]['semester']})"
+                         for cid in course_ids)
+
+    for i, rec in enumerate(recommendations, 1):
+        with st.container(border=True):
+            st.markdown(f"**추천 {i}** · 과목 {rec['distance']}개 변경")
+            if rec['add']:
+                st.write(f"➕ 추가: {describe(rec['add'])}")
+            if rec['remove']:
+                st.write(f"➖ 제외: {describe(rec['remove'])}")
+            st.button("이 추천 적용", key=f"apply_recommendation_{i}", on_click=_apply_recommendation, args=(rec['courseIds'],))
+
+
+@st.fragment
+def render_summary_and_submit():
+    # 추천을 적용했으면 학기 패널까지 다시 그려야 하므로 앱 전체를 다시 실행합니다.
+    if st.session_state.pop('recommendation_applied', False):
+        st.rerun()
+    student_name_input = st.session_state.get("student_name", "")
+    student_id_input = st.session_state.get("student_id", "")
+    current_all_selected_ids = get_all_selected_ids()
+
+    # 전체 유효성 검사 로직 (학기별 조건 + 미술/음악 수, 국영수 수, 학기 간 과목명 중복)
+    validation_result, _ = compute_summary()
+    all_semesters_valid_flag = all(res['isValid'] for res in validation_result['semesters'].values())
+    overall_result = validation_result['overall']
+
+    # 최종 제출 가능 여부
+    can_submit = all_semesters_valid_flag and overall_result['isValid'] and student_name_input and student_id_input
+
     if not student_name_input or not student_id_input:
         st.warning("학생 이름과 학번을 먼저 입력해주세요.")
-    
-    for msg in overall_messages_list:
+    if st.session_state.get('submit_error'):
+        st.error(st.session_state.pop('submit_error'))
+
+    for msg in overall_result['messages']:
         if "❌" in msg: st.error(msg)
         elif "✅" in msg: st.success(msg) # 전체 조건 성공은 success로
 
     if not all_semesters_valid_flag:
         st.error("일부 학기의 선택 조건이 충족되지 않았습니다. 각 학기 탭을 확인해주세요.")
 
+    # --- 선택 완성 추천 ---
+    if not (all_semesters_valid_flag and overall_result['isValid']):
+        if st.button("조건에 맞게 선택 완성하기 (추천 보기)"):
+            st.session_state.show_recommendations = True
+        if st.session_state.get('show_recommendations'):
+            render_recommendations()
+
     if can_submit:
         st.success("🎉 모든 수강신청 조건이 충족되었습니다! 아래 버튼으로 제출 및 PDF 다운로드가 가능합니다.")
     else:
         st.error("⚠️ 일부 수강신청 조건이 충족되지 않았습니다. 위의 메시지를 확인하고 수정해주세요.")
 
-
-# --- 제출 버튼 및 PDF 다운로드 버튼 ---
-submit_col, pdf_col = st.columns(2)
-
-with submit_col:
-    if st.button("수강신청 내역 제출", type="primary", disabled=not can_submit, use_container_width=True):
-        gspread_client = get_gspread_client()
-        worksheet = get_worksheet(gspread_client) # client 전달
-        
-        if worksheet and student_name_input and student_id_input:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            rows_to_append = []
-            for cid in current_all_selected_ids:
-                if cid in all_courses_dict:
-                    course = all_courses_dict[cid]
-                    rows_to_append.append([
+    # --- 제출 버튼 및 PDF 다운로드 버튼 ---
+    submit_col, pdf_col = st.columns(2)
+
+    with submit_col:
+        if st.button("수강신청 내역 제출", type="primary", disabled=not can_submit, use_container_width=True):
+            if student_name_input and student_id_input:
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                submitted_ids = sorted((cid for cid in current_all_selected_ids if cid in all_courses_dict), key=catalog.index.get)
+                if storage_format(STORAGE_URL) == FORMAT_COMPACT:
+                    # 학생당 한 행 (카탈로그 버전 + 부호화한 과목 집합)
+                    rows_to_append = [compact_row(timestamp, student_name_input, student_id_input, catalog, submitted_ids)] if submitted_ids else []
+                else:
+                    rows_to_append = submission_rows(
                         timestamp, student_name_input, student_id_input,
-                        course['id'], course['name'], course['year'], course['semester'], course['hours']
-                    ])
-            
-            if rows_to_append:
-                try:
-                    worksheet.append_rows(rows_to_append, value_input_option='USER_ENTERED')
-                    st.success(f"'{student_name_input}' 학생의 수강신청 내역이 Google Sheets에 성공적으로 저장되었습니다!")
+                        [all_courses_dict[cid] for cid in submitted_ids], catalog.version
+                    )
+
+                # 정원 과목은 접수와 함께 좌석을 확정합니다. (하나라도 좌석을 잡지 못하면 접수하지 않고,
+                # 접수가 실패하면 좌석 확정도 커밋하지 않음)
+                seat_failed, submission_id = [], None
+                if rows_to_append:
+                    # Google Sheets에 직접 쓰지 않고 로컬 큐에 접수 → 백그라운드에서 묶어서 기록
+                    try:
+                        queue, flusher = get_submission_queue()
+                        seats = (seat_ledger.confirming(st.session_state.seat_holder, student_id_input, current_all_selected_ids)
+                                 if seat_ledger is not None else contextlib.nullcontext([]))
+                        with seats as seat_failed:
+                            if not seat_failed:
+                                submission_id = queue.enqueue(student_id_input, student_name_input, rows_to_append)
+                    except Exception as e:
+                        st.error(f"수강신청 접수 중 오류: {e}")
+                else:
+                    st.warning("제출할 선택 과목이 없습니다.")
+
+                if seat_failed:
+                    st.session_state.seat_conflicts = [(semester_key_of(all_courses_dict[cid]), cid) for cid in seat_failed]
+                    seat_messages = st.session_state.setdefault('seat_messages', {})
+                    for cid in seat_failed:
+                        seat_messages[semester_key_of(all_courses_dict[cid])] = (
+                            f"'{all_courses_dict[cid]['name']}' 과목의 정원이 차서 접수하지 못했습니다. "
+                            "선택을 해제했으니 다른 과목을 골라 다시 제출해주세요.")
+                    st.session_state.submit_error = "정원이 찬 과목이 있어 접수하지 못했습니다. 각 학기 탭을 확인해주세요."
+                    st.rerun()
+                elif submission_id:
+                    flusher.wake()
+                    metrics.inc("submissions_total")
+                    st.session_state.last_submission_id = submission_id
+                    # 제출했으니 다음 실행부터 최신 과목 정보 버전을 사용합니다.
+                    st.session_state.catalog_unpinned = True
+                    st.success(f"'{student_name_input}' 학생의 수강신청 내역이 접수되었습니다! (접수번호: {submission_id})")
+                    st.caption("접수된 내역은 잠시 후 저장소(Google Sheets)에 자동으로 저장됩니다. 아래에서 저장 여부를 확인할 수 있습니다.")
                     st.balloons()
-                except Exception as e:
-                    st.error(f"Google Sheets 저장 중 오류: {e}")
             else:
-                st.warning("제출할 선택 과목이 없습니다.")
-        elif not student_name_input or not student_id_input:
-            st.error("학생 이름과 학번을 입력해야 제출할 수 있습니다.")
-        else:
-            st.error("Google Sheets 워크시트에 연결할 수 없습니다.")
-
-with pdf_col:
-    selected_courses_details_for_pdf_by_semester = {}
-    for sem_key, id_set in st.session_state.selected_courses.items():
-        selected_courses_details_for_pdf_by_semester[sem_key] = sorted(
-            [all_courses_dict[cid] for cid in id_set if cid in all_courses_dict],
-            key=lambda c: (c.get('mandatory', False), all_courses_dict[c['id']]['group'], c['name']), reverse=True # 학교지정, 그룹명, 과목명 순 정렬
+                st.error("학생 이름과 학번을 입력해야 제출할 수 있습니다.")
+
+        # --- 제출 저장 여부 확인 ---
+        if student_id_input and st.button("제출 저장 여부 확인", use_container_width=True):
+            queue, _ = get_submission_queue()
+            submission_status = queue.latest_for_student(student_id_input)
+            if not submission_status:
+                st.info("이 학번으로 접수된 수강신청 내역이 없습니다.")
+            elif submission_status['status'] == STATUS_DONE:
+                flushed_at = datetime.fromtimestamp(submission_status['flushed_at']).strftime('%Y-%m-%d %H:%M:%S')
+                st.success(f"접수번호 {submission_status['submission_id']}: 저장 완료 ({flushed_at})")
+            else:
+                st.info(f"접수번호 {submission_status['submission_id']}: 저장 대기 중입니다. 잠시 후 다시 확인해주세요.")
+
+    with pdf_col:
+        # PDF는 학생이 요청할 때만 만들어 디스크 저장소에 두고, 바이트 대신 이 세션만 아는 무작위 이름의
+        # 정적 파일 링크(static/pdf)를 보여 줍니다. (download_button은 실행마다 PDF 바이트를 세션 메모리에 올리므로 쓰지 않음)
+        selected_courses = st.session_state.selected_courses
+        pdf_digest = cached_pdf(catalog, student_name_input, student_id_input, selected_courses) if can_submit else None
+        if pdf_digest is None:
+            if st.button("수강신청 내역 PDF 만들기", disabled=not can_submit, use_container_width=True):
+                pdf_digest = get_or_render_pdf(catalog, student_name_input, student_id_input, selected_courses)
+
+        if pdf_digest is not None:
+            pdf_links = st.session_state.setdefault('pdf_links', {})  # 내용 해시 -> 이 세션의 공개 링크 토큰
+            pdf_links[pdf_digest] = publish_pdf(pdf_digest, pdf_links.get(pdf_digest))
+            file_name = f"수강신청_{student_id_input}_{student_name_input}.pdf" if student_name_input and student_id_input else "수강신청_내역.pdf"
+            st.markdown(
+                f'<a href="{PDF_LINKS.url(pdf_links[pdf_digest])}" download="{html.escape(file_name, quote=True)}" '
+                f'style="display:block; text-align:center; padding:0.45rem; border:1px solid #007bff; border-radius:0.5rem; '
+                f'text-decoration:none;">수강신청 내역 PDF 다운로드</a>',
+                unsafe_allow_html=True,
+            )
+
+
+render_summary_and_submit()
+
+if metrics.DEBUG:
+    with st.expander("⏱️ 실행 시간 (디버그)"):
+        st.dataframe(
+            [{'구간': name, '대상': label, '시간(ms)': round(seconds * 1000, 2)} for name, label, seconds in metrics.collected_spans()],
+            hide_index=True, use_container_width=True,
         )
 
-    pdf_bytes = generate_pdf_bytes(student_name_input, student_id_input, selected_courses_details_for_pdf_by_semester)
-    
-    st.download_button(
-        label="수강신청 내역 PDF 다운로드",
-        data=pdf_bytes,
-        file_name=f"수강신청_{student_id_input}_{student_name_input}.pdf" if student_name_input and student_id_input else "수강신청_내역.pdf",
-        mime="application/pdf",
-        disabled=not can_submit, # 모든 조건 만족 시 활성화
-        use_container_width=True
-    )
-
-
 # --- (선택 사항) 디버깅 정보 ---
 # with st.expander("디버깅: 현재 선택된 과목 ID"):
 # st.json( {k: list(v) for k, v in st.session_state.selected_courses.items()} )
-# st.write("전체 선택 ID:", list(current_all_selected_ids))
-# st.write("유효성 검사 결과:", validation_results_all_semesters)
-# st.write("최종 제출 가능:", can_submit)
\ No newline at end of file
+# st.write("전체 선택 ID:", get_all_selected_ids())
+# st.write("유효성 검사 결과:", compute_summary()[0])
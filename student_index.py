@@ -0,0 +1,159 @@
+# student_index.py
+# 학번 → 시트 행 번호 색인과, 다시 제출할 때 바뀐 셀만 쓰는 학생별 덮어쓰기(upsert).
+#
+# 색인은 처음 한 번(그리고 REBUILD_SECONDS마다, 또는 쓰기 오류 뒤) 저장소를 읽어 만들고,
+# 이후에는 직접 쓴 내용으로 갱신하므로 학생을 찾을 때 시트를 다시 훑지 않습니다.
+# 각 행의 셀 값도 함께 기억해 두었다가 새 제출과 비교합니다.
+#
+# 다시 제출하면
+# - 계속 선택한 과목은 같은 행을 유지하고 바뀐 셀(타임스탬프, 접수번호 등)만 씁니다.
+# - 빠진 과목의 행은 새로 추가된 과목이 이어 쓰고, 남는 행은 비워 빈 행 목록에 넣습니다.
+# - 그래도 모자라면 빈 행 → 시트 끝 순서로 행을 배정합니다.
+# 여러 학생의 변경은 모아서 write_cells 한 번(Google Sheets batch_update 한 번)으로 기록합니다.
+#
+# 학생당 한 행(compact) 형식에서는 과목 열이 없으므로 학생의 첫 행을 새 행으로 덮어쓰고 나머지 행을 비웁니다.
+#
+# 색인은 시트에 쓰는 곳이 하나뿐이라고 가정합니다. (submission_queue의 플러셔 임대 참고)
+# upsert_many에 fence를 넘기면 색인을 읽은 뒤와 시트에 쓰기 직전마다 불러, 임대를 잃었으면 쓰지 않습니다.
+import bisect
+import time
+
+from storage import STUDENT_ID_COLUMN, iter_rows
+
+REBUILD_SECONDS = 30 * 60
+
+
+class StudentRowIndex:
+    """학번별 행 번호와 행 내용을 기억해 두는 색인입니다."""
+
+    def __init__(self, rebuild_seconds=REBUILD_SECONDS):
+        self.rebuild_seconds = rebuild_seconds
+        self._rows_by_student = None  # 학번 -> {행 번호: 셀 목록}
+        self._free_rows = []  # 비어 있는 행 번호 (오름차순)
+        self._next_row = 2  # 데이터가 끝난 다음 행 번호
+        self._built_at = 0.0
+        self._width = 0
+        self._key_column = None  # 같은 행을 유지할 기준 열 (long: Course ID, compact: 없음)
+
+    def invalidate(self):
+        """다음 사용 때 저장소를 다시 읽어 색인을 새로 만들게 합니다."""
+        self._rows_by_student = None
+
+    def _ensure_built(self, storage):
+        if self._rows_by_student is not None and time.time() - self._built_at < self.rebuild_seconds:
+            return
+        self._width = len(storage.header)
+        self._key_column = storage.header.index("Course ID") if "Course ID" in storage.header else None
+        rows_by_student = {}
+        free_rows = []
+        last_row = 1
+        for row_no, row in iter_rows(storage):
+            student_id = row[STUDENT_ID_COLUMN - 1]
+            if student_id:
+                rows_by_student.setdefault(student_id, {})[row_no] = _pad(row, self._width)
+                last_row = row_no
+            else:
+                free_rows.append(row_no)
+        self._rows_by_student = rows_by_student
+        self._free_rows = [n for n in free_rows if n < last_row]
+        self._next_row = last_row + 1
+        self._built_at = time.time()
+
+    def rows_of(self, storage, student_id):
+        """학번의 {행 번호: 셀 목록}을 반환합니다. (없으면 빈 dict)"""
+        self._ensure_built(storage)
+        return dict(self._rows_by_student.get(str(student_id), {}))
+
+    def _take_row(self):
+        if self._free_rows:
+            return self._free_rows.pop(0)
+        row_no = self._next_row
+        self._next_row += 1
+        return row_no
+
+    def _plan(self, student_id, new_rows, updates):
+        """한 학생의 새 행 목록을 기존 행에 배치하고, 바뀐 셀을 updates에 추가합니다.
+
+        반환값: (새 {행 번호: 셀 목록}, 비운 행 번호 목록)
+        """
+        old = self._rows_by_student.get(student_id, {})
+        key_of = (lambda cells: cells[self._key_column]) if self._key_column is not None else (lambda cells: "")
+        old_row_by_course = {}
+        for row_no in sorted(old):
+            old_row_by_course.setdefault(key_of(old[row_no]), row_no)
+
+        placed = {}
+        pending = []
+        for cells in (_pad(r, self._width) for r in new_rows):
+            row_no = old_row_by_course.pop(key_of(cells), None)
+            if row_no is None:
+                pending.append(cells)
+            else:
+                placed[row_no] = cells
+        # 빠진 과목의 행(이전 제출이 여러 번 쌓여 있던 중복 행 포함)을 새 과목에 다시 씁니다.
+        reusable = sorted(n for n in old if n not in placed)
+        for cells in pending:
+            placed[reusable.pop(0) if reusable else self._take_row()] = cells
+
+        for row_no, cells in placed.items():
+            _diff_cells(row_no, old.get(row_no), cells, updates)
+        blank = [""] * self._width
+        for row_no in reusable:
+            _diff_cells(row_no, old[row_no], blank, updates)
+        return placed, reusable
+
+    def upsert_many(self, storage, submissions, fence=None):
+        """[(학번, 행 목록), ...]을 학생별로 덮어쓰고 (쓴 셀 수, 쓴 범위 수)를 반환합니다.
+
+        같은 학번이 여러 번 있으면 마지막 항목만 반영합니다. 쓰기에 실패하면 색인을 버리고 예외를 그대로 전달합니다.
+        fence는 시트에 쓰기 직전마다 부르는 함수로, 더 이상 쓰면 안 되면 예외를 올립니다. (플러셔 임대 확인)
+        """
+        fence = fence or (lambda: None)
+        self._ensure_built(storage)
+        fence()
+        latest = {}
+        for student_id, rows in submissions:
+            latest[str(student_id)] = rows
+
+        saved = (self._free_rows[:], self._next_row)
+        updates = []
+        planned = {}
+        for student_id, rows in latest.items():
+            planned[student_id] = self._plan(student_id, rows, updates)
+        try:
+            fence()
+            storage.ensure_rows(self._next_row - 1)
+            fence()
+            storage.write_cells(updates)
+        except Exception:
+            self._free_rows, self._next_row = saved
+            self.invalidate()
+            raise
+
+        for student_id, (placed, cleared) in planned.items():
+            if placed:
+                self._rows_by_student[student_id] = placed
+            else:
+                self._rows_by_student.pop(student_id, None)
+            for row_no in cleared:
+                bisect.insort(self._free_rows, row_no)
+        return sum(len(values) for _, _, values in updates), len(updates)
+
+
+def _pad(row, width):
+    row = ["" if v is None else str(v) for v in row]
+    return row + [""] * (width - len(row)) if len(row) < width else row[:width]
+
+
+def _diff_cells(row_no, old_cells, new_cells, updates):
+    """old_cells와 new_cells가 다른 연속 구간마다 (행, 시작 열, 값 목록)을 updates에 추가합니다."""
+    start = None
+    for col, value in enumerate(new_cells):
+        changed = old_cells is None or old_cells[col] != value
+        if changed and start is None:
+            start = col
+        elif not changed and start is not None:
+            updates.append((row_no, start + 1, new_cells[start:col]))
+            start = None
+    if start is not None:
+        updates.append((row_no, start + 1, new_cells[start:]))
@@ -0,0 +1,369 @@
+# submission_queue.py
+# 제출 내역을 먼저 로컬 SQLite(WAL) 큐에 기록해 즉시 접수 처리하고,
+# 백그라운드 플러셔가 여러 학생의 제출을 모아 학번별 덮어쓰기(student_index.StudentRowIndex)로
+# 저장소(Google Sheets 등)에 한 번에 기록합니다. 다시 제출하면 바뀐 셀만 씁니다.
+#
+# 정확히 한 번 기록(exactly-once)을 위해 각 행의 마지막 열에 접수번호(Submission ID)를 함께 기록합니다.
+# 플러셔가 기록 도중 중단되면(inflight 상태로 남으면) 재시작 시 시트의 접수번호 열을 읽어
+# 실제로 기록된 접수는 완료 처리하고, 기록되지 않은 접수만 다시 보냅니다.
+# 같은 학번의 더 최근 접수가 이미 기록되었다면 앞선 접수는 기록하지 않고 완료(대체됨) 처리합니다.
+# 기록 요청이 시간 초과/5xx처럼 반영 여부를 알 수 없게 실패하면 곧바로 다시 보내지 않고,
+# 같은 방식으로 접수번호 열과 대조한 뒤 기록되지 않은 접수만 다시 보냅니다.
+#
+# 덮어쓰기는 시트에 쓰는 곳이 하나여야 하므로, 같은 큐 파일을 쓰는 여러 프로세스 중
+# 임대(lease)를 가진 플러셔 하나만 기록합니다.
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from rate_limit import SERVER_ERRORS, status_code
+from sqlite_util import Transaction
+from storage import STUDENT_ID_COLUMN
+from student_index import StudentRowIndex
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_INFLIGHT = "inflight"
+STATUS_DONE = "done"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    seq           INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id TEXT NOT NULL UNIQUE,
+    student_id    TEXT NOT NULL,
+    student_name  TEXT NOT NULL,
+    rows_json     TEXT NOT NULL,
+    row_count     INTEGER NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'pending',
+    batch_id      TEXT,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    last_error    TEXT,
+    created_at    REAL NOT NULL,
+    claimed_at    REAL,
+    flushed_at    REAL
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_status_seq ON submissions(status, seq);
+CREATE INDEX IF NOT EXISTS idx_submissions_student ON submissions(student_id, seq);
+CREATE TABLE IF NOT EXISTS leases (
+    name       TEXT PRIMARY KEY,
+    owner      TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    generation INTEGER NOT NULL DEFAULT 1
+);
+"""
+
+
+def new_submission_id():
+    return uuid.uuid4().hex[:16]
+
+
+class SubmissionQueue:
+    """SQLite(WAL) 기반의 영속 제출 큐입니다. 여러 스레드/프로세스에서 같은 파일을 함께 사용할 수 있습니다."""
+
+    def __init__(self, path, lease_seconds=300):
+        self.path = os.path.abspath(path)
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # 세대(generation) 열이 없던 이전 큐 파일
+            if "generation" not in {row["name"] for row in conn.execute("PRAGMA table_info(leases)")}:
+                conn.execute("ALTER TABLE leases ADD COLUMN generation INTEGER NOT NULL DEFAULT 1")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")  # 접수 응답 전에 디스크에 확정
+            self._local.conn = conn
+        return Transaction(conn)
+
+    # --- 접수 ---
+    def enqueue(self, student_id, student_name, rows, submission_id=None):
+        """제출 행 목록을 큐에 기록하고 접수번호를 반환합니다.
+
+        rows의 각 행 끝에는 접수번호 열이 자동으로 붙습니다.
+        """
+        submission_id = submission_id or new_submission_id()
+        tagged_rows = [list(row) + [submission_id] for row in rows]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO submissions (submission_id, student_id, student_name, rows_json, row_count, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (submission_id, str(student_id), str(student_name),
+                 json.dumps(tagged_rows, ensure_ascii=False), len(tagged_rows), time.time()),
+            )
+        return submission_id
+
+    # --- 상태 조회 ---
+    def status(self, submission_id):
+        """접수번호의 처리 상태를 dict로 반환합니다. 없으면 None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT submission_id, student_id, student_name, row_count, status, attempts, last_error,"
+                " created_at, flushed_at FROM submissions WHERE submission_id = ?",
+                (submission_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def latest_for_student(self, student_id):
+        """학번의 가장 최근 접수 상태를 반환합니다. 없으면 None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT submission_id FROM submissions WHERE student_id = ? ORDER BY seq DESC LIMIT 1",
+                (str(student_id),),
+            ).fetchone()
+        return self.status(row["submission_id"]) if row else None
+
+    def pending_count(self):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS n, COALESCE(SUM(row_count), 0) AS rows FROM submissions WHERE status != ?",
+                (STATUS_DONE,),
+            ).fetchone()
+        return row["n"], row["rows"]
+
+    # --- 플러셔용 ---
+    def claim_batch(self, max_rows):
+        """대기 중인 접수를 접수 순서대로 max_rows 행까지 묶어 inflight로 표시하고 반환합니다.
+
+        반환값: (batch_id, [(submission_id, rows), ...]) 또는 대기 중인 접수가 없으면 (None, []).
+        접수 하나는 나누지 않으므로 첫 접수가 max_rows보다 크더라도 단독으로 묶습니다.
+        """
+        batch_id = uuid.uuid4().hex[:16]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            candidates = conn.execute(
+                "SELECT seq, submission_id, rows_json, row_count FROM submissions WHERE status = ? ORDER BY seq",
+                (STATUS_PENDING,),
+            )
+            picked = []
+            total_rows = 0
+            for row in candidates:
+                if picked and total_rows + row["row_count"] > max_rows:
+                    break
+                picked.append(row)
+                total_rows += row["row_count"]
+            if not picked:
+                return None, []
+            conn.executemany(
+                "UPDATE submissions SET status = ?, batch_id = ?, claimed_at = ?, attempts = attempts + 1 WHERE seq = ?",
+                [(STATUS_INFLIGHT, batch_id, time.time(), row["seq"]) for row in picked],
+            )
+        return batch_id, [(row["submission_id"], json.loads(row["rows_json"])) for row in picked]
+
+    def mark_done(self, submission_ids):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE submissions SET status = ?, flushed_at = ?, last_error = NULL WHERE submission_id = ?",
+                [(STATUS_DONE, now, sid) for sid in submission_ids],
+            )
+
+    def release(self, submission_ids, error):
+        """기록에 실패한 inflight 접수를 다시 대기 상태로 돌립니다. (접수 순서는 그대로 유지)"""
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE submissions SET status = ?, batch_id = NULL, last_error = ? WHERE submission_id = ? AND status = ?",
+                [(STATUS_PENDING, str(error)[:500], sid, STATUS_INFLIGHT) for sid in submission_ids],
+            )
+
+    def superseded(self, submission_ids):
+        """같은 학번의 더 최근 접수가 이미 기록된 접수번호 목록을 반환합니다."""
+        if not submission_ids:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT s.submission_id FROM submissions s"
+                f" WHERE s.submission_id IN ({','.join('?' * len(submission_ids))})"
+                " AND EXISTS (SELECT 1 FROM submissions t"
+                "             WHERE t.student_id = s.student_id AND t.seq > s.seq AND t.status = ?)",
+                (*submission_ids, STATUS_DONE),
+            ).fetchall()
+        return [row["submission_id"] for row in rows]
+
+    def acquire_lease(self, name, owner, seconds):
+        """이름 붙은 임대를 얻거나 연장하고 임대 세대(generation)를 반환합니다. 다른 주인의 임대가 아직 유효하면 None.
+
+        주인이 바뀔 때마다 세대가 1씩 늘어나므로, 세대가 같으면 그동안 다른 주인이 끼어들지 않은 것입니다.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR IGNORE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)", (name, owner, now + seconds)
+            )
+            updated = conn.execute(
+                "UPDATE leases SET generation = generation + (owner != ?), owner = ?, expires_at = ?"
+                " WHERE name = ? AND (owner = ? OR expires_at < ?)",
+                (owner, owner, now + seconds, name, owner, now),
+            ).rowcount
+            if not updated:
+                return None
+            return conn.execute("SELECT generation FROM leases WHERE name = ?", (name,)).fetchone()["generation"]
+
+    def renew_lease(self, name, owner, generation, seconds):
+        """같은 세대의 임대를 아직 갖고 있으면 연장하고 True, 다른 주인에게 넘어갔으면 False를 반환합니다.
+
+        만료되었더라도 그사이 아무도 가져가지 않았다면(세대가 같으면) 연장합니다.
+        """
+        with self._connect() as conn:
+            return bool(conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ? AND generation = ?",
+                (time.time() + seconds, name, owner, generation),
+            ).rowcount)
+
+    def stale_inflight(self):
+        """임대 시간이 지난 inflight 접수(플러셔가 중단된 흔적)의 접수번호 목록을 반환합니다."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT submission_id FROM submissions WHERE status = ? AND claimed_at < ? ORDER BY seq",
+                (STATUS_INFLIGHT, time.time() - self.lease_seconds),
+            ).fetchall()
+        return [row["submission_id"] for row in rows]
+
+
+FLUSHER_LEASE_NAME = "flusher"
+FLUSHER_LEASE_SECONDS = 60.0
+
+
+class LeaseLost(RuntimeError):
+    """기록 도중 플러셔 임대가 다른 프로세스에 넘어갔습니다. (이번 묶음은 쓰지 않고 되돌림)"""
+
+
+class QueueFlusher(threading.Thread):
+    """큐에 쌓인 제출을 모아 학번별로 덮어쓰는 백그라운드 스레드입니다.
+
+    get_sink는 storage.StorageBackend를 반환하는 함수입니다. 연결할 수 없으면 None을 반환하면 됩니다.
+    """
+
+    def __init__(self, queue, get_sink, max_batch_rows=1000, interval=2.0, max_backoff=120.0):
+        super().__init__(name="submission-queue-flusher", daemon=True)
+        self.queue = queue
+        self.get_sink = get_sink
+        self.max_batch_rows = max_batch_rows
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.index = StudentRowIndex()
+        self.owner = uuid.uuid4().hex
+        self._generation = None  # 지금 갖고 있는 임대 세대 (없으면 None)
+        self._unreconciled = set()  # 반영 여부를 알 수 없게 실패해 inflight로 남겨 둔 접수번호
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def wake(self):
+        """새 접수가 들어왔음을 알립니다. (다음 주기를 기다리지 않고 곧바로 기록 시도)"""
+        self._wake_event.set()
+
+    def run(self):
+        backoff = self.interval
+        while not self._stop_event.is_set():
+            if not self._hold_lease():
+                # 다른 프로세스의 플러셔가 기록 중: 임대가 끝날 때까지 대기
+                self._stop_event.wait(self.interval)
+                continue
+            try:
+                self.reconcile_failed()
+                self.recover_stale()
+                flushed = self.flush_once()
+                backoff = self.interval
+            except LeaseLost as e:
+                logger.info("%s", e)
+                continue
+            except Exception as e:  # 네트워크/할당량 오류 등: 지수 백오프 후 재시도
+                logger.warning("제출 큐 기록 실패, %.1f초 후 재시도: %s", backoff, e)
+                flushed = 0
+                self._stop_event.wait(backoff * (0.5 + random.random()))
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            if not flushed:
+                # 쌓인 행이 조금 더 모이도록 주기만큼 기다립니다.
+                self._wake_event.wait(self.interval)
+                self._wake_event.clear()
+
+    def _hold_lease(self):
+        generation = self.queue.acquire_lease(FLUSHER_LEASE_NAME, self.owner, FLUSHER_LEASE_SECONDS)
+        if generation is not None and generation != self._generation:
+            self.index.invalidate()  # 임대가 없던 동안 다른 플러셔가 시트를 바꿨을 수 있음
+        self._generation = generation
+        return generation is not None
+
+    def _fence(self):
+        """시트에 쓰기 직전에 부릅니다. 같은 세대의 임대를 연장하고, 잃었으면 LeaseLost를 올립니다."""
+        if self._generation is None or not self.queue.renew_lease(
+                FLUSHER_LEASE_NAME, self.owner, self._generation, FLUSHER_LEASE_SECONDS):
+            self._generation = None
+            raise LeaseLost("플러셔 임대를 다른 프로세스가 가져가 이번 묶음을 기록하지 않고 되돌립니다.")
+
+    def flush_once(self):
+        """한 묶음을 기록하고 기록한 행 수를 반환합니다."""
+        batch_id, batch = self.queue.claim_batch(self.max_batch_rows)
+        if not batch:
+            return 0
+        submission_ids = [sid for sid, _ in batch]
+        skipped = set(self.queue.superseded(submission_ids))
+        writes = [(rows[0][STUDENT_ID_COLUMN - 1], rows) for sid, rows in batch if sid not in skipped and rows]
+        if writes:
+            sink = self.get_sink()
+            if sink is None:
+                self.queue.release(submission_ids, "워크시트 연결 실패")
+                raise RuntimeError("워크시트에 연결할 수 없습니다.")
+            try:
+                # 같은 학번이 묶음 안에 여러 번 있으면 마지막(가장 최근) 접수만 기록됩니다.
+                self.index.upsert_many(sink, writes, fence=self._fence)
+            except Exception as e:
+                if _is_ambiguous(e):
+                    # 요청이 시트에 반영되었을 수도 있으므로 inflight로 두고, 다음 주기에 접수번호 열과 대조합니다.
+                    self._unreconciled.update(submission_ids)
+                else:
+                    self.queue.release(submission_ids, e)
+                raise
+        self.queue.mark_done(submission_ids)
+        return sum(len(rows) for _, rows in writes)
+
+    def recover_stale(self):
+        """중단된 inflight 접수 중 이미 시트에 기록된 것은 완료로, 나머지는 대기로 되돌립니다.
+
+        되돌린 접수 중 더 최근 접수에 대체된 것은 flush_once에서 기록 없이 완료 처리됩니다.
+        """
+        stale = self.queue.stale_inflight()
+        if stale:
+            self._reconcile(stale, "inflight 복구")
+
+    def reconcile_failed(self):
+        """반영 여부를 알 수 없게 실패한 묶음을 접수번호 열과 대조해, 기록된 접수는 완료로, 나머지는 대기로 돌립니다."""
+        if self._unreconciled:
+            self._reconcile(sorted(self._unreconciled), "기록 실패 후 대조")
+            self._unreconciled.clear()
+
+    def _reconcile(self, submission_ids, reason):
+        sink = self.get_sink()
+        if sink is None:
+            raise RuntimeError("워크시트에 연결할 수 없습니다.")
+        written = set(sink.col_values(sink.submission_id_column))
+        done = [sid for sid in submission_ids if sid in written]
+        retry = [sid for sid in submission_ids if sid not in written]
+        if done:
+            self.queue.mark_done(done)
+        if retry:
+            self.queue.release(retry, reason)
+
+
+def _is_ambiguous(error):
+    """시트가 요청을 받았는지 알 수 없는 실패(응답 없음, 5xx)인지 확인합니다. 429/4xx와 임대 상실은 쓰지 않은 것이 확실합니다."""
+    if isinstance(error, LeaseLost):
+        return False
+    status = status_code(error)
+    return status is None or status in SERVER_ERRORS
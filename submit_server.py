@@ -0,0 +1,395 @@
+# submit_server.py
+# 정적 프런트엔드(index.html, app.js)용 제출 API 서버. 표준 라이브러리(asyncio)만 사용합니다.
+#
+# 학생마다 웹소켓과 세션 상태를 유지하는 Streamlit 앱과 달리, 과목 선택/검증/PDF는 브라우저에서 하고
+# 서버는 정적 파일과 제출 한 번만 처리하므로 접속이 몰리는 신청 기간에도 가볍게 버틸 수 있습니다.
+#
+# - GET  /courses.json              과목 정보. ETag(카탈로그 버전)로 바뀌지 않았으면 304
+# - GET  /, /app.js, /style.css ... 정적 파일 (ETag 동일)
+# - POST /api/submissions           {"studentName", "studentId", "courseIds": [...], "catalogVersion", "submissionId"}
+#                                   → 앱과 같은 규칙(validation.RuleEngine)으로 다시 검사한 뒤 제출 큐에 접수
+#                                     202 접수 / 400 형식 오류 / 409 정원 초과 / 422 조건 미충족
+#                                   submissionId(브라우저가 만든 16~32자리 16진수)는 중복 방지 키입니다.
+#                                   응답을 받지 못해 같은 접수번호로 다시 보내면 새로 접수하지 않고 200과 기존 상태를 돌려줍니다.
+# - GET  /api/submissions/<접수번호>  저장 여부 확인
+#
+# 제출은 Streamlit 앱과 같은 제출 큐(SUBMISSION_QUEUE_PATH)와 좌석 장부(SEAT_LEDGER_PATH)를 쓰므로
+# 두 화면을 함께 운영할 수 있고, 저장소 기록은 큐의 플러셔가 여러 제출을 묶어 백그라운드에서 합니다.
+# --workers N이면 SO_REUSEPORT로 같은 포트를 여는 작업 프로세스 N개를 띄웁니다. (플러셔는 임대를 가진 하나만 기록)
+#
+# 사용 예:
+#   python submit_server.py --port 8080 --storage sqlite:///tmp/registrations.db
+#   python submit_server.py --port 8080 --workers 4 --creds service_account.json
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import socket
+import sqlite3
+import sys
+from datetime import datetime
+
+import rate_limit
+from catalog import get_catalog_watcher
+from record_codec import compact_row
+from seats import SeatLedger
+from storage import default_storage_url, open_storage, storage_format, submission_rows, FORMAT_COMPACT
+from submission_queue import SubmissionQueue, QueueFlusher, new_submission_id
+from validation import get_rule_engine, validate_record
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+COURSES_JSON_PATH = os.path.join(BASE_DIR, "courses.json")
+SUBMISSION_QUEUE_PATH = os.environ.get("SUBMISSION_QUEUE_PATH", "submission_queue.sqlite3")
+SEAT_LEDGER_PATH = os.environ.get("SEAT_LEDGER_PATH", "seat_ledger.sqlite3")
+
+# 요청 경로 -> (파일 이름, Content-Type). 이 목록에 없는 파일은 제공하지 않습니다.
+STATIC_FILES = {
+    "/": ("index.html", "text/html; charset=utf-8"),
+    "/index.html": ("index.html", "text/html; charset=utf-8"),
+    "/app.js": ("app.js", "text/javascript; charset=utf-8"),
+    "/style.css": ("style.css", "text/css; charset=utf-8"),
+    "/NanumSquare_acR.ttf": ("NanumSquare_acR.ttf", "font/ttf"),
+    "/courses.json": ("courses.json", "application/json; charset=utf-8"),
+}
+SUBMIT_PATH = "/api/submissions"
+_STATUS_PATH = re.compile(r"^/api/submissions/([0-9a-f]{1,32})$")
+_CLIENT_SUBMISSION_ID = re.compile(r"^[0-9a-f]{16,32}$")
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+MAX_NAME_LENGTH = 20  # 앱의 이름 입력 최대 길이와 같음
+MAX_STUDENT_ID_LENGTH = 20
+REQUEST_TIMEOUT = 15  # 요청 머리/본문을 기다리는 시간(초), keep-alive 연결의 유휴 시간도 같음
+
+_REASONS = {200: "OK", 202: "Accepted", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 409: "Conflict", 411: "Length Required", 413: "Payload Too Large",
+            422: "Unprocessable Entity", 431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+class StaticFile:
+    """파일 내용과 ETag를 메모리에 두고, 파일이 바뀌면(mtime/크기) 다시 읽습니다."""
+
+    def __init__(self, path, content_type):
+        self.path = path
+        self.content_type = content_type
+        self._signature = None
+        self.body = b""
+        self.etag = ""
+
+    def load(self):
+        st = os.stat(self.path)
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature != self._signature:
+            with open(self.path, "rb") as f:
+                body = f.read()
+            # courses.json의 ETag는 catalog의 버전(내용 sha1 앞 12자리)과 같습니다.
+            self.body, self.etag = body, '"' + hashlib.sha1(body).hexdigest()[:12] + '"'
+            self._signature = signature
+        return self
+
+
+class SubmissionService:
+    """제출을 다시 검사해 좌석을 확정하고 제출 큐에 접수합니다. (동기 코드, 작업 스레드에서 실행)"""
+
+    def __init__(self, storage_url, creds_dict, queue_path=SUBMISSION_QUEUE_PATH, seat_ledger_path=SEAT_LEDGER_PATH,
+                 courses_path=COURSES_JSON_PATH):
+        self.storage_url = storage_url
+        self.creds_dict = creds_dict
+        self.watcher = get_catalog_watcher(courses_path)
+        self.queue = SubmissionQueue(queue_path)
+        self.seat_ledger_path = seat_ledger_path
+        self._seat_ledger = None
+        self._synced_version = None
+        self._sink = None
+        self.flusher = QueueFlusher(self.queue, self._get_sink)
+
+    def start(self):
+        self.flusher.start()
+
+    def _get_sink(self):
+        # 플러셔 스레드 전용 저장소 연결. 제출 기록은 속도 제한기에서 먼저 토큰을 받습니다.
+        if self._sink is None:
+            self._sink = open_storage(self.storage_url, self.creds_dict, rate_limit.PRIORITY_SUBMIT)
+        return self._sink
+
+    def _current_seat_ledger(self):
+        """최신 카탈로그의 정원을 반영한 좌석 장부를 반환합니다. (정원 과목이 없으면 None)
+
+        좌석 장부는 앱과 함께 쓰므로 최신 버전의 정원만 반영합니다.
+        (학생이 보던 옛 버전의 정원을 반영하면 다른 프로세스가 맞춰 둔 정원이 되돌아감)
+        """
+        catalog = self.watcher.current
+        if not catalog.capacities:
+            return None
+        if self._seat_ledger is None:
+            self._seat_ledger = SeatLedger(self.seat_ledger_path)
+        if catalog.version != self._synced_version:
+            self._seat_ledger.sync_capacities(dict(catalog.capacities))
+            self._synced_version = catalog.version
+        return self._seat_ledger
+
+    def _existing(self, submission_id, student_id):
+        """이미 접수된 접수번호이면 (상태 코드, 응답)을, 처음 보는 접수번호이면 None을 반환합니다."""
+        submission_status = self.queue.status(submission_id)
+        if submission_status is None:
+            return None
+        if submission_status['student_id'] != student_id:
+            return 409, {'error': "이미 다른 학번으로 사용된 접수번호입니다."}
+        return 200, {'submissionId': submission_id, 'status': submission_status['status'], 'duplicate': True}
+
+    def submit(self, payload):
+        """제출 JSON을 처리해 (HTTP 상태 코드, 응답 dict)를 반환합니다."""
+        if not isinstance(payload, dict):
+            return 400, {'error': "요청 본문은 JSON 객체여야 합니다."}
+        student_name = str(payload.get('studentName') or "").strip()
+        student_id = str(payload.get('studentId') or "").strip()
+        course_ids = payload.get('courseIds')
+        if not student_name or not student_id:
+            return 400, {'error': "학생 이름과 학번을 입력해야 제출할 수 있습니다."}
+        if len(student_name) > MAX_NAME_LENGTH or len(student_id) > MAX_STUDENT_ID_LENGTH:
+            return 400, {'error': "학생 이름 또는 학번이 너무 깁니다."}
+        if not isinstance(course_ids, list) or not all(isinstance(cid, str) for cid in course_ids):
+            return 400, {'error': "courseIds는 과목 ID 문자열 목록이어야 합니다."}
+        submission_id = payload.get('submissionId')
+        if submission_id is None:
+            submission_id = new_submission_id()
+        elif not isinstance(submission_id, str) or not _CLIENT_SUBMISSION_ID.match(submission_id):
+            return 400, {'error': "submissionId는 16~32자리 16진수 문자열이어야 합니다."}
+        else:
+            existing = self._existing(submission_id, student_id)
+            if existing is not None:
+                return existing
+
+        # 학생이 화면에서 본 카탈로그 버전으로 검사합니다. (서버가 모르는 버전이면 최신 버전)
+        catalog = self.watcher.get(str(payload.get('catalogVersion') or "")) or self.watcher.current
+        errors = validate_record(get_rule_engine(catalog), student_id, course_ids)
+        if errors:
+            return 422, {'isValid': False, 'errors': errors, 'catalogVersion': catalog.version}
+
+        submitted_ids = sorted(set(course_ids) | catalog.mandatory_ids, key=catalog.index.get)
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if storage_format(self.storage_url) == FORMAT_COMPACT:
+            rows = [compact_row(timestamp, student_name, student_id, catalog, submitted_ids)]
+        else:
+            rows = submission_rows(timestamp, student_name, student_id,
+                                   [catalog.by_id[cid] for cid in submitted_ids], catalog.version)
+
+        # 정원 과목은 최신 정원으로 좌석을 확정하고, 접수까지 성공해야 확정을 커밋합니다.
+        # (하나라도 좌석을 잡지 못하면 접수하지 않고, 접수가 실패하면 좌석은 이전 상태로 되돌림)
+        seat_ledger = self._current_seat_ledger()
+        seats = (seat_ledger.confirming(f"api:{submission_id}", student_id, submitted_ids)
+                 if seat_ledger is not None else contextlib.nullcontext([]))
+        try:
+            with seats as seat_failed:
+                if seat_failed:
+                    return 409, {'error': "정원이 찬 과목이 있어 접수하지 못했습니다.",
+                                 'fullCourses': [{'id': cid, 'name': catalog.by_id[cid]['name']} for cid in seat_failed]}
+                self.queue.enqueue(student_id, student_name, rows, submission_id=submission_id)
+        except sqlite3.IntegrityError:
+            # 같은 접수번호의 요청이 동시에 들어와 다른 쪽이 먼저 접수함 (이쪽 좌석 확정은 되돌리고 먼저 접수된 결과를 반환)
+            return self._existing(submission_id, student_id)
+        self.flusher.wake()
+        return 202, {'submissionId': submission_id, 'status': "pending", 'catalogVersion': catalog.version}
+
+    def status(self, submission_id):
+        submission_status = self.queue.status(submission_id)
+        if submission_status is None:
+            return 404, {'error': "접수번호를 찾을 수 없습니다."}
+        return 200, {'submissionId': submission_id, 'status': submission_status['status'],
+                     'flushedAt': submission_status['flushed_at']}
+
+
+class SubmitServer:
+    """asyncio 스트림 위의 최소한의 HTTP/1.1 서버 (keep-alive 지원, 청크 본문 미지원)."""
+
+    def __init__(self, service, static_dir=BASE_DIR):
+        self.service = service
+        self.static = {path: StaticFile(os.path.join(static_dir, name), content_type)
+                       for path, (name, content_type) in STATIC_FILES.items()}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 431, {'error': "요청 헤더가 너무 큽니다."}, keep_alive=False)
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                try:
+                    method, path, version, headers = _parse_head(head)
+                except ValueError:
+                    await self._send(writer, 400, {'error': "잘못된 요청입니다."}, keep_alive=False)
+                    break
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                if "transfer-encoding" in headers:
+                    await self._send(writer, 411, {'error': "Content-Length가 필요합니다."}, keep_alive=False)
+                    break
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_BODY_BYTES:
+                    await self._send(writer, 413, {'error': "요청 본문이 너무 큽니다."}, keep_alive=False)
+                    break
+                try:
+                    body = await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT) if length else b""
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+
+                try:
+                    response = await self.dispatch(method, path.split("?", 1)[0], headers, body)
+                except Exception:
+                    logger.exception("요청 처리 중 오류: %s %s", method, path)
+                    response = (500, {'error': "서버 오류가 발생했습니다. 잠시 후 다시 시도해주세요."})
+                await self._send(writer, *response, keep_alive=keep_alive, head_only=method == "HEAD")
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, headers, body):
+        """(상태 코드, dict 또는 StaticFile[, 추가 헤더])를 반환합니다."""
+        if path == SUBMIT_PATH:
+            if method != "POST":
+                return 405, {'error': "POST만 지원합니다."}
+            try:
+                payload = json.loads(body.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                return 400, {'error': "요청 본문이 올바른 JSON이 아닙니다."}
+            return await asyncio.to_thread(self.service.submit, payload)
+
+        match = _STATUS_PATH.match(path)
+        if match:
+            if method not in ("GET", "HEAD"):
+                return 405, {'error': "GET만 지원합니다."}
+            return await asyncio.to_thread(self.service.status, match.group(1))
+
+        static_file = self.static.get(path)
+        if static_file is None:
+            return 404, {'error': "찾을 수 없는 경로입니다."}
+        if method not in ("GET", "HEAD"):
+            return 405, {'error': "GET만 지원합니다."}
+        try:
+            static_file.load()
+        except FileNotFoundError:
+            return 404, {'error': "찾을 수 없는 경로입니다."}
+        if static_file.etag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+            return 304, static_file
+        return 200, static_file
+
+    async def _send(self, writer, status, content, keep_alive=True, head_only=False):
+        headers = [("Connection", "keep-alive" if keep_alive else "close")]
+        if isinstance(content, StaticFile):
+            # 브라우저가 매번 ETag로 다시 확인하게 해서, 과목 정보가 바뀌면 바로 반영되도록 합니다.
+            headers += [("Content-Type", content.content_type), ("ETag", content.etag), ("Cache-Control", "no-cache")]
+            body = b"" if status == 304 else content.body
+        else:
+            headers += [("Content-Type", "application/json; charset=utf-8"), ("Cache-Control", "no-store")]
+            body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        headers.append(("Content-Length", str(len(body))))
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"] + [f"{k}: {v}" for k, v in headers]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if body and not head_only:
+            writer.write(body)
+        await writer.drain()
+
+
+def _parse_head(head):
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, version = lines[0].split(" ")
+    if not path.startswith("/") or not version.startswith("HTTP/1."):
+        raise ValueError(lines[0])
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, sep, value = line.partition(":")
+            if not sep:
+                raise ValueError(line)
+            headers[name.strip().lower()] = value.strip()
+    return method, path, version, headers
+
+
+# --- 실행 ---
+def _listen_socket(host, port, reuse_port):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        # 커널이 같은 포트를 연 프로세스들에 새 연결을 나누어 줍니다.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+async def _serve(args, creds_dict):
+    service = SubmissionService(args.storage, creds_dict)
+    service.start()
+    server = SubmitServer(service)
+    sock = _listen_socket(args.host, args.port, args.workers > 1)
+    async with await asyncio.start_server(server.handle_connection, sock=sock, limit=MAX_HEADER_BYTES) as srv:
+        await srv.serve_forever()
+
+
+def _run_worker(args, creds_dict):
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [{os.getpid()}] %(levelname)s %(message)s")
+    try:
+        asyncio.run(_serve(args, creds_dict))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="정적 프런트엔드(index.html/app.js)용 수강신청 제출 API 서버")
+    parser.add_argument("--host", default="127.0.0.1", help="바인드할 주소 (기본: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="포트 (기본: 8080)")
+    parser.add_argument("--workers", type=int, default=1, help="작업 프로세스 수 (2 이상이면 SO_REUSEPORT 사용)")
+    parser.add_argument("--storage", default=default_storage_url(), help="저장소 URL (기본: COURSE_STORAGE_URL 또는 Google Sheets)")
+    parser.add_argument("--creds", help="gsheets 저장소용 서비스 계정 키 JSON 파일")
+    args = parser.parse_args(argv)
+
+    creds_dict = None
+    if args.storage.startswith("gsheets://"):
+        if not args.creds:
+            parser.error("gsheets 저장소에는 --creds가 필요합니다.")
+        with open(args.creds, encoding="utf-8") as f:
+            creds_dict = json.load(f)
+    if args.workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        print("이 플랫폼은 SO_REUSEPORT를 지원하지 않아 작업 프로세스 1개로 실행합니다.", file=sys.stderr)
+        args.workers = 1
+
+    print(f"http://{args.host}:{args.port}/ 에서 제출 서버 시작 (작업 프로세스 {args.workers}개, 저장소 {args.storage})",
+          file=sys.stderr)
+    if args.workers == 1:
+        _run_worker(args, creds_dict)
+        return 0
+    workers = [multiprocessing.Process(target=_run_worker, args=(args, creds_dict), name=f"submit-worker-{i}")
+               for i in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+# tests/conftest.py
+# 여러 테스트 파일이 함께 쓰는 카탈로그/규칙 엔진 fixture와 Sheets 속도 제한기 설정.
+import pytest
+
+import rate_limit
+from catalog import load_catalog
+from helpers import COURSES_JSON_PATH
+from recommend import Recommender
+from validation import get_rule_engine
+
+
+@pytest.fixture(scope="session")
+def catalog():
+    return load_catalog(COURSES_JSON_PATH)
+
+
+@pytest.fixture(scope="session")
+def engine(catalog):
+    return get_rule_engine(catalog)
+
+
+@pytest.fixture(scope="session")
+def valid_ids(catalog):
+    """학교지정 과목을 뺀, 규칙을 모두 만족하는 선택 과목 ID 목록."""
+    course_ids = Recommender(catalog, time_budget=10.0).recommend(catalog.initial_selection(), k=1)[0]['courseIds']
+    return [cid for cid in course_ids if cid not in catalog.mandatory_ids]
+
+
+@pytest.fixture(autouse=True)
+def unthrottled_sheets_limiter(monkeypatch):
+    """GspreadStorage 테스트가 프로세스 전역 제한기의 실제 할당량(분당 60회)을 기다리지 않도록 바꿔 둡니다."""
+    monkeypatch.setattr(rate_limit, "_limiter", rate_limit.SheetsRateLimiter(
+        reads_per_minute=600_000, writes_per_minute=600_000, burst=1000))
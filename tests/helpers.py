@@ -0,0 +1,26 @@
+# tests/helpers.py
+# 테스트용 경로와 무작위 선택 생성 도우미.
+import os
+
+from catalog import semester_key_of
+
+COURSES_JSON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "courses.json")
+
+
+def random_selection(catalog, rng):
+    """학교지정 과목에 그룹마다 정원 근처 개수를 무작위로 더한 학기별 선택을 만듭니다."""
+    selected = catalog.initial_selection()
+    for semester_key in catalog.semester_keys:
+        for group in catalog.groups(semester_key).values():
+            if not group['isMandatory'] and group['quota'] > 0:
+                size = max(0, min(len(group['courseIds']), group['quota'] + rng.choice((-1, 0, 0, 0, 1))))
+                selected[semester_key].update(rng.sample(group['courseIds'], size))
+    return selected
+
+
+def by_semester(catalog, course_ids):
+    """과목 ID 목록을 학기별 집합으로 나눕니다."""
+    selected = {key: set() for key in catalog.semester_keys}
+    for cid in course_ids:
+        selected[semester_key_of(catalog.by_id[cid])].add(cid)
+    return selected
@@ -0,0 +1,85 @@
+# tests/test_bulk_pdf_export.py
+# 일괄 PDF 출력의 ZIP 조각 재개와 학생별 최신 제출 선택 테스트. (PDF 생성 자체는 포함하지 않음)
+import os
+import zipfile
+from datetime import datetime
+
+from bulk_pdf_export import DirectorySink, ZipSink, output_name
+from storage import SHEET_HEADER, latest_selections, parse_timestamp
+
+
+def test_zip_sink_resumes_from_closed_parts(tmp_path):
+    path = str(tmp_path / "out.zip")
+    sink = ZipSink(path, checkpoint=2)
+    for i in range(5):
+        sink.write(f"{i}.pdf", b"pdf")
+    # 마지막 조각(4.pdf)을 닫기 전에 중단된 상황
+    assert sorted(os.listdir(path + ".parts")) == ["part-00001.zip", "part-00002.zip", "part-00003.zip.tmp"]
+
+    resumed = ZipSink(path, checkpoint=2)
+    assert [resumed.exists(f"{i}.pdf") for i in range(5)] == [True, True, True, True, False]
+    assert not any(name.endswith(".tmp") for name in os.listdir(path + ".parts"))
+    resumed.write("4.pdf", b"pdf")
+    resumed.finish()
+    assert not os.path.exists(path + ".parts")
+    with zipfile.ZipFile(path) as zf:
+        assert sorted(zf.namelist()) == [f"{i}.pdf" for i in range(5)]
+        assert zf.testzip() is None
+
+
+def test_zip_sink_adds_to_a_finished_zip(tmp_path):
+    path = str(tmp_path / "out.zip")
+    first = ZipSink(path)
+    first.write("a.pdf", b"a")
+    first.finish()
+    second = ZipSink(path)
+    assert second.exists("a.pdf")
+    second.write("b.pdf", b"b")
+    second.finish()
+    with zipfile.ZipFile(path) as zf:
+        assert sorted(zf.namelist()) == ["a.pdf", "b.pdf"]
+
+
+def test_zip_sink_moves_broken_zip_aside(tmp_path):
+    path = tmp_path / "out.zip"
+    path.write_bytes(b"PK\x03\x04 truncated")
+    sink = ZipSink(str(path))
+    assert not sink.exists("a.pdf")
+    assert (tmp_path / "out.zip.broken").exists()
+
+
+def test_directory_sink_and_output_name(tmp_path):
+    sink = DirectorySink(str(tmp_path / "pdfs"))
+    name = output_name("2025103", "홍 길동", slice(4, 5))
+    assert name == "1반/수강신청_2025103_홍_길동.pdf"
+    sink.write(name, b"pdf")
+    assert sink.exists(name)
+
+
+# --- 학생별 최신 제출 ---
+def make_row(student_id, course_id, timestamp, submission_id):
+    row = [""] * len(SHEET_HEADER)
+    row[SHEET_HEADER.index("Timestamp")] = timestamp
+    row[SHEET_HEADER.index("Student Name")] = "가"
+    row[SHEET_HEADER.index("Student ID")] = student_id
+    row[SHEET_HEADER.index("Course ID")] = course_id
+    row[SHEET_HEADER.index("Submission ID")] = submission_id
+    return row
+
+
+def test_parse_timestamp_formats():
+    expected = datetime(2025, 3, 4, 13, 5, 0)
+    assert parse_timestamp("2025-03-04 13:05:00") == expected
+    assert parse_timestamp("2025. 3. 4 오후 1:05:00") == expected
+    assert parse_timestamp("2025. 3. 4 오전 12:05:00") == datetime(2025, 3, 4, 0, 5, 0)
+    assert parse_timestamp("어제") is None
+
+
+def test_latest_selections_compares_parsed_timestamps():
+    rows = [
+        # 시트가 돌려준 로캘 형식(나중 제출)이 문자열로는 ISO 형식보다 앞섬
+        make_row("1", "c2", "2025. 3. 4 오후 1:05:00", "b"),
+        make_row("1", "c1", "2025-03-04 09:00:00", "a"),
+        make_row("1", "c3", "2025. 3. 4 오후 1:05:00", "b"),
+    ]
+    assert latest_selections(rows)["1"]['courseIds'] == ["c2", "c3"]
@@ -0,0 +1,49 @@
+# tests/test_bulk_validate.py
+# 종이 신청서 일괄 검사 도구의 입력 읽기와 결과 기록 테스트.
+import io
+import json
+
+import pytest
+
+import bulk_validate
+from helpers import COURSES_JSON_PATH
+
+
+def test_iter_csv_records():
+    f = io.StringIO("Student ID,Student Name,Course IDs\n2025001,가,\"c1, c2;c3\"\n")
+    assert list(bulk_validate.iter_csv_records(f, "Student ID", "Student Name", "Course IDs")) == [
+        (2, "2025001", "가", ["c1", "c2", "c3"])]
+    with pytest.raises(ValueError):
+        list(bulk_validate.iter_csv_records(io.StringIO("학번,과목\n"), "Student ID", "Student Name", "Course IDs"))
+
+
+def test_iter_jsonl_records_reports_bad_lines():
+    f = io.StringIO('{"studentId": 1, "courseIds": ["c1"]}\n\nnot json\n{"studentId": "2", "courseIds": "c1"}\n')
+    records = list(bulk_validate.iter_jsonl_records(f))
+    assert records[0] == (1, "1", "", ["c1"])
+    assert [r[0] for r in records] == [1, 3, 4]
+    assert all(r[3].startswith("JSON 형식 오류") for r in records[1:])
+
+
+def test_main_writes_report_in_input_order(tmp_path, valid_ids):
+    source = tmp_path / "forms.jsonl"
+    records = [{"studentId": str(2025000 + i), "studentName": "가", "courseIds": valid_ids if i % 2 else valid_ids[1:]}
+               for i in range(7)]
+    source.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+    out = tmp_path / "report.jsonl"
+    code = bulk_validate.main([str(source), "--courses", COURSES_JSON_PATH, "--out", str(out),
+                               "--workers", "2", "--batch-size", "2"])
+    assert code == 1
+    report = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r['line'] for r in report] == list(range(1, 8))
+    assert [r['isValid'] for r in report] == [bool(i % 2) for i in range(7)]
+
+
+def test_main_exits_cleanly_on_bad_courses_file(tmp_path):
+    bad = tmp_path / "courses.json"
+    bad.write_text("{", encoding="utf-8")
+    source = tmp_path / "forms.jsonl"
+    source.write_text("", encoding="utf-8")
+    with pytest.raises(SystemExit) as exc:
+        bulk_validate.main([str(source), "--courses", str(bad)])
+    assert exc.value.code == 2
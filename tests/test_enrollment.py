@@ -0,0 +1,88 @@
+# tests/test_enrollment.py
+# 신청 인원 증분 집계 테스트. (추가된 행과 다시 제출로 제자리에서 바뀐 행)
+import pytest
+
+from enrollment import EnrollmentTracker
+from storage import SHEET_HEADER, SQLiteStorage
+from student_index import StudentRowIndex
+
+
+def make_rows(student_id, course_ids, timestamp, submission_id):
+    rows = []
+    for cid in course_ids:
+        row = [""] * len(SHEET_HEADER)
+        row[SHEET_HEADER.index("Timestamp")] = timestamp
+        row[SHEET_HEADER.index("Student ID")] = student_id
+        row[SHEET_HEADER.index("Course ID")] = cid
+        row[SHEET_HEADER.index("Submission ID")] = submission_id
+        rows.append(row)
+    return rows
+
+
+class CountingStorage(SQLiteStorage):
+    """행을 읽은 횟수와 읽은 행 수를 세는 SQLite 저장소."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.rows_read = 0
+
+    def get_range(self, start_row, end_row):
+        rows = super().get_range(start_row, end_row)
+        self.rows_read += len(rows)
+        return rows
+
+    def get_rows_from(self, start_row):
+        rows = super().get_rows_from(start_row)
+        self.rows_read += len(rows)
+        return rows
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return CountingStorage(str(tmp_path / "rows.sqlite3"))
+
+
+def test_appended_rows_are_read_once(storage, catalog):
+    tracker = EnrollmentTracker(catalog)
+    storage.append_rows(make_rows("1", ["c1", "c2"], "2025-03-04 09:00:00", "a"))
+    assert tracker.refresh(storage) == 2
+    storage.append_rows(make_rows("2", ["c1"], "2025-03-04 09:01:00", "b"))
+    assert tracker.refresh(storage) == 1
+    assert tracker.refresh(storage) == 0
+    snapshot = tracker.snapshot()
+    assert snapshot['courseCounts'] == {'c1': 2, 'c2': 1}
+    assert snapshot['fullReloads'] == 1
+    assert storage.rows_read == 3
+
+
+def test_in_place_resubmission_is_counted_without_resync(storage, catalog):
+    index = StudentRowIndex()
+    tracker = EnrollmentTracker(catalog)
+    index.upsert_many(storage, [("1", make_rows("1", ["c1", "c2", "c3"], "2025-03-04 09:00:00", "a")),
+                                ("2", make_rows("2", ["c1"], "2025-03-04 09:00:01", "b"))])
+    tracker.refresh(storage)
+    assert tracker.snapshot()['courseCounts'] == {'c1': 2, 'c2': 1, 'c3': 1}
+
+    # 학생 1이 c2를 c4로 바꾸고 c3을 빼고 다시 제출: 2~4행이 제자리에서 바뀜
+    index.upsert_many(storage, [("1", make_rows("1", ["c1", "c4"], "2025-03-04 10:00:00", "c"))])
+    storage.rows_read = 0
+    assert tracker.refresh(storage) == 3
+    snapshot = tracker.snapshot()
+    assert snapshot['courseCounts'] == {'c1': 2, 'c4': 1}
+    assert snapshot['fullReloads'] == 1
+    assert storage.rows_read == 3  # 바뀐 행만 읽음
+
+    # 비운 행을 새 학생이 다시 씀
+    index.upsert_many(storage, [("3", make_rows("3", ["c2"], "2025-03-04 10:01:00", "d"))])
+    tracker.refresh(storage)
+    assert tracker.snapshot()['courseCounts'] == {'c1': 2, 'c2': 1, 'c4': 1}
+    assert tracker.snapshot()['studentCount'] == 3
+
+
+def test_resync_after_interval(storage, catalog):
+    tracker = EnrollmentTracker(catalog, resync_seconds=0)
+    storage.append_rows(make_rows("1", ["c1"], "2025-03-04 09:00:00", "a"))
+    tracker.refresh(storage)
+    tracker.refresh(storage)
+    assert tracker.snapshot()['fullReloads'] == 2
+    assert tracker.snapshot()['courseCounts'] == {'c1': 1}
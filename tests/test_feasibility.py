@@ -0,0 +1,87 @@
+# tests/test_feasibility.py
+# 체크박스 안내(feasibility)의 사유와 학점 판정을 전수 탐색과 비교하는 테스트.
+import itertools
+import json
+import random
+
+import pytest
+
+from catalog import build_catalog_from_bytes
+from feasibility import (REASON_ART_MUSIC, REASON_DUPLICATE, REASON_HOURS, REASON_KES, REASON_OTHER_QUOTA,
+                         REASON_QUOTA, get_feasibility_table)
+from helpers import COURSES_JSON_PATH, random_selection
+from validation import REQUIRED_TOTAL_HOURS_MAP, get_rule_engine
+
+SEMESTER = "Y2S1"
+
+
+def quota_groups(catalog, semester_key):
+    return [(name, group) for name, group in catalog.groups(semester_key).items()
+            if not group['isMandatory'] and group['quota'] > 0]
+
+
+def completable(catalog, engine, semester_key, selected):
+    """selected를 포함하고 그룹 정원과 학기 학점을 정확히 맞추는 선택이 있는지 전수 탐색합니다."""
+    choices = []
+    for _, group in quota_groups(catalog, semester_key):
+        picked = [cid for cid in group['courseIds'] if cid in selected]
+        rest = [cid for cid in group['courseIds'] if cid not in selected]
+        if len(picked) > group['quota']:
+            return False
+        choices.append([picked + list(extra) for extra in itertools.combinations(rest, group['quota'] - len(picked))])
+    fixed = [cid for cid in selected if catalog.by_id[cid].get('mandatory', False)]
+    for combo in itertools.product(*choices):
+        ids = fixed + [cid for part in combo for cid in part]
+        if engine.hours(engine.to_mask(ids), semester_key) == REQUIRED_TOTAL_HOURS_MAP[semester_key]:
+            return True
+    return False
+
+
+def test_other_group_over_quota_is_reported_instead_of_hours(catalog):
+    (over_name, over_group), (other_name, other_group) = quota_groups(catalog, SEMESTER)[:2]
+    selected = catalog.initial_selection()
+    selected[SEMESTER].update(over_group['courseIds'][:over_group['quota'] + 1])
+    hints = get_feasibility_table(catalog).hints(selected, SEMESTER)
+    for cid in over_group['courseIds'][over_group['quota'] + 1:]:
+        assert hints[cid] == REASON_QUOTA
+    for cid in other_group['courseIds']:
+        assert hints[cid] in (f"{REASON_OTHER_QUOTA} ({over_name})", REASON_ART_MUSIC, REASON_KES, REASON_DUPLICATE)
+    assert f"{REASON_OTHER_QUOTA} ({over_name})" in hints.values()
+    assert REASON_HOURS not in hints.values()
+
+
+def partial_selection(catalog, rng):
+    """그룹마다 정원 이하의 과목을 무작위로 고른 선택. (아직 학점을 맞출 수 있는지가 과목마다 달라짐)"""
+    selected = catalog.initial_selection()
+    for _, group in quota_groups(catalog, SEMESTER):
+        selected[SEMESTER].update(rng.sample(group['courseIds'], rng.randint(0, group['quota'])))
+    return selected
+
+
+@pytest.fixture(scope="module")
+def mixed_hours_catalog(catalog):
+    """SEMESTER의 두 번째 정원 그룹 과목 학점을 2~5학점으로 바꾼 카탈로그. (실제 카탈로그는 그룹 안 학점이 모두 같음)"""
+    with open(COURSES_JSON_PATH, encoding="utf-8") as f:
+        courses = json.load(f)
+    _, group = quota_groups(catalog, SEMESTER)[1]
+    hours = itertools.cycle([2, 3, 4, 5])
+    new_hours = {cid: next(hours) for cid in group['courseIds']}
+    for course in courses:
+        course['hours'] = new_hours.get(course['id'], course['hours'])
+    return build_catalog_from_bytes(json.dumps(courses, ensure_ascii=False).encode("utf-8"))
+
+
+def test_hours_hints_match_exhaustive_search(mixed_hours_catalog):
+    catalog = mixed_hours_catalog
+    engine = get_rule_engine(catalog)
+    table = get_feasibility_table(catalog)
+    rng = random.Random(17)
+    reasons = set()
+    for selected in [partial_selection(catalog, rng) for _ in range(40)] + [random_selection(catalog, rng) for _ in range(20)]:
+        for cid, reason in table.hints(selected, SEMESTER).items():
+            if reason in (REASON_ART_MUSIC, REASON_KES, REASON_DUPLICATE):
+                continue
+            feasible = completable(catalog, engine, SEMESTER, selected[SEMESTER] | {cid})
+            assert (reason is None) == feasible, (cid, reason, sorted(selected[SEMESTER]))
+            reasons.add(reason)
+    assert {None, REASON_HOURS, REASON_QUOTA} <= reasons
@@ -0,0 +1,46 @@
+# tests/test_pdf_utils.py
+# 캐시한 폰트를 복제해 만든 한글 내역서가 문서마다 add_font로 만든 것과 같은지 확인합니다.
+# (fpdf2 내부 필드가 바뀌어 복제가 조용히 add_font로 대체되거나 결과가 달라지면 실패)
+import pytest
+
+pytest.importorskip("fpdf")
+pytest.importorskip("fontTools")
+
+import pdf_utils
+
+SELECTION = {
+    "y1s1": [{"name": "국어", "hours": 4}, {"name": "수학", "hours": 4}],
+    "y2s2": [{"name": "물리학Ⅰ", "hours": 3}],
+}
+OTHER_SELECTION = {"y3s1": [{"name": "세계사", "hours": 2}]}
+
+
+def render_with_add_font(monkeypatch, name, student_id, selection):
+    with monkeypatch.context() as m:
+        m.setattr(pdf_utils, "_clone_supported", False)
+        return pdf_utils.RegistrationTemplate().render(name, student_id, selection)
+
+
+def test_fonts_load():
+    ok, error = pdf_utils.check_fonts()
+    assert ok or "NanumSquare_acB" in error  # 볼드 파일은 저장소에 없을 수 있음
+    assert "" in pdf_utils._font_prototypes
+
+
+def test_cloned_font_renders_korean_like_add_font(monkeypatch):
+    template = pdf_utils.RegistrationTemplate()
+    cloned = template.render("홍길동", "2025001", SELECTION)
+    assert pdf_utils._clone_supported, "설치된 fpdf2에서 폰트 복제가 실패함"
+    assert cloned.startswith(b"%PDF-")
+    assert b"/FontFile2" in cloned
+    assert pdf_utils.FONT_FAMILY.encode() in cloned
+    assert cloned == render_with_add_font(monkeypatch, "홍길동", "2025001", SELECTION)
+
+
+def test_clones_do_not_share_subsets(monkeypatch):
+    template = pdf_utils.RegistrationTemplate()
+    template.render("홍길동", "2025001", SELECTION)
+    second = template.render("김철수", "2025002", OTHER_SELECTION)
+    assert pdf_utils._clone_supported
+    # 앞 문서에서 쓴 글자가 뒤 문서의 서브셋에 섞이지 않아야 합니다.
+    assert second == render_with_add_font(monkeypatch, "김철수", "2025002", OTHER_SELECTION)
@@ -0,0 +1,124 @@
+# tests/test_rate_limit.py
+# Sheets 호출 속도 제한기(토큰 버킷, 우선순위, 재시도 규칙) 테스트.
+import threading
+import time
+
+import pytest
+
+from rate_limit import PRIORITY_ADMIN, PRIORITY_SUBMIT, READ, WRITE, SheetsRateLimiter, TokenBucket
+
+
+class ApiError(Exception):
+    """gspread APIError처럼 response.status_code를 갖는 오류."""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = type("Response", (), {'status_code': status})()
+
+
+def failing(statuses, result="ok"):
+    """statuses의 상태 코드로 차례로 실패한 뒤 result를 반환하는 호출과, 호출 횟수 목록."""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= len(statuses):
+            raise ApiError(statuses[len(calls) - 1])
+        return result
+    return func, calls
+
+
+def make_limiter(**kwargs):
+    options = dict(reads_per_minute=60_000, writes_per_minute=60_000, burst=10, base_backoff=0.001, max_backoff=0.002)
+    options.update(kwargs)
+    return SheetsRateLimiter(**options)
+
+
+# --- 토큰 버킷 ---
+def test_bucket_spends_burst_then_waits():
+    bucket = TokenBucket(rate=50, capacity=3)
+    assert all(bucket.acquire() < 0.01 for _ in range(3))
+    started = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.01
+
+
+def test_bucket_timeout():
+    bucket = TokenBucket(rate=0.01, capacity=1)
+    bucket.acquire()
+    with pytest.raises(TimeoutError):
+        bucket.acquire(timeout=0.05)
+    assert bucket.queue_depth() == 0
+
+
+def test_bucket_serves_higher_priority_first():
+    bucket = TokenBucket(rate=5, capacity=1)
+    bucket.acquire()
+    order = []
+
+    def take(priority, name):
+        bucket.acquire(priority)
+        order.append(name)
+
+    admin = threading.Thread(target=take, args=(PRIORITY_ADMIN, "admin"))
+    admin.start()
+    while bucket.queue_depth() < 1:
+        time.sleep(0.001)
+    submit = threading.Thread(target=take, args=(PRIORITY_SUBMIT, "submit"))
+    submit.start()
+    admin.join()
+    submit.join()
+    assert order == ["submit", "admin"]
+
+
+def test_pause_empties_bucket():
+    bucket = TokenBucket(rate=1000, capacity=5)
+    bucket.pause(0.05)
+    started = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.04
+
+
+# --- 재시도 ---
+def test_retries_rate_limit_and_server_errors():
+    limiter = make_limiter()
+    func, calls = failing([429, 503])
+    assert limiter.call(READ, func) == "ok"
+    assert len(calls) == 3
+    assert limiter.stats()[READ]['retries'] == 2
+
+
+def test_non_idempotent_write_retries_only_rate_limit():
+    limiter = make_limiter()
+    func, calls = failing([503])
+    with pytest.raises(ApiError):
+        limiter.call(WRITE, func, idempotent=False)
+    assert len(calls) == 1
+    func, calls = failing([429])
+    assert limiter.call(WRITE, func, idempotent=False) == "ok"
+    assert len(calls) == 2
+
+
+def test_client_errors_are_not_retried():
+    limiter = make_limiter()
+    func, calls = failing([400])
+    with pytest.raises(ApiError):
+        limiter.call(READ, func)
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_retries():
+    limiter = make_limiter(max_retries=2)
+    func, calls = failing([429] * 5)
+    with pytest.raises(ApiError):
+        limiter.call(READ, func)
+    assert len(calls) == 3
+
+
+def test_retry_time_is_capped():
+    limiter = make_limiter(base_backoff=10.0, max_backoff=10.0, max_retry_seconds=0.05)
+    func, calls = failing([429] * 50)
+    started = time.monotonic()
+    with pytest.raises(ApiError):
+        limiter.call(READ, func)
+    assert time.monotonic() - started < 1.0
@@ -0,0 +1,39 @@
+# tests/test_recommend.py
+# 추천기 테스트.
+import random
+
+from helpers import random_selection
+from recommend import Recommender
+
+
+def test_recommendations_pass_is_valid_mask(catalog, engine):
+    recommender = Recommender(catalog, time_budget=10.0)  # 느린 환경에서도 같은 답이 나오도록 시간 상한은 넉넉히
+    rng = random.Random(11)
+    for _ in range(30):
+        selected = random_selection(catalog, rng)
+        results = recommender.recommend(selected)
+        assert results
+        distances = [r['distance'] for r in results]
+        assert distances == sorted(distances)
+        for result in results:
+            assert engine.is_valid_mask(engine.to_mask(result['courseIds']))
+
+
+def test_search_stops_at_node_budget(catalog, engine):
+    selected = random_selection(catalog, random.Random(3))
+    full = Recommender(catalog, time_budget=10.0).recommend(selected)
+    for node_budget in (1, 50, 500):
+        results = Recommender(catalog, node_budget=node_budget, time_budget=10.0).recommend(selected)
+        # 상한에 걸려도 찾은 답은 모두 유효하고, 끝까지 탐색한 답보다 가깝지 않습니다.
+        for result, best in zip(results, full):
+            assert engine.is_valid_mask(engine.to_mask(result['courseIds']))
+            assert result['distance'] >= best['distance']
+
+
+def test_unavailable_courses_are_not_added(catalog):
+    recommender = Recommender(catalog, time_budget=10.0)
+    selected = random_selection(catalog, random.Random(5))
+    first = recommender.recommend(selected, k=1)[0]
+    banned = first['add'][:1]
+    for result in recommender.recommend(selected, unavailable=banned):
+        assert not set(banned) & set(result['add'])
@@ -0,0 +1,91 @@
+# tests/test_record_codec.py
+# compact 형식의 과목 집합 부호화와 카탈로그 버전별 풀기 테스트.
+import base64
+import json
+import os
+
+import pytest
+
+from catalog import CatalogWatcher, catalog_archive_dir, load_archived_catalog
+from record_codec import catalog_resolver, compact_row, decode_courses, encode_courses, expand_compact_row, iter_long_rows
+from storage import COMPACT_HEADER, SQLiteStorage
+
+
+def test_codec_round_trip(catalog):
+    assert encode_courses(catalog, ['c5', 'c1']) == "m1:EQ"
+    assert decode_courses(catalog, "m1:EQ") == ['c1', 'c5']
+
+
+def test_codec_empty_list(catalog):
+    encoded = encode_courses(catalog, [])
+    assert encoded.startswith("m1:")
+    assert decode_courses(catalog, encoded) == []
+
+
+def test_codec_unknown_id_falls_back_to_id_list(catalog):
+    encoded = encode_courses(catalog, ['c1', 'zz99'])
+    assert encoded == "i1:c1 zz99"
+    assert decode_courses(catalog, encoded) == ['c1', 'zz99']
+
+
+def test_codec_rejects_mask_larger_than_catalog(catalog):
+    mask = 1 << len(catalog.courses)  # 카탈로그에 없는 위치의 비트
+    raw = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    with pytest.raises(ValueError):
+        decode_courses(catalog, "m1:" + base64.urlsafe_b64encode(raw).decode('ascii').rstrip("="))
+
+
+# --- 카탈로그 버전 보관과 compact 행 풀기 ---
+def write_courses(path, courses):
+    path.write_text(json.dumps(courses, ensure_ascii=False), encoding="utf-8")
+
+
+def test_watcher_archives_versions_for_later_decoding(tmp_path, catalog):
+    courses_path = tmp_path / "courses.json"
+    original = [dict(c) for c in catalog.courses]
+    write_courses(courses_path, original)
+    old = CatalogWatcher(str(courses_path), interval=3600).current
+    row = compact_row("t", "가", "2025001", old, ['c1', 'c5']) + ["sid"]
+
+    # 과목 순서가 바뀐 새 버전으로 교체된 뒤, 새로 띄운 프로세스(새 감시자)에서 옛 행을 풂
+    write_courses(courses_path, list(reversed(original)))
+    watcher = CatalogWatcher(str(courses_path), interval=3600)
+    assert watcher.current.version != old.version
+    assert os.path.exists(os.path.join(catalog_archive_dir(str(courses_path)), f"{old.version}.json"))
+    assert [r[3] for r in expand_compact_row(row, watcher.get)] == ['c1', 'c5']
+    resolve = catalog_resolver(watcher.current, archive_dir=catalog_archive_dir(str(courses_path)))
+    assert [r[3] for r in expand_compact_row(row, resolve)] == ['c1', 'c5']
+
+
+def test_watcher_keeps_only_recent_versions_in_memory(tmp_path, catalog):
+    courses_path = tmp_path / "courses.json"
+    original = [dict(c) for c in catalog.courses]
+    write_courses(courses_path, original)
+    watcher = CatalogWatcher(str(courses_path), interval=3600, max_versions=2)
+    versions = [watcher.current.version]
+    for size in (len(original) - 1, len(original) - 2):
+        write_courses(courses_path, original[:size])
+        assert watcher._check()
+        versions.append(watcher.current.version)
+    assert list(watcher._versions) == versions[1:]
+
+    # 내보낸 버전은 보관본에서 다시 읽고, 현재 버전은 내보내지 않습니다.
+    assert watcher.get(versions[0]).version == versions[0]
+    assert list(watcher._versions) == [versions[2], versions[0]]
+    assert watcher.get(versions[1]).version == versions[1]
+    assert list(watcher._versions) == [versions[2], versions[1]]
+    assert watcher.current.version == versions[2]
+
+
+def test_archive_lookup_rejects_path_like_versions(tmp_path):
+    assert load_archived_catalog("../courses", str(tmp_path)) is None
+    assert load_archived_catalog("0123456789ab", str(tmp_path)) is None
+
+
+def test_unknown_version_stops_long_rows(tmp_path, catalog):
+    storage = SQLiteStorage(str(tmp_path / "rows.sqlite3"), COMPACT_HEADER)
+    storage.append_rows([compact_row("t", "가", "2025001", catalog, ['c1']) + ["a"],
+                         ["t", "나", "2025002", "v:ffffffffffff", "m1:AQ", "b"]])
+    resolve = catalog_resolver(catalog, archive_dir=str(tmp_path / "catalog_versions"))
+    with pytest.raises(LookupError):
+        list(iter_long_rows(storage, resolve))
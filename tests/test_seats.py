@@ -0,0 +1,43 @@
+# tests/test_seats.py
+# 좌석 장부의 확정/반환 테스트.
+import pytest
+
+from seats import SeatLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = SeatLedger(str(tmp_path / "seats.sqlite3"))
+    ledger.sync_capacities({'c1': 1, 'c2': 2})
+    return ledger
+
+
+def test_seat_confirm_takes_and_moves_seats(ledger):
+    assert ledger.reserve('c1', "session-a")
+    assert ledger.confirm("session-a", "2025001", ['c1', 'c2']) == []
+    assert ledger.remaining() == {'c1': 0, 'c2': 1}
+    # 다시 제출에서 빠진 과목의 확정 좌석은 반환됩니다.
+    assert ledger.confirm("session-a", "2025001", ['c1']) == []
+    assert ledger.remaining() == {'c1': 0, 'c2': 2}
+
+
+def test_seat_confirm_rolls_back_when_a_course_is_full(ledger):
+    assert ledger.confirm("session-a", "2025001", ['c1']) == []
+    assert not ledger.reserve('c1', "session-b")
+    assert ledger.confirm("session-b", "2025002", ['c2', 'c1']) == ['c1']
+    # 실패한 제출은 다른 과목(c2)의 좌석도 잡지 않습니다.
+    assert ledger.remaining() == {'c1': 0, 'c2': 2}
+
+
+def test_confirming_rolls_back_when_the_block_fails(ledger):
+    assert ledger.confirm("session-a", "2025001", ['c1']) == []
+    assert ledger.reserve('c2', "session-a")
+    with pytest.raises(RuntimeError):
+        with ledger.confirming("session-a", "2025001", ['c2']) as failed:
+            assert failed == []
+            raise RuntimeError("접수 실패")
+    # 이전 확정 좌석(c1)과 임시 좌석(c2)이 그대로 남습니다.
+    assert ledger.remaining() == {'c1': 0, 'c2': 1}
+    assert not ledger.reserve('c1', "session-b")
+    assert ledger.confirm("session-a", "2025001", ['c2']) == []
+    assert ledger.remaining() == {'c1': 1, 'c2': 1}
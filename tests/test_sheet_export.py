@@ -0,0 +1,97 @@
+# tests/test_sheet_export.py
+# 내보내기 도구의 재시도 범위와 동시 신청 집계 테스트.
+import csv
+import itertools
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import numpy as np
+
+import sheet_export
+
+
+class FlakyStorage:
+    """처음 몇 번은 주어진 오류를 내고, 그다음부터 행을 돌려주는 저장소."""
+
+    def __init__(self, error, failures=1):
+        self.error = error
+        self.failures = failures
+        self.calls = 0
+
+    def get_range(self, start_row, end_row):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return [["row"]]
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = FakeResponse(status_code)
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(sheet_export.time, "sleep", lambda seconds: None)
+
+
+@pytest.mark.parametrize("error", [FakeAPIError(429), FakeAPIError(503), ConnectionResetError(), TimeoutError()])
+def test_read_range_retries_transient_errors(error):
+    storage = FlakyStorage(error, failures=2)
+    assert sheet_export.read_range_with_retry(storage, 2, 3) == [["row"]]
+    assert storage.calls == 3
+
+
+@pytest.mark.parametrize("error", [FakeAPIError(400), FakeAPIError(403), ValueError("bad range"), KeyError("x")])
+def test_read_range_does_not_retry_other_errors(error):
+    storage = FlakyStorage(error)
+    with pytest.raises(type(error)):
+        sheet_export.read_range_with_retry(storage, 2, 3)
+    assert storage.calls == 1
+
+
+def test_read_range_gives_up_after_retries():
+    storage = FlakyStorage(FakeAPIError(503), failures=10)
+    with pytest.raises(FakeAPIError):
+        sheet_export.read_range_with_retry(storage, 2, 3, retries=2)
+    assert storage.calls == 3
+
+
+def test_coenrollment_counts_pairs_of_latest_submissions(tmp_path, catalog):
+    rng = np.random.default_rng(7)
+    course_ids = [c['id'] for c in catalog.courses][:12]
+    accumulator = sheet_export.RollupAccumulator()
+    latest = {}
+    for student in range(40):
+        for submission in range(2):  # 두 번째 제출만 집계에 들어가야 함
+            chosen = sorted(rng.choice(course_ids, size=int(rng.integers(0, 6)), replace=False))
+            timestamp = f"2025-03-0{submission + 1} 09:00:00"
+            for cid in chosen:
+                course = catalog.by_id[cid]
+                accumulator.add(str(student), cid, course['group'], course['year'], course['semester'],
+                                timestamp, f"s{student}-{submission}")
+            if chosen:
+                latest[str(student)] = chosen
+    accumulator.write_rollups(str(tmp_path), catalog)
+
+    expected = Counter(pair for chosen in latest.values() for pair in itertools.combinations(chosen, 2))
+    with open(tmp_path / "coenrollment_pairs.csv", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))[1:]
+    actual = Counter()
+    for a, b, count in rows:
+        actual[tuple(sorted((a, b)))] = int(count)
+    assert actual == Counter({tuple(sorted(pair)): n for pair, n in expected.items()})
+
+    saved = np.load(tmp_path / "coenrollment.npz")
+    assert (saved['pair_rows'] < saved['pair_cols']).all()
+    assert saved['pair_counts'].sum() == sum(expected.values())
+    assert saved['enrollment'].sum() == sum(len(chosen) for chosen in latest.values())
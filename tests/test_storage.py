@@ -0,0 +1,82 @@
+# tests/test_storage.py
+# 저장소 인터페이스와 SQLite 구현이 시트와 같은 행 의미를 갖는지 확인하는 테스트.
+import pytest
+
+from storage import (COMPACT_HEADER, SHEET_HEADER, SQLiteStorage, StorageBackend, iter_rows, open_storage,
+                     storage_format)
+
+
+def make_row(student_id, course_id):
+    row = [""] * len(SHEET_HEADER)
+    row[SHEET_HEADER.index("Student ID")] = student_id
+    row[SHEET_HEADER.index("Course ID")] = course_id
+    return row
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SQLiteStorage(str(tmp_path / "rows.sqlite3"))
+
+
+def test_backend_requires_every_method():
+    class Partial(StorageBackend):
+        def append_rows(self, rows):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_new_storage_has_header_row(storage):
+    assert storage.count_rows() == 1
+    assert storage.get_range(1, 1) == [SHEET_HEADER]
+    assert storage.get_rows_from(2) == []
+
+
+def test_append_and_read_rows(storage):
+    storage.append_rows([make_row("1", "c1"), make_row("2", "c2")[:4]])
+    assert storage.count_rows() == 3
+    assert storage.get_range(3, 3) == [make_row("2", "c2")]  # 짧은 행은 빈 셀로 채움
+    assert storage.col_values(SHEET_HEADER.index("Course ID") + 1) == ["Course ID", "c1", "c2"]
+    assert storage.get_range(3, 2) == []
+
+
+def test_upsert_student_replaces_rows_and_shifts_later_rows(storage):
+    storage.append_rows([make_row("1", "c1"), make_row("1", "c2"), make_row("2", "c3")])
+    assert storage.upsert_student("1", [make_row("1", "c4")]) == (2, 1)
+    course_col = SHEET_HEADER.index("Course ID") + 1
+    assert storage.col_values(course_col) == ["Course ID", "c3", "c4"]
+
+
+def test_write_cells_updates_and_extends(storage):
+    storage.append_rows([make_row("1", "c1")])
+    course_col = SHEET_HEADER.index("Course ID") + 1
+    storage.write_cells([(2, course_col, ["c9"]), (4, 1, ["t"])])
+    assert storage.get_range(2, 2)[0][course_col - 1] == "c9"
+    assert storage.count_rows() == 4
+    assert storage.get_range(4, 4)[0][0] == "t"
+
+
+def test_iter_rows_reads_in_chunks(storage):
+    storage.append_rows([make_row(str(i), "c1") for i in range(5)])
+    assert [row_no for row_no, _ in iter_rows(storage, chunk_rows=2)] == [2, 3, 4, 5, 6]
+
+
+def test_open_storage_urls(tmp_path):
+    path = tmp_path / "rows.sqlite3"
+    assert open_storage(f"sqlite://{path}").path == str(path)
+    assert open_storage(f"sqlite://{path}.compact?format=compact").header == COMPACT_HEADER
+    assert storage_format("sqlite:x.db?format=compact") == "compact"
+    with pytest.raises(ValueError):
+        storage_format("sqlite:x.db?format=wide")
+    with pytest.raises(ValueError):
+        open_storage("gsheets://sheet-id/Sheet1")  # 서비스 계정 정보 없음
+    with pytest.raises(ValueError):
+        open_storage("ftp://example")
+
+
+def test_reopening_with_other_format_fails(tmp_path):
+    path = str(tmp_path / "rows.sqlite3")
+    SQLiteStorage(path)
+    with pytest.raises(ValueError):
+        SQLiteStorage(path, COMPACT_HEADER)
@@ -0,0 +1,93 @@
+# tests/test_storage_header.py
+# 이전 long 형식 헤더를 가진 저장소를 여는 시점의 확인/이전 테스트.
+import json
+import sqlite3
+
+import pytest
+
+from storage import (LEGACY_SHEET_HEADER, SHEET_HEADER, GspreadStorage, SQLiteStorage)
+
+BASELINE_HEADER = ["Timestamp", "Student Name", "Student ID", "Course ID", "Course Name", "Year", "Semester", "Hours"]
+BASELINE_ROW = ["2025-03-02 09:00:00", "홍길동", "2025001", "c1", "국어", "1", "1", "4"]
+
+
+def make_sqlite(path, rows):
+    """SQLiteStorage와 같은 표에 헤더와 행을 그대로 넣어 둡니다. (이전 버전이 만든 저장소 흉내)"""
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE sheet_rows (id INTEGER PRIMARY KEY AUTOINCREMENT, student_id TEXT, cells TEXT NOT NULL)")
+    conn.executemany("INSERT INTO sheet_rows (student_id, cells) VALUES (?, ?)",
+                     [(None if i == 0 else r[2], json.dumps(r, ensure_ascii=False)) for i, r in enumerate(rows)])
+    conn.commit()
+    conn.close()
+
+
+def test_legacy_header_is_the_baseline_header():
+    assert LEGACY_SHEET_HEADER == BASELINE_HEADER
+
+
+# --- SQLite ---
+def test_sqlite_migrates_baseline_header(tmp_path):
+    path = tmp_path / "rows.sqlite3"
+    make_sqlite(path, [BASELINE_HEADER, BASELINE_ROW])
+    storage = SQLiteStorage(str(path))
+    assert storage.get_range(1, 1) == [SHEET_HEADER]
+    assert storage.get_range(2, 2) == [BASELINE_ROW + ["", ""]]
+
+
+def test_sqlite_current_header_is_left_alone(tmp_path):
+    path = tmp_path / "rows.sqlite3"
+    row = BASELINE_ROW + ["v:1", "abc"]
+    make_sqlite(path, [SHEET_HEADER, row])
+    storage = SQLiteStorage(str(path))
+    assert storage.get_range(1, 2) == [SHEET_HEADER, row]
+
+
+def test_sqlite_rejects_unknown_header(tmp_path):
+    path = tmp_path / "rows.sqlite3"
+    make_sqlite(path, [BASELINE_HEADER + ["Submission ID"], BASELINE_ROW + ["abc"]])
+    with pytest.raises(ValueError):
+        SQLiteStorage(str(path))
+
+
+# --- Google Sheets ---
+class FakeWorksheet:
+    """GspreadStorage가 헤더 이전에 쓰는 워크시트 메서드만 흉내 냅니다."""
+
+    def __init__(self, header, col_count):
+        self.id = 0
+        self.col_count = col_count
+        self.cells = {(1, i + 1): v for i, v in enumerate(header)}
+
+    def row_values(self, row):
+        values = [self.cells.get((row, c), "") for c in range(1, self.col_count + 1)]
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def add_cols(self, count):
+        self.col_count += count
+
+    def batch_update(self, data, value_input_option=None):
+        for item in data:
+            start = item['range'].split(":")[0]
+            col = ord(start[0]) - 64
+            row = int(start[1:])
+            for offset, value in enumerate(item['values'][0]):
+                assert col + offset <= self.col_count, "격자 밖에 씀"
+                self.cells[(row, col + offset)] = value
+
+
+@pytest.mark.parametrize("col_count", [8, 10, 26])
+def test_gsheets_migrates_baseline_header(col_count):
+    worksheet = FakeWorksheet(BASELINE_HEADER, col_count)
+    storage = GspreadStorage(worksheet)
+    assert storage.needs_header_migration()
+    assert storage.migrate_legacy_header()
+    assert worksheet.row_values(1) == SHEET_HEADER
+    assert not storage.needs_header_migration()
+    assert not storage.migrate_legacy_header()
+
+
+def test_gsheets_current_header_needs_no_migration():
+    storage = GspreadStorage(FakeWorksheet(SHEET_HEADER, 10))
+    assert not storage.needs_header_migration()
@@ -0,0 +1,163 @@
+# tests/test_student_index.py
+# 학번 색인과 바뀐 셀만 쓰는 학생별 덮어쓰기 테스트.
+import pytest
+
+from storage import SHEET_HEADER, STUDENT_ID_COLUMN, GspreadStorage, SQLiteStorage
+from student_index import StudentRowIndex
+
+COURSE = SHEET_HEADER.index("Course ID")
+TIMESTAMP = SHEET_HEADER.index("Timestamp")
+
+
+def make_rows(student_id, course_ids, timestamp="t1"):
+    rows = []
+    for cid in course_ids:
+        row = [""] * len(SHEET_HEADER)
+        row[TIMESTAMP] = timestamp
+        row[STUDENT_ID_COLUMN - 1] = student_id
+        row[COURSE] = cid
+        rows.append(row)
+    return rows
+
+
+class RecordingStorage(SQLiteStorage):
+    """write_cells로 보낸 변경을 기록해 두는 SQLite 저장소."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.writes = []
+
+    def write_cells(self, updates):
+        self.writes.append(list(updates))
+        super().write_cells(updates)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return RecordingStorage(str(tmp_path / "rows.sqlite3"))
+
+
+def courses_by_row(storage):
+    return {row_no: (row[STUDENT_ID_COLUMN - 1], row[COURSE])
+            for row_no, row in enumerate(storage.get_rows_from(2), start=2)}
+
+
+def test_first_submissions_go_to_the_end_in_one_write(storage):
+    index = StudentRowIndex()
+    index.upsert_many(storage, [("1", make_rows("1", ["c1", "c2"])), ("2", make_rows("2", ["c3"]))])
+    assert len(storage.writes) == 1
+    assert courses_by_row(storage) == {2: ("1", "c1"), 3: ("1", "c2"), 4: ("2", "c3")}
+
+
+def test_resubmission_writes_only_changed_cells(storage):
+    index = StudentRowIndex()
+    index.upsert_many(storage, [("1", make_rows("1", ["c1", "c2"]))])
+    index.upsert_many(storage, [("1", make_rows("1", ["c1", "c2"], timestamp="t2"))])
+    # 과목은 그대로이므로 두 행의 타임스탬프 셀만 씁니다.
+    assert storage.writes[-1] == [(2, TIMESTAMP + 1, ["t2"]), (3, TIMESTAMP + 1, ["t2"])]
+
+
+def test_dropped_course_rows_are_reused_then_cleared(storage):
+    index = StudentRowIndex()
+    index.upsert_many(storage, [("1", make_rows("1", ["c1", "c2", "c3"])), ("2", make_rows("2", ["c9"]))])
+    # c2 → c4로 바꾸고 c3은 뺌: c2 행을 c4가 이어 쓰고 c3 행은 비움
+    index.upsert_many(storage, [("1", make_rows("1", ["c1", "c4"]))])
+    assert courses_by_row(storage) == {2: ("1", "c1"), 3: ("1", "c4"), 4: ("", ""), 5: ("2", "c9")}
+    # 비운 행은 다음 새 학생이 먼저 씁니다.
+    index.upsert_many(storage, [("3", make_rows("3", ["c5"]))])
+    assert courses_by_row(storage)[4] == ("3", "c5")
+
+
+def test_last_submission_per_student_wins_within_a_batch(storage):
+    index = StudentRowIndex()
+    index.upsert_many(storage, [("1", make_rows("1", ["c1"])), ("1", make_rows("1", ["c2"]))])
+    assert courses_by_row(storage) == {2: ("1", "c2")}
+
+
+def test_failed_write_invalidates_index(storage):
+    index = StudentRowIndex()
+    index.upsert_many(storage, [("1", make_rows("1", ["c1"]))])
+
+    def fence():
+        raise RuntimeError("임대 상실")
+
+    with pytest.raises(RuntimeError):
+        index.upsert_many(storage, [("2", make_rows("2", ["c2"]))], fence=fence)
+    assert courses_by_row(storage) == {2: ("1", "c1")}
+    index.upsert_many(storage, [("2", make_rows("2", ["c2"]))])  # 저장소를 다시 읽어 색인을 새로 만듦
+    assert courses_by_row(storage) == {2: ("1", "c1"), 3: ("2", "c2")}
+
+
+# --- Google Sheets 구현 ---
+class FakeSpreadsheet:
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+
+    def fetch_sheet_metadata(self):
+        self.worksheet.calls.append("fetch_sheet_metadata")
+        return {'sheets': [{'properties': {'sheetId': self.worksheet.id,
+                                           'gridProperties': {'rowCount': self.worksheet.grid_rows}}}]}
+
+
+class FakeWorksheet:
+    """GspreadStorage가 쓰는 워크시트 메서드를 메모리 위의 행 목록으로 흉내 냅니다. (격자 밖 쓰기는 오류)"""
+
+    def __init__(self, grid_rows):
+        self.id = 7
+        self.rows = [list(SHEET_HEADER)]
+        self.grid_rows = grid_rows
+        self.row_count = grid_rows  # gspread처럼 연 시점의 값 (직접 바꾸지 않음)
+        self.spreadsheet = FakeSpreadsheet(self)
+        self.calls = []
+
+    def get(self, range_name):
+        self.calls.append("get")
+        start, _, end = range_name.partition(":")
+        start_row = int(start[1:])
+        end_row = int(end[1:]) if end[1:] else len(self.rows)
+        return [list(r) for r in self.rows[start_row - 1:end_row]]
+
+    def col_values(self, col):
+        self.calls.append(f"col_values:{col}")
+        return [r[col - 1] if col <= len(r) else "" for r in self.rows]
+
+    def append_rows(self, values, value_input_option=None):
+        self.rows.extend(list(v) for v in values)
+        self.grid_rows = max(self.grid_rows, len(self.rows))  # 시트가 격자를 알아서 늘림
+
+    def add_rows(self, count):
+        self.calls.append("add_rows")
+        self.grid_rows += count
+
+    def batch_update(self, data, value_input_option=None):
+        for item in data:
+            start = item['range'].split(":")[0]
+            col = ord(start[0]) - 64
+            row = int(start[1:])
+            assert row <= self.grid_rows, "격자 밖에 씀"
+            while len(self.rows) < row:
+                self.rows.append([""] * len(SHEET_HEADER))
+            for offset, value in enumerate(item['values'][0]):
+                self.rows[row - 1][col - 1 + offset] = value
+
+
+def test_gsheets_ensure_rows_rereads_grid_size():
+    worksheet = FakeWorksheet(grid_rows=5)
+    storage = GspreadStorage(worksheet)
+    storage.append_rows(make_rows("1", [f"c{i}" for i in range(10)]))  # 격자가 11행으로 늘어남
+    storage.ensure_rows(11)
+    assert "add_rows" not in worksheet.calls  # 연 시점의 row_count(5)가 아니라 다시 읽은 크기로 판단
+    storage.ensure_rows(12)
+    assert worksheet.grid_rows >= 12
+    calls = len(worksheet.calls)
+    storage.ensure_rows(12)
+    assert len(worksheet.calls) == calls  # 이미 늘린 크기 안이면 다시 읽지 않음
+
+
+def test_gsheets_upsert_student_uses_the_index():
+    worksheet = FakeWorksheet(grid_rows=3)
+    storage = GspreadStorage(worksheet)
+    assert storage.upsert_student("1", make_rows("1", ["c1", "c2"])) == (0, 2)
+    assert storage.upsert_student("1", make_rows("1", ["c2"], timestamp="t2")) == (2, 1)
+    assert [r[COURSE] for r in worksheet.rows[1:]] == ["", "c2"]
+    assert f"col_values:{STUDENT_ID_COLUMN}" not in worksheet.calls
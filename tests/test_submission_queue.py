@@ -0,0 +1,113 @@
+# tests/test_submission_queue.py
+# 제출 큐의 접수/묶음/임대 세대와 플러셔의 기록 테스트.
+import pytest
+
+from storage import SHEET_HEADER, STUDENT_ID_COLUMN, open_storage
+from submission_queue import (FLUSHER_LEASE_NAME, STATUS_DONE, STATUS_INFLIGHT, STATUS_PENDING, LeaseLost, QueueFlusher,
+                              SubmissionQueue)
+
+
+def make_row(student_id, course_id="c1"):
+    row = [""] * (len(SHEET_HEADER) - 1)  # 접수번호 열은 큐가 붙임
+    row[STUDENT_ID_COLUMN - 1] = student_id
+    row[SHEET_HEADER.index("Course ID")] = course_id
+    return row
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SubmissionQueue(str(tmp_path / "queue.sqlite3"))
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return open_storage("sqlite://" + str(tmp_path / "rows.sqlite3"))
+
+
+# --- 큐 ---
+def test_claim_batch_keeps_order_and_row_limit(queue):
+    first = queue.enqueue("2025001", "가", [make_row("2025001", "c1"), make_row("2025001", "c2")])
+    second = queue.enqueue("2025002", "나", [make_row("2025002")])
+    batch_id, batch = queue.claim_batch(max_rows=2)
+    assert batch_id and [sid for sid, _ in batch] == [first]
+    assert batch[0][1][0][-1] == first  # 행 끝에 접수번호
+    assert queue.status(first)['status'] == STATUS_INFLIGHT
+    _, batch = queue.claim_batch(max_rows=2)
+    assert [sid for sid, _ in batch] == [second]
+    assert queue.claim_batch(max_rows=2) == (None, [])
+
+
+def test_release_returns_to_pending_and_superseded(queue):
+    old = queue.enqueue("2025001", "가", [make_row("2025001")])
+    new = queue.enqueue("2025001", "가", [make_row("2025001", "c2")])
+    queue.claim_batch(max_rows=1)
+    queue.release([old], "실패")
+    assert queue.status(old)['status'] == STATUS_PENDING
+    queue.mark_done([new])
+    assert queue.superseded([old, new]) == [old]
+
+
+def test_lease_generation_changes_with_owner(queue):
+    assert queue.acquire_lease("x", "a", 60) == 1
+    assert queue.acquire_lease("x", "b", 60) is None
+    assert queue.acquire_lease("x", "a", 60) == 1  # 같은 주인의 연장
+    queue.acquire_lease("x", "a", -1)  # 만료시킴
+    assert queue.renew_lease("x", "a", 1, 60)  # 아무도 가져가지 않았으면 연장 가능
+    queue.acquire_lease("x", "a", -1)
+    assert queue.acquire_lease("x", "b", 60) == 2
+    assert not queue.renew_lease("x", "a", 1, 60)
+
+
+# --- 플러셔 ---
+def test_flush_writes_latest_submission_per_student(queue, storage):
+    flusher = QueueFlusher(queue, lambda: storage)
+    assert flusher._hold_lease()
+    queue.enqueue("2025001", "가", [make_row("2025001", "c1")])
+    latest = queue.enqueue("2025001", "가", [make_row("2025001", "c2"), make_row("2025001", "c3")])
+    assert flusher.flush_once()
+    rows = storage.get_rows_from(2)
+    assert [row[SHEET_HEADER.index("Course ID")] for row in rows] == ["c2", "c3"]
+    assert {row[-1] for row in rows} == {latest}
+
+
+def test_flush_stops_when_lease_is_taken(queue, storage):
+    flusher = QueueFlusher(queue, lambda: storage)
+    assert flusher._hold_lease()
+    sid = queue.enqueue("2025001", "가", [make_row("2025001")])
+    # 임대가 만료된 사이 다른 프로세스의 플러셔가 가져감
+    queue.acquire_lease(FLUSHER_LEASE_NAME, flusher.owner, -1)
+    assert queue.acquire_lease(FLUSHER_LEASE_NAME, "other", 60) is not None
+    with pytest.raises(LeaseLost):
+        flusher.flush_once()
+    assert storage.count_rows() == 1  # 헤더만
+    assert queue.status(sid)['status'] == STATUS_PENDING
+
+
+class FlakySink:
+    """기록은 되었지만 응답을 받지 못한 것처럼 첫 write_cells에서 시간 초과를 올립니다."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.fail = True
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def write_cells(self, updates):
+        self.inner.write_cells(updates)
+        if self.fail:
+            self.fail = False
+            raise TimeoutError("read timed out")
+
+
+def test_ambiguous_failure_is_reconciled_without_resending(queue, storage):
+    sink = FlakySink(storage)
+    flusher = QueueFlusher(queue, lambda: sink)
+    assert flusher._hold_lease()
+    sid = queue.enqueue("2025001", "가", [make_row("2025001")])
+    with pytest.raises(TimeoutError):
+        flusher.flush_once()
+    assert queue.status(sid)['status'] == STATUS_INFLIGHT
+    flusher.reconcile_failed()
+    assert queue.status(sid)['status'] == STATUS_DONE
+    assert storage.count_rows() == 2
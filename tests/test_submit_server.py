@@ -0,0 +1,103 @@
+# tests/test_submit_server.py
+# 제출 API(SubmissionService.submit)의 입력 검사, 규칙 검사, 정원, 접수번호 중복 처리 테스트.
+# (카탈로그 버전 보관 디렉터리가 저장소에 생기지 않도록 courses.json 사본을 씁니다)
+import json
+
+import pytest
+
+from helpers import COURSES_JSON_PATH
+from submit_server import SubmissionService
+
+SUBMISSION_ID = "0123456789abcdef"
+
+
+def make_service(tmp_path, capacities=None):
+    with open(COURSES_JSON_PATH, encoding="utf-8") as f:
+        courses = json.load(f)
+    for course in courses:
+        if course['id'] in (capacities or {}):
+            course['capacity'] = capacities[course['id']]
+    courses_path = tmp_path / "courses.json"
+    courses_path.write_text(json.dumps(courses, ensure_ascii=False), encoding="utf-8")
+    return SubmissionService("sqlite://" + str(tmp_path / "rows.sqlite3"), None,
+                             queue_path=str(tmp_path / "queue.sqlite3"),
+                             seat_ledger_path=str(tmp_path / "seats.sqlite3"),
+                             courses_path=str(courses_path))
+
+
+@pytest.fixture
+def service(tmp_path):
+    return make_service(tmp_path)
+
+
+@pytest.fixture
+def payload(service, valid_ids):
+    return {"studentName": "홍길동", "studentId": "2025001", "courseIds": list(valid_ids),
+            "catalogVersion": service.watcher.current.version, "submissionId": SUBMISSION_ID}
+
+
+@pytest.mark.parametrize("change", [
+    {"studentName": ""},
+    {"studentId": "   "},
+    {"studentId": "1" * 100},
+    {"courseIds": "c1,c2"},
+    {"courseIds": ["c1", 2]},
+    {"submissionId": "xyz"},
+    {"submissionId": "0123456789ABCDEG"},
+    {"submissionId": 123},
+])
+def test_submit_rejects_bad_input(service, payload, change):
+    status, body = service.submit(dict(payload, **change))
+    assert status == 400
+    assert "error" in body
+    assert service.queue.status(SUBMISSION_ID) is None
+
+
+def test_submit_rejects_non_object(service):
+    assert service.submit(["홍길동"])[0] == 400
+
+
+def test_submit_reports_rule_errors(service, payload):
+    status, body = service.submit(dict(payload, courseIds=payload["courseIds"][1:] + ["zz99"]))
+    assert status == 422
+    assert not body["isValid"]
+    assert "알 수 없는 과목 ID: zz99" in body["errors"]
+    assert service.queue.status(SUBMISSION_ID) is None
+
+
+def test_submit_queues_valid_selection(service, payload):
+    status, body = service.submit(payload)
+    assert status == 202
+    assert body == {"submissionId": SUBMISSION_ID, "status": "pending", "catalogVersion": payload["catalogVersion"]}
+    queued = service.queue.status(SUBMISSION_ID)
+    assert queued["student_id"] == "2025001"
+    assert queued["status"] == "pending"
+
+
+def test_submit_generates_submission_id_when_missing(service, payload):
+    del payload["submissionId"]
+    status, body = service.submit(payload)
+    assert status == 202
+    assert body["submissionId"] != SUBMISSION_ID
+    assert service.queue.status(body["submissionId"]) is not None
+
+
+def test_repeated_submission_id_is_idempotent(service, payload):
+    assert service.submit(payload)[0] == 202
+    status, body = service.submit(payload)
+    assert status == 200
+    assert body == {"submissionId": SUBMISSION_ID, "status": "pending", "duplicate": True}
+    # 같은 접수번호를 다른 학번으로 쓰면 거절합니다.
+    assert service.submit(dict(payload, studentId="2025002"))[0] == 409
+
+
+def test_submit_rejects_full_courses(tmp_path, valid_ids):
+    full_id = valid_ids[0]
+    service = make_service(tmp_path, {full_id: 1})
+    payload = {"studentName": "홍길동", "studentId": "2025001", "courseIds": list(valid_ids),
+               "catalogVersion": service.watcher.current.version, "submissionId": SUBMISSION_ID}
+    assert service.submit(payload)[0] == 202
+    status, body = service.submit(dict(payload, studentId="2025002", submissionId="fedcba9876543210"))
+    assert status == 409
+    assert [course["id"] for course in body["fullCourses"]] == [full_id]
+    assert service.queue.status("fedcba9876543210") is None
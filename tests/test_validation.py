@@ -0,0 +1,120 @@
+# tests/test_validation.py
+# 규칙 엔진 테스트.
+# 실행: python -m pytest -q (저장소 최상위에서)
+import random
+
+from helpers import by_semester, random_selection
+from recommend import Recommender
+from validation import (ART_MUSIC_COURSE_IDS, EXACT_ART_MUSIC_SELECTION, KES_MAX_COURSE_IDS, MAX_KES_SELECTION,
+                        REQUIRED_TOTAL_HOURS_MAP, validate_record)
+
+
+# --- 규칙 엔진: 기존 streamlit_app.py 검사 코드와 같은 메시지 ---
+def baseline_messages(catalog, selected_by_semester):
+    """규칙 엔진 도입 전 streamlit_app.py의 학기별/전체 검사를 그대로 옮긴 기준 구현입니다.
+
+    (원래 코드는 집합 순회 순서를 따랐으므로, 여기서는 결과가 정해지도록 카탈로그 순서로 순회)
+    """
+    semesters = {}
+    all_selected = set()
+    for semester_key, selected in selected_by_semester.items():
+        all_selected |= selected
+        messages = []
+        for group_name, group_data in catalog.groups(semester_key).items():
+            if not group_data['isMandatory'] and group_data['quota'] > 0:
+                count = sum(1 for c in group_data['courses'] if c['id'] in selected)
+                if count != group_data['quota']:
+                    messages.append(f"❌ '{group_name}' 그룹에서 {group_data['quota']}개를 선택해야 합니다. (현재 {count}개)")
+                else:
+                    messages.append(f"✅ '{group_name}' 그룹 선택 완료 ({count}/{group_data['quota']}개)")
+        hours = sum(catalog.by_id[cid]['hours'] for cid in selected if cid in catalog.by_id)
+        required = REQUIRED_TOTAL_HOURS_MAP[semester_key]
+        if hours != required:
+            messages.append(f"❌ 총 학점이 정확히 {required}학점이어야 합니다. (현재 {hours}학점)")
+        else:
+            messages.append(f"✅ 총 학점 조건 충족! ({hours}/{required}학점)")
+        semesters[semester_key] = messages
+
+    overall = []
+    art_count = sum(1 for cid in all_selected if cid in ART_MUSIC_COURSE_IDS)
+    if art_count != EXACT_ART_MUSIC_SELECTION:
+        overall.append(f"❌ 미술/음악 관련 과목 중 정확히 {EXACT_ART_MUSIC_SELECTION}개를 선택해야 합니다. (현재 {art_count}개)")
+    else:
+        overall.append(f"✅ 미술/음악 과목 선택 조건 충족 ({art_count}/{EXACT_ART_MUSIC_SELECTION}개)")
+    kes_count = sum(1 for cid in all_selected if cid in KES_MAX_COURSE_IDS)
+    if kes_count > MAX_KES_SELECTION:
+        overall.append(f"❌ 지정 국영수 관련 과목 중 {MAX_KES_SELECTION}개 이하로 선택해야 합니다. (현재 {kes_count}개)")
+    else:
+        overall.append(f"✅ 국영수 과목 선택 조건 충족 (최대 {MAX_KES_SELECTION}개, 현재 {kes_count}개)")
+    details = [catalog.by_id[cid] for cid in sorted(all_selected, key=catalog.index.get) if cid in catalog.by_id]
+    semesters_by_name = {}
+    for c in details:
+        semesters_by_name.setdefault(c['name'], set()).add(c['semester'])
+    duplicate = None
+    for name, semester_set in semesters_by_name.items():
+        if len(semester_set) > 1:
+            offerings = [f"{c['year']}학년 {c['semester']}학기" for c in details if c['name'] == name]
+            duplicate = f"❌ 과목 '{name}'은(는) 여러 학기에 중복 선택할 수 없습니다. (선택된 시점: {', '.join(offerings)})"
+            overall.append(duplicate)
+            break
+    if not duplicate and details:
+        overall.append("✅ 과목명 중복 선택 조건 충족 (동일 과목명을 다른 학기에 선택하지 않음)")
+    return semesters, overall
+
+
+def duplicated_name_count(catalog, selected_by_semester):
+    semesters_by_name = {}
+    for ids in selected_by_semester.values():
+        for cid in ids:
+            course = catalog.by_id[cid]
+            semesters_by_name.setdefault(course['name'], set()).add(course['semester'])
+    return sum(1 for semesters in semesters_by_name.values() if len(semesters) > 1)
+
+
+def test_rule_engine_matches_baseline_messages(catalog, engine):
+    rng = random.Random(2025)
+    recommender = Recommender(catalog, time_budget=10.0)
+    selections = [random_selection(catalog, rng) for _ in range(300)]
+    # 무작위 선택은 거의 항상 규칙을 어기므로, 추천기가 완성한 유효한 선택도 함께 비교합니다.
+    selections += [by_semester(catalog, recommender.recommend(s, k=1)[0]['courseIds']) for s in selections[:20]]
+    assert any(engine.validate(s)['isValid'] for s in selections)
+    for selected in selections:
+        expected_semesters, expected_overall = baseline_messages(catalog, selected)
+        result = engine.validate(selected)
+        assert {key: r['messages'] for key, r in result['semesters'].items()} == expected_semesters
+        if duplicated_name_count(catalog, selected) > 1:
+            # 원래 코드는 여러 중복 과목명 중 집합 순회 순서로 하나를 골랐으므로 나머지 메시지만 비교
+            assert result['overall']['messages'][:2] == expected_overall[:2]
+            assert result['overall']['messages'][2].startswith("❌ 과목 '")
+        else:
+            assert result['overall']['messages'] == expected_overall
+        assert result['isValid'] == (
+            all(m.startswith("✅") for ms in expected_semesters.values() for m in ms)
+            and all(m.startswith("✅") for m in expected_overall)
+        )
+
+
+def test_rule_engine_initial_selection_messages(catalog, engine):
+    result = engine.validate(catalog.initial_selection())
+    assert not result['isValid']
+    assert f"❌ 미술/음악 관련 과목 중 정확히 {EXACT_ART_MUSIC_SELECTION}개를 선택해야 합니다. (현재 0개)" \
+        in result['overall']['messages']
+
+
+def test_is_valid_mask_agrees_with_validate(catalog, engine):
+    rng = random.Random(7)
+    for _ in range(300):
+        selected = random_selection(catalog, rng)
+        mask = 0
+        for ids in selected.values():
+            mask |= engine.to_mask(ids)
+        assert engine.is_valid_mask(mask) == engine.validate(selected)['isValid']
+
+
+# --- 한 학생 기록 검사 (일괄 검증/제출 API 공용) ---
+def test_validate_record(engine, valid_ids):
+    assert validate_record(engine, "2025001", valid_ids) == []
+    errors = validate_record(engine, "", valid_ids + ["zz99"])
+    assert errors == ["학번이 없습니다.", "알 수 없는 과목 ID: zz99"]
+    assert validate_record(engine, "2025001", "JSON 형식 오류: x") == ["JSON 형식 오류: x"]
+    assert any("학점" in e for e in validate_record(engine, "2025001", valid_ids[1:]))
@@ -0,0 +1,363 @@
+# timetable.py
+# 수강신청이 확정된 뒤 선택과목군 과목을 시간표 블록에 배치하고 학생을 분반에 배정하는 도구.
+#
+# 학기마다
+# 1. 충돌 그래프: 선택과목군 과목을 꼭짓점으로, 함께 신청한 학생 수를 간선 가중치로 둡니다.
+#    (같은 블록에 놓이면 그 학생들은 두 과목을 함께 들을 수 없음)
+# 2. 분반 수: 과목마다 신청 인원을 --max-section-size 이하로 나눌 수 있는 최소 분반 수를 정합니다.
+# 3. 블록 배치: 먼저 DSatur 그래프 색칠로 과목(의 모든 분반)을 블록에 놓습니다. 블록 수가 정해져 있으면
+#    (--blocks, 기본은 학생 한 명이 고르는 선택과목 수) 더 놓을 수 없는 과목은 충돌 가중치가 가장 작은 블록에 둡니다.
+#    이어서 분반 하나를 다른 블록으로 옮기는 지역 탐색으로 "과목마다 서로 다른 블록의 분반을 고를 수 없는 학생" 수를
+#    줄입니다. (학생별 판정은 과목→블록 이분 매칭) 남은 시간에는 실제 정원을 지킨 배정 결과로 다시 평가하며
+#    충돌/정원 초과 학생 수를 줄입니다. (두 단계를 합쳐 학기당 --time-limit초 이내)
+# 4. 학생 배정: 선택지가 적은 학생부터 분반 정원을 지키며 매칭하고, 남는 자리가 없으면 정원을 넘겨 배정합니다.
+# 5. 보고서: 블록별 분반, 피할 수 없는 충돌/정원 초과 학생을 JSON으로 기록하고, 학생별 분반 배정을 CSV로 씁니다.
+#
+# 사용 예:
+#   python timetable.py --storage gsheets://<ID>/Sheet1 --creds key.json --out timetable.json --sections-csv sections.csv
+#   python timetable.py --storage sqlite:///registrations.db --max-section-size 28 --blocks Y3S1=7
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import sys
+import time
+
+from catalog import load_catalog, semester_key_of
+from record_codec import catalog_resolver, iter_long_rows
+from storage import latest_selections, open_storage_for_cli
+
+ELECTIVE_GROUP_PREFIX = "선택과목군"
+DEFAULT_MAX_SECTION_SIZE = 30
+LOCAL_SEARCH_ROUNDS = 50
+DEFAULT_TIME_LIMIT = 3.0  # 학기당 분반 이동 지역 탐색 시간(초)
+
+
+# --- 충돌 그래프 ---
+def build_conflict_graph(selections, course_ids):
+    """학생별 과목 ID 목록으로 충돌 그래프를 만듭니다.
+
+    반환값: (그래프 {과목: {이웃 과목: 함께 신청한 학생 수}}, 신청 학생 {과목: [학번, ...]})
+    """
+    course_ids = set(course_ids)
+    graph = {cid: {} for cid in course_ids}
+    enrolled = {cid: [] for cid in course_ids}
+    for student_id, chosen in selections.items():
+        chosen = sorted(cid for cid in set(chosen) if cid in course_ids)
+        for i, a in enumerate(chosen):
+            enrolled[a].append(student_id)
+            for b in chosen[i + 1:]:
+                graph[a][b] = graph[a].get(b, 0) + 1
+                graph[b][a] = graph[b].get(a, 0) + 1
+    return graph, enrolled
+
+
+# --- 블록 배치 ---
+def dsatur(graph, max_blocks=None):
+    """DSatur 색칠로 과목별 블록 번호를 정합니다.
+
+    포화도(이웃이 쓴 서로 다른 블록 수)가 가장 큰 과목부터, 가중 차수가 큰 과목을 먼저 놓습니다.
+    max_blocks를 넘어야 하면 충돌 가중치가 가장 작은 블록에 둡니다.
+    """
+    weighted_degree = {cid: sum(neighbors.values()) for cid, neighbors in graph.items()}
+    neighbor_blocks = {cid: set() for cid in graph}
+    blocks = {}
+    while len(blocks) < len(graph):
+        cid = max((c for c in graph if c not in blocks),
+                  key=lambda c: (len(neighbor_blocks[c]), weighted_degree[c], c))
+        used = neighbor_blocks[cid]
+        block = next(b for b in range(len(graph) + 1) if b not in used)
+        if max_blocks is not None and block >= max_blocks:
+            block = min(range(max_blocks), key=lambda b: (_block_cost(graph, blocks, cid, b), b))
+        blocks[cid] = block
+        for neighbor in graph[cid]:
+            neighbor_blocks[neighbor].add(block)
+    return blocks
+
+
+def _block_cost(graph, blocks, cid, block):
+    return sum(w for neighbor, w in graph[cid].items() if neighbor != cid and blocks.get(neighbor) == block)
+
+
+def improve_blocks(graph, blocks, n_blocks, rounds=LOCAL_SEARCH_ROUNDS):
+    """과목 하나를 다른 블록으로 옮겨 충돌 가중치 합이 줄어드는 동안 반복합니다. (최선 개선 지역 탐색)"""
+    for _ in range(rounds):
+        best = None
+        for cid in graph:
+            current = _block_cost(graph, blocks, cid, blocks[cid])
+            if current == 0:
+                continue
+            for block in range(n_blocks):
+                gain = current - _block_cost(graph, blocks, cid, block)
+                if gain > 0 and (best is None or gain > best[0]):
+                    best = (gain, cid, block)
+        if best is None:
+            break
+        blocks[best[1]] = best[2]
+    return blocks
+
+
+def conflict_weight(graph, blocks):
+    return sum(w for a, neighbors in graph.items() for b, w in neighbors.items() if a < b and blocks[a] == blocks[b])
+
+
+# --- 분반 ---
+def section_counts(enrolled, max_section_size):
+    """과목마다 max_section_size 이하로 나눌 수 있는 최소 분반 수."""
+    return {cid: math.ceil(len(students) / max_section_size) for cid, students in enrolled.items() if students}
+
+
+def match_blocks(course_ids, options):
+    """학생 한 명의 과목마다 서로 다른 블록을 고릅니다. {과목: 블록} 또는 불가능하면 None.
+
+    options: {과목: 고를 수 있는 블록 집합}. 선택지가 적은 과목부터 되돌아가며 찾습니다. (과목 수가 적어 충분히 빠름)
+    """
+    order = sorted(course_ids, key=lambda c: len(options[c]))
+    chosen = {}
+    used = set()
+
+    def place(i):
+        if i == len(order):
+            return True
+        cid = order[i]
+        for block in options[cid]:
+            if block not in used:
+                chosen[cid] = block
+                used.add(block)
+                if place(i + 1):
+                    return True
+                used.discard(block)
+        return False
+
+    return chosen if place(0) else None
+
+
+def improve_sections(section_blocks, student_courses, n_blocks, time_limit=DEFAULT_TIME_LIMIT, seed=0):
+    """분반 하나를 다른 블록으로 옮겨, 과목마다 다른 블록의 분반을 고를 수 없는 학생 수를 줄입니다.
+
+    매번 배정할 수 없는 학생의 과목 중 하나에서 분반을 골라 옮겨 보고, 나빠지지 않으면 받아들입니다.
+    section_blocks({과목: [분반별 블록]})을 제자리에서 고치고 남은 배정 불가 학생 수를 반환합니다.
+    """
+    rng = random.Random(seed)
+    students_of = {}
+    for student_id, courses in student_courses.items():
+        for cid in courses:
+            students_of.setdefault(cid, []).append(student_id)
+
+    def options_of(courses):
+        return {cid: set(section_blocks[cid]) for cid in courses}
+
+    unmatched = {sid for sid, courses in student_courses.items() if match_blocks(courses, options_of(courses)) is None}
+    deadline = time.perf_counter() + time_limit
+    while unmatched and time.perf_counter() < deadline:
+        student_id = rng.choice(sorted(unmatched)) if len(unmatched) < 64 else rng.choice(tuple(unmatched))
+        cid = rng.choice(student_courses[student_id])
+        section = rng.randrange(len(section_blocks[cid]))
+        old_block = section_blocks[cid][section]
+        new_block = rng.randrange(n_blocks)
+        if new_block == old_block:
+            continue
+        section_blocks[cid][section] = new_block
+        changed = {}
+        for sid in students_of[cid]:
+            ok = match_blocks(student_courses[sid], options_of(student_courses[sid])) is not None
+            if ok == (sid in unmatched):
+                changed[sid] = ok
+        delta = sum(-1 if ok else 1 for ok in changed.values())
+        if delta <= 0:
+            for sid, ok in changed.items():
+                if ok:
+                    unmatched.discard(sid)
+                else:
+                    unmatched.add(sid)
+        else:
+            section_blocks[cid][section] = old_block
+    return len(unmatched)
+
+
+def assign_students(section_blocks, student_courses, max_section_size):
+    """학생을 분반에 배정합니다.
+
+    반환값: (분반별 학생 {과목: [[학번, ...], ...]}, 문제 목록 [{'studentId', 'reason', 'courseIds'}])
+    선택지가 적은 학생부터 정원이 남은 분반으로 매칭하고, 안 되면 정원을 넘겨서라도 다른 블록에 배정하며,
+    그래도 안 되면 같은 블록에 겹쳐 배정하고 충돌로 보고합니다.
+    """
+    members = {cid: [[] for _ in blocks] for cid, blocks in section_blocks.items()}
+    problems = []
+
+    def open_options(courses):
+        return {cid: {b for n, b in enumerate(section_blocks[cid]) if len(members[cid][n]) < max_section_size}
+                for cid in courses}
+
+    def flexibility(item):
+        student_id, courses = item
+        return (sum(len(set(section_blocks[cid])) for cid in courses) - len(courses), student_id)
+
+    for student_id, courses in sorted(student_courses.items(), key=flexibility):
+        chosen = match_blocks(courses, open_options(courses))
+        if chosen is None:
+            chosen = match_blocks(courses, {cid: set(section_blocks[cid]) for cid in courses})
+            if chosen is None:
+                # 서로 다른 블록에 모두 놓을 수 없음: 과목마다 가장 한가한 분반에 두고 겹치는 과목을 보고
+                chosen = {}
+                for cid in courses:
+                    chosen[cid] = section_blocks[cid][min(range(len(members[cid])), key=lambda n: len(members[cid][n]))]
+                by_block = {}
+                for cid, block in chosen.items():
+                    by_block.setdefault(block, []).append(cid)
+                clashing = sorted(cid for cids in by_block.values() if len(cids) > 1 for cid in cids)
+                problems.append({'studentId': student_id, 'reason': "시간표 충돌", 'courseIds': clashing})
+            else:
+                problems.append({'studentId': student_id, 'reason': "분반 정원 초과", 'courseIds': sorted(courses)})
+        for cid, block in chosen.items():
+            candidates = [n for n, b in enumerate(section_blocks[cid]) if b == block]
+            section = min(candidates, key=lambda n: len(members[cid][n]))
+            members[cid][section].append(student_id)
+    return members, problems
+
+
+def balance_sections(section_blocks, student_courses, n_blocks, max_section_size, time_limit, seed=0):
+    """남은 시간 동안 분반을 옮겨 가며 실제 배정(assign_students)의 충돌/정원 초과 학생 수를 줄입니다.
+
+    문제 학생의 과목 중 하나에서 분반을 골라 다른 블록으로 옮겨 보고, 나빠지지 않으면 받아들입니다.
+    반환값: 가장 좋은 배치의 assign_students 결과
+    """
+    rng = random.Random(seed + 1)
+    best = assign_students(section_blocks, student_courses, max_section_size)
+    deadline = time.perf_counter() + max(0.0, time_limit)
+    while best[1] and time.perf_counter() < deadline:
+        problem = rng.choice(best[1])
+        cid = rng.choice(problem['courseIds'])
+        section = rng.randrange(len(section_blocks[cid]))
+        old_block = section_blocks[cid][section]
+        new_block = rng.randrange(n_blocks)
+        if new_block == old_block:
+            continue
+        section_blocks[cid][section] = new_block
+        candidate = assign_students(section_blocks, student_courses, max_section_size)
+        if len(candidate[1]) <= len(best[1]):
+            best = candidate
+        else:
+            section_blocks[cid][section] = old_block
+    return best
+
+
+# --- 학기별 시간표 ---
+def elective_course_ids(catalog, semester_key):
+    return [cid for name, group in catalog.groups(semester_key).items()
+            if not group['isMandatory'] and name.startswith(ELECTIVE_GROUP_PREFIX) for cid in group['courseIds']]
+
+
+def build_semester_timetable(catalog, semester_key, selections, max_section_size=DEFAULT_MAX_SECTION_SIZE, n_blocks=None,
+                             time_limit=DEFAULT_TIME_LIMIT, seed=0):
+    """한 학기의 블록 배치, 분반 배정, 남은 충돌을 계산합니다."""
+    electives = elective_course_ids(catalog, semester_key)
+    graph, enrolled = build_conflict_graph(selections, electives)
+    # 아무도 신청하지 않은 과목은 개설하지 않습니다.
+    graph = {cid: neighbors for cid, neighbors in graph.items() if enrolled[cid]}
+    if n_blocks is None:
+        n_blocks = sum(group['quota'] for name, group in catalog.groups(semester_key).items()
+                       if not group['isMandatory'] and name.startswith(ELECTIVE_GROUP_PREFIX))
+    blocks = dsatur(graph, n_blocks or None)
+    n_blocks = max(n_blocks, max(blocks.values(), default=-1) + 1)
+    blocks = improve_blocks(graph, blocks, n_blocks)
+
+    counts = section_counts({cid: enrolled[cid] for cid in graph}, max_section_size)
+    section_blocks = {cid: [blocks[cid]] * counts[cid] for cid in graph}
+    student_courses = {sid: sorted({cid for cid in chosen if cid in graph}) for sid, chosen in selections.items()}
+    student_courses = {sid: courses for sid, courses in student_courses.items() if courses}
+    deadline = time.perf_counter() + time_limit
+    improve_sections(section_blocks, student_courses, n_blocks, time_limit, seed)
+    members, problems = balance_sections(section_blocks, student_courses, n_blocks, max_section_size,
+                                         deadline - time.perf_counter(), seed)
+
+    block_table = []
+    for block in range(n_blocks):
+        sections = []
+        for cid in sorted(graph, key=lambda c: catalog.by_id[c]['name']):
+            for number, section_block in enumerate(section_blocks[cid], start=1):
+                if section_block == block:
+                    sections.append({'courseId': cid, 'name': catalog.by_id[cid]['name'], 'group': catalog.by_id[cid]['group'],
+                                     'section': number, 'students': len(members[cid][number - 1])})
+        block_table.append({'block': block + 1, 'sections': sections})
+    return {
+        'semesterKey': semester_key,
+        'blockCount': n_blocks,
+        'blocks': block_table,
+        'courseConflictWeight': conflict_weight(graph, blocks),
+        'conflicts': problems,
+        'sectionBlocks': section_blocks,
+        'sections': members,
+    }
+
+
+def split_by_semester(catalog, students):
+    """latest_selections 결과를 {학기키: {학번: [과목 ID, ...]}}로 나눕니다."""
+    by_semester = {key: {} for key in catalog.semester_keys}
+    for student_id, entry in students.items():
+        for cid in entry['courseIds']:
+            course = catalog.by_id.get(cid)
+            if course is not None:
+                by_semester[semester_key_of(course)].setdefault(student_id, []).append(cid)
+    return by_semester
+
+
+def _parse_blocks(values):
+    blocks = {}
+    for value in values or ():
+        key, _, count = value.partition("=")
+        blocks[key] = int(count)
+    return blocks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="선택과목 시간표 블록 배치와 분반 배정")
+    parser.add_argument("--storage", default=os.environ.get("COURSE_STORAGE_URL"), required=not os.environ.get("COURSE_STORAGE_URL"),
+                        help="저장소 URL (sqlite:///파일.db 또는 gsheets://<ID>/<시트>), 기본값: COURSE_STORAGE_URL")
+    parser.add_argument("--creds", help="Google 서비스 계정 키(JSON) 파일 경로 (gsheets 사용 시)")
+    parser.add_argument("--courses", default="courses.json", help="과목 정보 파일 (기본: courses.json)")
+    parser.add_argument("--max-section-size", type=int, default=DEFAULT_MAX_SECTION_SIZE, help="분반 최대 인원 (기본: 30)")
+    parser.add_argument("--blocks", nargs="*", metavar="학기키=블록수",
+                        help="학기별 블록 수 (예: Y3S1=7), 기본: 학생 한 명이 고르는 선택과목 수")
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT, help="학기당 지역 탐색 시간(초, 기본: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="지역 탐색 난수 시드")
+    parser.add_argument("--out", default="timetable.json", help="보고서 JSON 경로 (기본: timetable.json)")
+    parser.add_argument("--sections-csv", help="학생별 분반 배정 CSV 경로")
+    args = parser.parse_args(argv)
+
+    catalog = load_catalog(args.courses)
+    storage = open_storage_for_cli(args.storage, args.creds)
+    students = latest_selections(iter_long_rows(storage, catalog_resolver(catalog)))
+    block_counts = _parse_blocks(args.blocks)
+
+    started = time.perf_counter()
+    report = []
+    for semester_key, selections in split_by_semester(catalog, students).items():
+        result = build_semester_timetable(catalog, semester_key, selections, args.max_section_size, block_counts.get(semester_key),
+                                          args.time_limit, args.seed)
+        report.append(result)
+        print(f"{semester_key}: 블록 {result['blockCount']}개, 충돌/정원 초과 학생 {len(result['conflicts'])}명", file=sys.stderr)
+    print(f"학생 {len(students)}명, {time.perf_counter() - started:.2f}초", file=sys.stderr)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump([{k: v for k, v in r.items() if k not in ('sections', 'sectionBlocks')} for r in report], f, ensure_ascii=False, indent=1)
+    if args.sections_csv:
+        with open(args.sections_csv, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Semester Key", "Block", "Course ID", "Course Name", "Section", "Student ID", "Student Name"])
+            for result in report:
+                for cid, sections in sorted(result['sections'].items()):
+                    for number, members in enumerate(sections, start=1):
+                        block = result['sectionBlocks'][cid][number - 1] + 1
+                        for student_id in members:
+                            writer.writerow([result['semesterKey'], block, cid, catalog.by_id[cid]['name'],
+                                             number, student_id, students[student_id]['name']])
+    unavoidable = sum(len(r['conflicts']) for r in report)
+    print(f"완료: {args.out} (충돌/정원 초과 학생 {unavoidable}건)")
+    return 1 if unavoidable else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
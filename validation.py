@@ -0,0 +1,251 @@
+# validation.py
+# 수강신청 규칙 검사 엔진.
+# 선택 상태를 카탈로그 위치 기준의 정수 비트마스크로 다루고, 그룹 정원/학점/미술·음악/국영수/과목명 중복
+# 규칙을 미리 계산한 마스크와 popcount(int.bit_count)로 검사합니다.
+# Streamlit UI, 일괄 검증 스크립트, 제출 API에서 모두 같은 엔진을 사용합니다.
+import functools
+
+from catalog import semester_key_of
+
+# 미술/음악, 국영수 관련 과목 ID (courses.json의 ID와 일치해야 함)
+ART_MUSIC_COURSE_IDS = ["c19", "c20", "c40", "c41", "c55", "c56", "c82", "c83"]
+KES_MAX_COURSE_IDS = ["c34", "c57", "c58", "c59", "c60", "c84", "c85"]
+EXACT_ART_MUSIC_SELECTION = 2
+MAX_KES_SELECTION = 3
+
+# 학년별, 학기별 필요 총 학점
+REQUIRED_TOTAL_HOURS_MAP = {
+    "Y2S1": 29, "Y2S2": 29,
+    "Y3S1": 29, "Y3S2": 29
+}
+
+
+class RuleEngine:
+    """한 카탈로그 버전에 대해 규칙 마스크를 미리 계산해 둔 검사기입니다."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.bits = {cid: 1 << i for cid, i in catalog.index.items()}
+        self._ids_by_position = tuple(c['id'] for c in catalog.courses)
+
+        # 학기별: 전체 마스크, 정원 그룹 (이름, 마스크, 정원), 학점별 마스크
+        self.semester_masks = {}
+        self.quota_groups = {}
+        self.hours_masks = {}
+        for semester_key in catalog.semester_keys:
+            self.semester_masks[semester_key] = self.to_mask(c['id'] for c in catalog.courses_by_semester[semester_key])
+            self.quota_groups[semester_key] = tuple(
+                (group_name, self.to_mask(group['courseIds']), group['quota'])
+                for group_name, group in catalog.groups(semester_key).items()
+                if not group['isMandatory'] and group['quota'] > 0
+            )
+            by_hours = {}
+            for c in catalog.courses_by_semester[semester_key]:
+                by_hours[c['hours']] = by_hours.get(c['hours'], 0) | self.bits[c['id']]
+            self.hours_masks[semester_key] = tuple(by_hours.items())
+        self.all_hours_masks = {}
+        for c in catalog.courses:
+            self.all_hours_masks[c['hours']] = self.all_hours_masks.get(c['hours'], 0) | self.bits[c['id']]
+        self.all_hours_masks = tuple(self.all_hours_masks.items())
+
+        self.mandatory_mask = self.to_mask(catalog.mandatory_ids)
+        self.art_music_mask = self.to_mask(ART_MUSIC_COURSE_IDS)
+        self.kes_mask = self.to_mask(KES_MAX_COURSE_IDS)
+
+        # 과목명 중복: 서로 다른 학기(1학기/2학기)에 같은 이름으로 개설된 과목만 미리 추려 둡니다.
+        self.duplicate_name_masks = []
+        for name, ids in catalog.ids_by_name.items():
+            by_semester = {}
+            for cid in ids:
+                semester = catalog.by_id[cid]['semester']
+                by_semester[semester] = by_semester.get(semester, 0) | self.bits[cid]
+            if len(by_semester) > 1:
+                self.duplicate_name_masks.append((name, tuple(by_semester.values())))
+        self.duplicate_name_masks = tuple(self.duplicate_name_masks)
+        self.duplicate_candidates_mask = 0
+        for _, masks in self.duplicate_name_masks:
+            for m in masks:
+                self.duplicate_candidates_mask |= m
+
+    # --- 마스크 변환 ---
+    def to_mask(self, course_ids):
+        mask = 0
+        bits = self.bits
+        for cid in course_ids:
+            bit = bits.get(cid)
+            if bit:
+                mask |= bit
+        return mask
+
+    def to_ids(self, mask):
+        ids = []
+        while mask:
+            low = mask & -mask
+            ids.append(self._ids_by_position[low.bit_length() - 1])
+            mask ^= low
+        return ids
+
+    def selection_masks(self, selected_by_semester):
+        """{학기키: 과목 ID 집합} 을 {학기키: 마스크} 로 변환합니다."""
+        return {key: self.to_mask(ids) for key, ids in selected_by_semester.items()}
+
+    def semester_masks_from_mask(self, mask):
+        """전체 선택 마스크를 학기별 마스크로 나눕니다."""
+        return {key: mask & sem_mask for key, sem_mask in self.semester_masks.items()}
+
+    def hours(self, mask, semester_key=None):
+        table = self.hours_masks[semester_key] if semester_key else self.all_hours_masks
+        return sum(h * (mask & m).bit_count() for h, m in table)
+
+    # --- 학기별 검사 ---
+    def validate_semester(self, semester_key, mask):
+        """한 학기 선택을 검사하고 {'isValid', 'messages', 'hours'} 를 반환합니다."""
+        messages = []
+        is_valid = True
+
+        # 1. 그룹별 선택 개수
+        for group_name, group_mask, quota in self.quota_groups.get(semester_key, ()):
+            count = (mask & group_mask).bit_count()
+            if count != quota:
+                messages.append(f"❌ '{group_name}' 그룹에서 {quota}개를 선택해야 합니다. (현재 {count}개)")
+                is_valid = False
+            else:
+                messages.append(f"✅ '{group_name}' 그룹 선택 완료 ({count}/{quota}개)")
+
+        # 2. 총 학점
+        # 다른 학기 과목이 섞여 들어온 경우도 기존처럼 합산되도록 전체 학점표를 사용합니다.
+        hours = self.hours(mask)
+        required_hours = REQUIRED_TOTAL_HOURS_MAP[semester_key]
+        if hours != required_hours:
+            messages.append(f"❌ 총 학점이 정확히 {required_hours}학점이어야 합니다. (현재 {hours}학점)")
+            is_valid = False
+        else:
+            messages.append(f"✅ 총 학점 조건 충족! ({hours}/{required_hours}학점)")
+
+        return {'isValid': is_valid, 'messages': messages, 'hours': hours}
+
+    # --- 전체 규칙 검사 ---
+    def find_duplicate_name(self, mask):
+        """여러 학기에 중복 선택된 첫 과목명을 반환합니다. 없으면 None."""
+        if not (mask & self.duplicate_candidates_mask):
+            return None
+        for name, masks in self.duplicate_name_masks:
+            if sum(1 for m in masks if mask & m) > 1:
+                return name
+        return None
+
+    def validate_overall(self, mask):
+        """학기를 넘나드는 규칙(미술/음악, 국영수, 과목명 중복)을 검사합니다."""
+        messages = []
+
+        # 1. 미술/음악 과목 수
+        art_music_count = (mask & self.art_music_mask).bit_count()
+        art_music_valid = (art_music_count == EXACT_ART_MUSIC_SELECTION)
+        if not art_music_valid:
+            messages.append(f"❌ 미술/음악 관련 과목 중 정확히 {EXACT_ART_MUSIC_SELECTION}개를 선택해야 합니다. (현재 {art_music_count}개)")
+        else:
+            messages.append(f"✅ 미술/음악 과목 선택 조건 충족 ({art_music_count}/{EXACT_ART_MUSIC_SELECTION}개)")
+
+        # 2. 국영수 과목 수
+        kes_count = (mask & self.kes_mask).bit_count()
+        kes_valid = (kes_count <= MAX_KES_SELECTION)
+        if not kes_valid:
+            messages.append(f"❌ 지정 국영수 관련 과목 중 {MAX_KES_SELECTION}개 이하로 선택해야 합니다. (현재 {kes_count}개)")
+        else:
+            messages.append(f"✅ 국영수 과목 선택 조건 충족 (최대 {MAX_KES_SELECTION}개, 현재 {kes_count}개)")
+
+        # 3. 중복 과목명 검사 (다른 학기에 동일 과목명 선택 불가 - 기존 app.js 로직과 유사)
+        duplicate_error = None
+        duplicate_name = self.find_duplicate_name(mask)
+        if duplicate_name is not None:
+            offerings = [
+                f"{c['year']}학년 {c['semester']}학기"
+                for c in (self.catalog.by_id[cid] for cid in self.catalog.ids_by_name[duplicate_name])
+                if mask & self.bits[c['id']]
+            ]
+            duplicate_error = f"❌ 과목 '{duplicate_name}'은(는) 여러 학기에 중복 선택할 수 없습니다. (선택된 시점: {', '.join(offerings)})"
+            messages.append(duplicate_error)
+        elif mask:
+            messages.append("✅ 과목명 중복 선택 조건 충족 (동일 과목명을 다른 학기에 선택하지 않음)")
+
+        return {
+            'isValid': art_music_valid and kes_valid and duplicate_error is None,
+            'messages': messages,
+            'artMusicValid': art_music_valid,
+            'artMusicCount': art_music_count,
+            'kesValid': kes_valid,
+            'kesCount': kes_count,
+            'duplicateError': duplicate_error,
+        }
+
+    def validate(self, selected_by_semester):
+        """학기별 선택({학기키: ID 집합 또는 마스크})을 모두 검사합니다.
+
+        반환값: {'isValid', 'semesters': {학기키: 학기 결과}, 'overall': 전체 규칙 결과, 'hours': {학기키: 학점}}
+        """
+        semester_results = {}
+        all_mask = 0
+        for semester_key, selection in selected_by_semester.items():
+            mask = selection if isinstance(selection, int) else self.to_mask(selection)
+            all_mask |= mask
+            semester_results[semester_key] = self.validate_semester(semester_key, mask)
+        overall = self.validate_overall(all_mask)
+        return {
+            'isValid': overall['isValid'] and all(r['isValid'] for r in semester_results.values()),
+            'semesters': semester_results,
+            'overall': overall,
+            'hours': {key: r['hours'] for key, r in semester_results.items()},
+        }
+
+    def validate_course_ids(self, course_ids):
+        """학기 구분 없는 과목 ID 목록을 학기별로 나누어 검사합니다. (일괄 검증/API용)"""
+        selected_by_semester = {key: set() for key in REQUIRED_TOTAL_HOURS_MAP}
+        for cid in course_ids:
+            course = self.catalog.by_id.get(cid)
+            if course is not None:
+                selected_by_semester.setdefault(semester_key_of(course), set()).add(cid)
+        return self.validate(selected_by_semester)
+
+    def is_valid_mask(self, mask):
+        """메시지 없이 전체 선택 마스크의 유효 여부만 빠르게 판정합니다."""
+        for semester_key, sem_mask in self.semester_masks.items():
+            part = mask & sem_mask
+            for _, group_mask, quota in self.quota_groups[semester_key]:
+                if (part & group_mask).bit_count() != quota:
+                    return False
+            if self.hours(part, semester_key) != REQUIRED_TOTAL_HOURS_MAP.get(semester_key):
+                return False
+        if (mask & self.art_music_mask).bit_count() != EXACT_ART_MUSIC_SELECTION:
+            return False
+        if (mask & self.kes_mask).bit_count() > MAX_KES_SELECTION:
+            return False
+        return self.find_duplicate_name(mask) is None
+
+
+@functools.lru_cache(maxsize=8)
+def get_rule_engine(catalog):
+    """카탈로그 버전별로 한 번만 만든 RuleEngine을 반환합니다."""
+    return RuleEngine(catalog)
+
+
+def validate_record(engine, student_id, course_ids):
+    """한 학생의 과목 ID 목록을 검사해 오류 메시지 목록을 반환합니다. (없으면 통과)"""
+    if isinstance(course_ids, str):  # 입력을 읽을 때 난 오류
+        return [course_ids]
+    errors = []
+    if not student_id:
+        errors.append("학번이 없습니다.")
+    catalog = engine.catalog
+    unknown = [cid for cid in course_ids if cid not in catalog.by_id]
+    if unknown:
+        errors.append(f"알 수 없는 과목 ID: {', '.join(unknown)}")
+    result = engine.validate_course_ids(list(catalog.mandatory_ids) + [cid for cid in course_ids if cid in catalog.by_id])
+    for semester_key, semester_result in result['semesters'].items():
+        label = f"{semester_key[1]}학년 {semester_key[3]}학기"
+        errors.extend(f"{label}: {_strip_mark(m)}" for m in semester_result['messages'] if m.startswith("❌"))
+    errors.extend(_strip_mark(m) for m in result['overall']['messages'] if m.startswith("❌"))
+    return errors
+
+
+def _strip_mark(message):
+    return message[1:].strip() if message.startswith("❌") else message